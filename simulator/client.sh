@@ -0,0 +1,3 @@
+#! /bin/bash
+export PYTHONPATH="src"
+src/client.py "$@"
@@ -0,0 +1,91 @@
+#! /usr/bin/env python3
+"""Long-lived simulator that accepts runs from `client.py' over a Unix socket.
+
+Logging is configured, and every module of the simulator is imported, once when the daemon starts. Each run is then
+done in a forked child of the daemon, which takes on the client's working directory and standard streams and so
+starts warm, without affecting the daemon or any other run. Runs are independent, so several clients can be served
+at once. The socket is only accessible to the user running the daemon.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import traceback
+
+from logging import getLogger
+
+import main
+from client import get_socket_path, receive_message, send_message, STANDARD_STREAMS
+from logger import StyleAdapter
+
+log = StyleAdapter(getLogger(__name__))
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Daemon to run simulations requested by client.py")
+    p.add_argument("--socket", "-s", default=get_socket_path(),
+        help="Path of the Unix socket to listen on (default from $JANITOR_SIMULATOR_SOCKET or the temp directory)")
+    return p
+
+
+def listen(socket_path):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    # runs are done as the daemon's user, so other users must not be able to connect
+    os.chmod(socket_path, 0o600)
+    server.listen(16)
+    return server
+
+
+def serve(socket_path):
+    server = listen(socket_path)
+    # children are never waited for, so have them reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    log.info("listening on {}", socket_path)
+    try:
+        while True:
+            connection, _address = server.accept()
+            if os.fork() == 0:
+                server.close()
+                os._exit(handle(connection))
+            connection.close()
+    finally:
+        server.close()
+        os.remove(socket_path)
+
+
+def handle(connection):
+    """Run the simulation requested on connection, in the current (forked) process, returning its exit status."""
+    status = 1
+    try:
+        request, fds = receive_message(connection)
+        if request is None or len(fds) != len(STANDARD_STREAMS):
+            return status
+        for fd, standard_fd in zip(fds, STANDARD_STREAMS):
+            os.dup2(fd, standard_fd)
+            os.close(fd)
+        os.chdir(request["cwd"])
+        sys.argv = ["main.py"] + request["argv"]
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        try:
+            status = 0 if main.run(request["argv"]) else 1
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send_message(connection, {"exit": status})
+    except Exception:
+        traceback.print_exc()
+    finally:
+        connection.close()
+    return status
+
+
+if __name__ == "__main__":
+    serve(parser().parse_args().socket)
@@ -0,0 +1,3 @@
+#! /bin/bash
+export PYTHONPATH="src"
+./daemon.py "$@"
@@ -6,21 +6,35 @@ Created on 12 Jul 2014
 """
 
 import argparse
+import cProfile
 import decimal
 import logging.config
 
+from os.path import splitext
+
 logging.config.fileConfig("logging.conf")
 
-from executor import PartialExecutionOnObservationExecutor, PartialExecutionOnObservationAndStatePredictionExecutor, \
-    FinishActionsAndUseStatePredictionExecutor, FinishActionsExecutor, GreedyPlanHeuristicExecutor
-from planner import Planner
+from executor import executor_types, GreedyPlanHeuristicExecutor
+from planner import Planner, get_domain_file
+from heuristic_planner import HeuristicPlanner
 from new_simulator import Simulator
+from checkpoint import Checkpointer, load_checkpoint
+from execution_trace import ExecutionTrace
+from live import LivePublisher
+from speculation import Speculator
+from profiler import profile
 
+import distances
 import problem_parser
 import logger
+import results_db
 
 log = logger.StyleAdapter(logging.getLogger())
 
+log_formats = {"repr": logger.Logger, "jsonl": logger.JsonLinesLogger, "sqlite": results_db.DatabaseLogger}
+
+heuristic_planners = {"optic": lambda planner: planner, "native": lambda planner: HeuristicPlanner()}
+
 
 def parser():
     p = argparse.ArgumentParser(description="Simulator to run planner and carry out plan")
@@ -29,32 +43,93 @@ def parser():
     p.add_argument("--planning-time", "-t", type=decimal.Decimal, default="nan",
         help="The amount of time to spend planning")
     p.add_argument("--log-directory", "-l", default="logs")
+    p.add_argument("--executor", "-e", choices=sorted(executor_types), default=GreedyPlanHeuristicExecutor.__name__,
+        help="The execution strategy to use")
+    p.add_argument("--checkpoint", "-c",
+        help="File to save checkpoints of the simulation to. May contain `{time}' to keep every checkpoint")
+    p.add_argument("--checkpoint-times", type=decimal.Decimal, nargs="+", default=(),
+        help="Simulation times at which to save a checkpoint")
+    p.add_argument("--checkpoint-on-replan", action="store_true", help="Save a checkpoint whenever a plan is received")
+    p.add_argument("--restore", "-r", help="Resume the simulation from a checkpoint file")
+    p.add_argument("--log-format", choices=sorted(log_formats), default="repr",
+        help="Format to log the results of the run in")
+    p.add_argument("--quiet", "-q", action="store_true",
+        help="Compile out logging below warning level, for batch runs")
+    p.add_argument("--profile", action="store_true",
+        help="Record the time spent in each phase of the run, and write a report next to the log")
+    p.add_argument("--cprofile", action="store_true", help="Also write a cProfile dump of the run next to the log")
+    p.add_argument("--trace-file",
+        help="File to stream executed actions to, rather than keeping them in memory until the end of the run")
+    p.add_argument("--trace-window", type=int, default=0,
+        help="Number of recently executed actions to keep in memory when using a trace file")
+    p.add_argument("--heuristic-planner", choices=sorted(heuristic_planners), default="optic",
+        help="Planner used to create plans for the executor's heuristic (native is the in-process task allocator)")
+    p.add_argument("--live", type=int, nargs="?", const=8765, metavar="PORT",
+        help="Publish simulator events on a websocket (default port 8765) for the visualiser to show the run live")
+    p.add_argument("--speculate", action="store_true",
+        help="Plan in the background for observations that would need a new plan, whilst agents move to them")
     return p
 
 
-def get_domain_file(model):
-    return "../janitor/{}-domain.pddl".format(model["domain"])
+def get_profile_file_name(log_file_name, ext):
+    return splitext(log_file_name)[0] + "-profile" + ext
 
 
-def run():
-    args = parser().parse_args()
+def run(argv=None):
+    """Run the simulation described by argv (the command line arguments by default), returning whether the goal
+    was achieved."""
+    args = parser().parse_args(argv)
+    if args.quiet:
+        logger.StyleAdapter.compile_out(logging.WARNING)
     log.info(args)
-    log_file_name = logger.Logger.get_log_file_name(args.problem_file, args.planning_time)
+    logger_type = log_formats[args.log_format]
+    log_file_name = logger_type.get_log_file_name(args.problem_file, args.planning_time)
     log.info("log: {}", log_file_name)
 
     model = problem_parser.decode(args.problem_file)
-    executor = GreedyPlanHeuristicExecutor(args.planning_time)
+    executor = executor_types[args.executor](args.planning_time)
     planner = Planner(args.planning_time, domain_file=args.domain_file or get_domain_file(model))
-
-    with logger.Logger(log_file_name, args.log_directory) as result_logger:
-        simulator = Simulator(model, executor, planner, result_logger)
+    heuristic_planner = heuristic_planners[args.heuristic_planner](planner)
+    if args.heuristic_planner == "native":
+        distances.load(args.problem_file, model)
+    checkpointer = Checkpointer(args.checkpoint, args.checkpoint_times, args.checkpoint_on_replan) \
+        if args.checkpoint else None
+
+    with logger_type(log_file_name, args.log_directory) as result_logger:
+        result_logger.log_property("executor", args.executor, stringify=repr)
+        listener = LivePublisher(port=args.live) if args.live is not None else None
+        speculator = Speculator(planner) if args.speculate else None
+        if args.restore:
+            simulator = load_checkpoint(args.restore, planner, result_logger, checkpointer,
+                heuristic_planner)
+            if listener:
+                simulator.listener = listener
+            if speculator:
+                simulator.speculator = speculator
+        else:
+            executed = ExecutionTrace(args.trace_file, args.trace_window) if args.trace_file else None
+            simulator = Simulator(model, executor, planner, result_logger, checkpointer=checkpointer,
+                executed=executed, listener=listener, heuristic_planner=heuristic_planner, speculator=speculator)
+        profile.enabled = args.profile
+        cprofile = cProfile.Profile() if args.cprofile else None
+        if cprofile:
+            cprofile.enable()
         try:
             result = simulator.run()
         finally:
+            if cprofile:
+                cprofile.disable()
+                cprofile.dump_stats(get_profile_file_name(result_logger.log_file_name, ".prof"))
+            if args.profile:
+                profile.write_report(get_profile_file_name(result_logger.log_file_name, ".txt"))
             simulator.print_results(result_logger)
+            if isinstance(simulator.executed, ExecutionTrace):
+                simulator.executed.close()
+            simulator.listener.close()
+            simulator.speculator.close()
 
-    if not result:
-        exit(1)
+    return result
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    if not run():
+        exit(1)
\ No newline at end of file
@@ -16,6 +16,10 @@ function usage {
 	echo "                       (default \`unsolved-problems.txt')"
 	echo "  -l LOG_DIR         The logging directory to log output and failed runs to."
 	echo "                       (default \`logs')"
+	echo "  -f LOG_FORMAT      Format to log results in, sqlite records every run in"
+	echo "                       LOG_DIR/results.sqlite. (default \`repr')"
+	echo "  -c                 Run problems with client.sh, in an already running"
+	echo "                       simulator daemon (see daemon.sh), rather than main.sh."
 	echo "  -h                 Print this usage instructions."
 
 	exit 1
@@ -25,8 +29,10 @@ function usage {
 time_opt="30"
 log_dir="logs"
 error_log_file="unsolved-problems.txt"
+log_format="repr"
+run_command="./main.sh"
 
-args=`getopt t:e:l:d: $*`
+args=`getopt t:e:l:d:f:c $*`
 if [[ $? -ne 0 ]]
 then
 	usage
@@ -51,6 +57,13 @@ do
 		shift
 		problem_dir="$1"
 		;;
+	-f)
+		shift
+		log_format="$1"
+		;;
+	-c)
+		run_command="./client.sh"
+		;;
 	--)
 		shift
 		break
@@ -79,7 +92,7 @@ function process_file {
     file_name="$1"
 	base_file_name="`basename ${file_name}`"
 	echo "starting $file_name"
-	./main.sh "$file_name" -t "$time_opt" -l "$log_dir" 2>&1 | tee "$log_dir/output/$base_file_name"
+	"$run_command" "$file_name" -t "$time_opt" -l "$log_dir" --log-format "$log_format" 2>&1 | tee "$log_dir/output/$base_file_name"
 	exit_val="${PIPESTATUS[0]}"
 	if [[ "$exit_val" != 0 ]]
 	then
@@ -3,6 +3,7 @@ from functools import total_ordering, partial as partial_func
 from accuracy import as_end_time, INSTANTANEOUS_ACTION_DURATION
 from logger import StyleAdapter
 from planning_exceptions import ExecutionError
+import transit
 from logging import getLogger
 
 log = StyleAdapter(getLogger(__name__))
@@ -104,6 +105,25 @@ class Plan(Action):
         return self.plan
 
 
+class PlanUpdate(Action):
+    """A better plan found by the planner `duration' after the plan requested at `start_time'."""
+
+    _ordinal = 3
+
+    _format_attrs = ("start_time", "duration", "agent")
+
+    def __init__(self, start_time, duration, agent=None, plan=None):
+        super(PlanUpdate, self).__init__(start_time, duration)
+        object.__setattr__(self, "agent", agent if agent else Plan.agent)
+        object.__setattr__(self, "plan", plan)
+
+    def is_applicable(self, model):
+        return True
+
+    def apply(self, model):
+        return self.plan
+
+
 class Stalled(Action):
 
     _format_attrs = ("start_time", "duration", "agent")
@@ -129,15 +149,14 @@ class Move(Action):
     def apply(self, model):
         assert self.is_applicable(model), "tried to apply action in an invalid state"
         model["agents"][self.agent]["at"][1] = self.end_node
-        if self.start_node.startswith("temp"):
-            del model["nodes"][self.start_node]
-            model["graph"]["edges"] = [edge for edge in model["graph"]["edges"] if self.start_node not in edge]
+        if transit.is_temp_node(self.start_node):
+            del model["in-transit"][self.start_node]
         return False
 
     def partially_apply(self, model, deadline):
         assert self.is_applicable(model), "tried to apply action in an invalid state"
-        # create temp node
-        continued_partial_move = self.start_node.startswith("temp")
+        # put agent in transit
+        continued_partial_move = transit.is_temp_node(self.start_node)
         if continued_partial_move:
             self.modify_temp_node(model, deadline)
         else:
@@ -146,39 +165,35 @@ class Move(Action):
 
     def modify_temp_node(self, model, deadline):
         temp_node_name = self.start_node
+        position = model["in-transit"][temp_node_name]
+        start_node, end_node, length = position["edge"]
 
-        back_edge, forward_edge = (edge for edge in model["graph"]["edges"] if edge[0] == temp_node_name)
-
-        if forward_edge[1] == self.end_node:
-            distance_moved = deadline - self.start_time
-        elif back_edge[1] == self.end_node:
-            distance_moved = self.start_time - deadline
+        distance_moved = deadline - self.start_time
+        if end_node == self.end_node:
+            position["offset"] += distance_moved
+        elif start_node == self.end_node:
+            position["offset"] -= distance_moved
         else:
-            raise ExecutionError("Neither temp node edge links to end_node: edges: {}, action: {}"
-                .format([back_edge, forward_edge], self))
-
-        back_edge[2] += distance_moved
-        forward_edge[2] -= distance_moved
+            raise ExecutionError("Neither end of in-transit edge is end_node: edge: {}, action: {}"
+                .format(position["edge"], self))
 
-        assert back_edge[2] > 0
-        assert forward_edge[2] > 0
+        assert 0 < position["offset"] < length
 
         # create partial action representing move
         action = Move(self.start_time, distance_moved, self.agent, temp_node_name, self.end_node, partial=True)
         return action
 
     def create_temp_node(self, model, deadline):
-        temp_node_name = "-".join(("temp", self.agent, self.start_node, self.end_node))
-        if temp_node_name in model["nodes"] or \
-                any(edge for edge in model["graph"]["edges"] if edge[0] == temp_node_name):
+        temp_node_name = transit.temp_node_name(self.agent, self.start_node, self.end_node)
+        in_transit = model.setdefault("in-transit", {})
+        if temp_node_name in in_transit:
             log.error("tried to insert {}, but already initialised", temp_node_name)
             assert False
-        model["nodes"][temp_node_name] = {"node": True}
-        # set up edges -- only allow movement out of node
+        # only allow movement out of the agent's position to either end of the edge
         distance_moved = deadline - self.start_time
-        distance_remaining = self.get_edge_length(model, self.start_node, self.end_node) - distance_moved
-        model["graph"]["edges"].append([temp_node_name, self.start_node, distance_moved])
-        model["graph"]["edges"].append([temp_node_name, self.end_node, distance_remaining])
+        length = self.get_edge_length(model, self.start_node, self.end_node)
+        in_transit[temp_node_name] = {"agent": self.agent, "edge": [self.start_node, self.end_node, length],
+            "offset": distance_moved}
         # move agent to temp node
         model["agents"][self.agent]["at"][1] = temp_node_name
         # create partial action representing move
@@ -191,7 +206,9 @@ class Move(Action):
             if edge_key == edge[:2]:
                 return edge[-1]
         if model["graph"]["bidirectional"]:
-            raise NotImplementedError()
+            for edge in model["graph"]["edges"]:
+                if edge_key == edge[1::-1]:
+                    return edge[-1]
         raise ExecutionError("Could not find {} in {}".format(edge_key, model["graph"]["edges"]))
 
 
@@ -55,7 +55,8 @@ class ActionState(object):
         return new
 
     def finish(self):
-        log.info("finishing: {}", self.action)
+        if log.isEnabledFor(logging.INFO):
+            log.info("finishing: {}", self.action)
         if self.state != ExecutionState.executing:
             raise ExecutionError("invalid state")
         new = copy(self)
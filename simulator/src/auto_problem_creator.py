@@ -1,27 +1,9 @@
 #! /usr/bin/python3
 
-from problem_creator import Point, ActualMinMax, create_problem, create_problem_irreversible
+from problem_creator import Point, ActualMinMax
+from problem_generator import generate_problem_name, get_centre, generate_corpus
 from random import sample
 from itertools import product
-from os.path import join
-
-
-def generate_problem_name(size, dirtiness, edge_length, agents, starting_location, percentage_extra_dirty):
-    keys = dict(locals())
-    format_string = "auto-size({size.x},{size.y})-dirt({dirtiness.actual},{dirtiness.min},{dirtiness.max})-" \
-        "edge({edge_length})-agents({agents})-start({starting_location})-extra_dirt({percentage_extra_dirty:.0%})"
-    return format_string.format(**keys)
-
-
-def generate_problem_name_irreversible(size, dirtiness, edge_length, agents, starting_location, percentage_extra_dirty):
-    keys = dict(locals())
-    format_string = "auto-size({size.x},{size.y})-dirt({dirtiness.actual},{dirtiness.min},{dirtiness.max})-" \
-        "edge({edge_length})-agents({agents})-start({starting_location})-extra_dirt({percentage_extra_dirty:.0%})"
-    return format_string.format(**keys)
-
-
-def get_centre(size):
-    return Point(*(int(i/2.0 - 0.5) for i in size))
 
 
 def generate_random_locations(size, sample_size=None, percentage=None, exclude=()):
@@ -57,35 +39,14 @@ def run():
     )
     edge_length_types = (20,)
     agents_types = (3, 5, 7,)
-    starting_location_types = ("centre",)  # empty_rooms and agent_start
     percentage_extra_dirty_types = (0.2,)
 
-    output = "generated"
-    assume_clean = False
-    problem_name = "generated"
-    # domain = "janitor"
-    domain = "irreversible-action"
-
-    problem_dir = "problems/irreversible"
-
-    for data in product(size_types, dirtiness_types, edge_length_types,
-                agents_types, starting_location_types, percentage_extra_dirty_types):
-
-        size, dirtiness, edge_length, agents, starting_location, percentage_extra_dirty = data
-
-        problem_name = generate_problem_name_irreversible(*data)
-
-        agent_start = get_centre(size) if starting_location == "centre" else starting_location
-        empty_rooms = (agent_start,)
-
-        for i in range(repeats):
-            output = join(problem_dir, problem_name + "-id({}).json".format(i))
+    domain = "janitor"
 
-            extra_dirty_rooms = generate_random_locations(size, percentage=percentage_extra_dirty, exclude=empty_rooms)
+    problem_dir = "problems/generated"
 
-            create_problem_irreversible(output, size, dirtiness, assume_clean,
-                empty_rooms, edge_length, agents,
-                agent_start, problem_name, domain, extra_dirty_rooms)
+    generate_corpus(problem_dir, size_types, dirtiness_types, edge_length_types, agents_types,
+        percentage_extra_dirty_types, repeats, domain=domain)
 
 if __name__ == "__main__":
     run()
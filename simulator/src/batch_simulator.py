@@ -0,0 +1,224 @@
+#! /usr/bin/env python3
+
+import argparse
+import decimal
+
+from collections import namedtuple
+from decimal import Decimal
+from logging import getLogger
+
+import numpy as np
+
+from action import Move, Clean, ExtraClean
+from logger import StyleAdapter
+from pddl_parser import decode_plan_from_optic
+import problem_parser
+
+log = StyleAdapter(getLogger(__name__))
+
+
+class BatchResult(namedtuple("BatchResult", "goal_achieved goal_time end_time cleaned stalled stall_time")):
+    pass
+
+
+class BatchSimulator:
+    """Executes a fixed plan against many variants of a problem at once.
+
+    Variants share the graph, agents and plan of the base model, and differ only in the dirtiness and extra dirty
+    status of each room. The state of every variant is held in arrays with one row per variant. Actions have the same
+    applicability rules as in `action', and an agent whose action is not applicable stalls for the rest of the plan.
+    """
+
+    def __init__(self, model, dirtiness, extra_dirty):
+        self.model = model
+        self.rooms = self.variable_rooms(model)
+        self.room_ids = {name: i for i, name in enumerate(self.rooms)}
+        self.agents = sorted(model["agents"])
+        self.agent_ids = {name: i for i, name in enumerate(self.agents)}
+        self.nodes = sorted(model["nodes"])
+        self.node_ids = {name: i for i, name in enumerate(self.nodes)}
+
+        self.dirtiness = np.asarray(dirtiness, dtype=float)
+        self.extra_dirty = np.asarray(extra_dirty, dtype=bool)
+        if self.dirtiness.shape != self.extra_dirty.shape or self.dirtiness.shape[1:] != (len(self.rooms),):
+            raise ValueError("expected arrays of shape (variants, {}), got {} and {}".format(
+                len(self.rooms), self.dirtiness.shape, self.extra_dirty.shape))
+
+        self.goal_rooms = np.array([self.room_ids[room] for pred, room in model["goal"]["hard-goals"]
+            if pred == "cleaned" and room in self.room_ids], dtype=int)
+
+    @property
+    def variants(self):
+        return len(self.dirtiness)
+
+    @staticmethod
+    def variable_rooms(model):
+        return sorted(name for name, node in model["nodes"].items() if "known" in node)
+
+    @classmethod
+    def from_models(cls, models):
+        base = models[0]
+        for model in models[1:]:
+            if model["graph"] != base["graph"] or model["agents"] != base["agents"]:
+                raise ValueError("problem {!r} does not share its graph and agents with {!r}".format(
+                    model.get("problem"), base.get("problem")))
+        rooms = cls.variable_rooms(base)
+        dirtiness = [[_room_value(model["nodes"][room], "dirtiness", 0) for room in rooms] for model in models]
+        extra_dirty = [[_room_value(model["nodes"][room], "extra-dirty", False) for room in rooms] for model in models]
+        return cls(base, dirtiness, extra_dirty)
+
+    @classmethod
+    def from_samples(cls, model, variants, seed=0, extra_dirty_rooms=None):
+        """Sample dirtiness uniformly from each room's range, and `extra_dirty_rooms' extra dirty rooms per variant
+        (by default, as many as there are in `model')."""
+        rng = np.random.default_rng(seed)
+        rooms = cls.variable_rooms(model)
+        unknown = [model["nodes"][room].get("unknown", {}) for room in rooms]
+        sampled = np.array(["dirtiness" in u for u in unknown])
+        low = np.array([float(u["dirtiness"]["min"]) if "dirtiness" in u else 0. for u in unknown])
+        high = np.array([float(u["dirtiness"]["max"]) if "dirtiness" in u else 0. for u in unknown])
+        fixed = np.array([float(_room_value(model["nodes"][room], "dirtiness", 0)) for room in rooms])
+        fixed_extra_dirty = np.array([bool(_room_value(model["nodes"][room], "extra-dirty", False)) for room in rooms])
+
+        dirtiness = np.where(sampled, np.floor(rng.uniform(low, high, (variants, len(rooms)))), fixed)
+
+        if extra_dirty_rooms is None:
+            extra_dirty_rooms = int(fixed_extra_dirty[sampled].sum())
+        # rank the sampled rooms of each variant randomly and make the first `extra_dirty_rooms' of them extra dirty
+        keys = np.where(sampled, rng.random((variants, len(rooms))), np.inf)
+        ranks = np.argsort(np.argsort(keys, axis=1), axis=1)
+        extra_dirty = np.where(sampled, ranks < extra_dirty_rooms, fixed_extra_dirty)
+
+        return cls(model, dirtiness, extra_dirty)
+
+    def run(self, plan):
+        variants = self.variants
+        has_dirtiness = self.dirtiness > 0
+        extra_dirty = self.extra_dirty & has_dirtiness
+        dirty = ~self.extra_dirty & has_dirtiness
+        cleaned = np.tile(np.array([bool(_room_value(self.model["nodes"][room], "cleaned", False))
+            for room in self.rooms]), (variants, 1)) | ~has_dirtiness
+
+        location = np.tile(np.array([self._node_id(self.model["agents"][agent]["at"][1]) for agent in self.agents],
+            dtype=int), (variants, 1))
+        stalled = np.zeros((variants, len(self.agents)), dtype=bool)
+        stall_time = np.full((variants, len(self.agents)), np.nan)
+        end_time = np.zeros(variants)
+        goal_time = np.where(self._goal_achieved(cleaned), 0., np.nan)
+
+        for time, finishing, action in self._events(plan):
+            agents = [self.agent_ids[a] for a in sorted(action.agents())]
+            active = ~stalled[:, agents].any(axis=1)
+            applicable = active & self._is_applicable(action, agents, location, dirty, extra_dirty)
+
+            newly_stalled = active & ~applicable
+            if newly_stalled.any():
+                for agent in agents:
+                    stall_time[newly_stalled & ~stalled[:, agent], agent] = float(time)
+                    stalled[newly_stalled, agent] = True
+
+            if finishing:
+                self._apply(action, agents, applicable, location, dirty, extra_dirty, cleaned)
+                end_time[applicable] = float(time)
+                if type(action) is not Move:
+                    newly_achieved = np.isnan(goal_time) & self._goal_achieved(cleaned)
+                    goal_time[newly_achieved] = float(time)
+
+        return BatchResult(goal_achieved=~np.isnan(goal_time), goal_time=goal_time, end_time=end_time,
+            cleaned=cleaned, stalled=stalled, stall_time=stall_time)
+
+    @staticmethod
+    def _events(plan):
+        events = []
+        for i, action in enumerate(plan):
+            if type(action) not in (Move, Clean, ExtraClean):
+                continue
+            # finishing actions are processed before starting actions -- as with ExecutionState ordering
+            events.append((action.start_time, 1, i, False, action))
+            events.append((action.end_time, 0, i, True, action))
+        events.sort(key=lambda e: e[:3])
+        return [(time, finishing, action) for time, _order, _i, finishing, action in events]
+
+    def _node_id(self, node):
+        if node not in self.node_ids:
+            self.node_ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.node_ids[node]
+
+    def _is_applicable(self, action, agents, location, dirty, extra_dirty):
+        if type(action) is Move:
+            return location[:, agents[0]] == self._node_id(action.start_node)
+        room_id = self.room_ids[action.room]
+        at_room = (location[:, agents] == self._node_id(action.room)).all(axis=1)
+        if type(action) is Clean:
+            return at_room & dirty[:, room_id] & ~extra_dirty[:, room_id]
+        else:
+            return at_room & extra_dirty[:, room_id] & ~dirty[:, room_id]
+
+    def _apply(self, action, agents, applicable, location, dirty, extra_dirty, cleaned):
+        if type(action) is Move:
+            location[applicable, agents[0]] = self._node_id(action.end_node)
+            return
+        room_id = self.room_ids[action.room]
+        dirty[applicable, room_id] = False
+        extra_dirty[applicable, room_id] = False
+        cleaned[applicable, room_id] = True
+
+    def _goal_achieved(self, cleaned):
+        return cleaned[:, self.goal_rooms].all(axis=1)
+
+
+def _room_value(node, key, default):
+    if key in node.get("known", ()):
+        return node["known"][key]
+    value = node.get("unknown", {}).get(key)
+    if value is None:
+        return default
+    actual = value["actual"]
+    return value[actual] if actual in value else actual
+
+
+def load_plan(filename, index=-1, start_time=Decimal(0)):
+    """Load a plan from an OPTIC output file or from a plan log (one plan per line)."""
+    with open(filename) as fh:
+        lines = fh.readlines()
+    if any(line.startswith("0.000: ") for line in lines):
+        plan = list(decode_plan_from_optic(lines, report_incomplete_plan=False))
+    else:
+        namespace = {"Decimal": Decimal, "Move": Move, "Clean": Clean, "ExtraClean": ExtraClean}
+        plan = eval(lines[index], namespace)
+    return [action.copy_with(start_time=action.start_time + start_time) for action in plan]
+
+
+def summary(result):
+    achieved = result.goal_achieved
+    lines = ["goal achieved: {}/{}".format(int(achieved.sum()), len(achieved))]
+    if achieved.any():
+        times = result.goal_time[achieved]
+        lines.append("goal time: mean={:.1f} min={:.1f} median={:.1f} max={:.1f}".format(
+            times.mean(), times.min(), np.median(times), times.max()))
+    lines.append("variants with stalled agents: {}".format(int(result.stalled.any(axis=1).sum())))
+    lines.append("mean stalled agents per variant: {:.2f}".format(result.stalled.sum(axis=1).mean()))
+    return "\n".join(lines)
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Evaluates a fixed plan against many variants of a problem")
+    p.add_argument("plan_file", help="OPTIC plan output or plan log")
+    p.add_argument("problem_files", nargs="+", help="problems sharing a graph, or one problem to sample variants of")
+    p.add_argument("--variants", "-n", type=int, help="number of variants to sample from a single problem")
+    p.add_argument("--seed", "-s", type=int, default=0)
+    p.add_argument("--extra-dirty-rooms", type=int, default=None)
+    p.add_argument("--plan-index", type=int, default=-1, help="which plan to use from a plan log (default: last)")
+    p.add_argument("--start-time", type=decimal.Decimal, default=Decimal(0))
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    problems = [problem_parser.decode(f) for f in args.problem_files]
+    if args.variants:
+        simulator = BatchSimulator.from_samples(problems[0], args.variants, args.seed, args.extra_dirty_rooms)
+    else:
+        simulator = BatchSimulator.from_models(problems)
+    print(summary(simulator.run(load_plan(args.plan_file, args.plan_index, args.start_time))))
@@ -0,0 +1,246 @@
+#! /usr/bin/env python3
+
+import argparse
+import decimal
+import heapq
+import logging
+import tracemalloc
+
+from collections import defaultdict
+from decimal import Decimal
+from time import perf_counter
+
+import simplejson
+
+from accuracy import as_start_time
+from action import Move, Clean, ExtraClean
+from executor import executor_types
+from logger import StyleAdapter
+from new_simulator import Simulator
+import problem_parser
+from transit import copy_model, transit_edges
+
+log = StyleAdapter(logging.getLogger(__name__))
+
+default_problems = (
+    "problems/no-stock-4x4/auto-size(4,4)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id(0).json",
+    "problems/no-stock-rect16/auto-size(1,16)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id(0)"
+    ".json",
+    "problems/no-stock-rect16/auto-size(2,8)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id(0)"
+    ".json",
+    "problems/no-stock-10x10/auto-size(10,10)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)"
+    "-id(0).json",
+)
+
+
+class GreedyPlanner:
+    """Deterministic in-process stand-in for the planner.
+
+    Repeatedly assigns the room that can be finished soonest to the nearest free agent (or pair of agents for extra
+    dirty rooms), moving agents along shortest paths. Plans start at time 0, as with OPTIC, and planning is taken to
+    last exactly `planning_time'.
+    """
+
+    def __init__(self, planning_time):
+        self.planning_time = planning_time
+        self.calls = 0
+
+    def get_plan(self, model, duration=None):
+        self.calls += 1
+        return GreedyPlan(model).create()
+
+    def get_plan_and_time_taken(self, model, duration=None, cancellation=None):
+        if cancellation:
+            cancellation.check()
+        return self.get_plan(model, duration), self.planning_time
+
+    def get_plans_and_times(self, model, duration=None):
+        return [self.get_plan_and_time_taken(model, duration)]
+
+
+class GreedyPlan:
+
+    def __init__(self, model):
+        self.model = model
+        self.adjacency = defaultdict(list)
+        for start_node, end_node, distance in model["graph"]["edges"]:
+            self.adjacency[start_node].append((end_node, distance))
+            if model["graph"]["bidirectional"]:
+                self.adjacency[end_node].append((start_node, distance))
+        for start_node, end_node, distance in transit_edges(model.get("in-transit", {})):
+            self.adjacency[start_node].append((end_node, distance))
+        self.paths = {}
+        self.agents = {name: [agent["at"][1], Decimal(0)] for name, agent in sorted(model["agents"].items())
+            if agent.get("available", True)}
+        self.plan = []
+
+    def create(self):
+        tasks = self.get_tasks()
+        while tasks:
+            finish_time, room, agents = min(self.assign(room, extra_dirty) for room, extra_dirty in tasks.items())
+            if not agents:
+                break
+            self.schedule(room, agents, tasks.pop(room))
+        return self.plan
+
+    def get_tasks(self):
+        tasks = {}
+        for pred, room in self.model["goal"]["hard-goals"]:
+            known = self.model["nodes"][room].get("known", {})
+            if pred != "cleaned" or known.get("cleaned", False):
+                continue
+            dirty, extra_dirty = known.get("dirty", False), known.get("extra-dirty", False)
+            if dirty != extra_dirty:
+                tasks[room] = extra_dirty
+        return tasks
+
+    def assign(self, room, extra_dirty):
+        arrivals = sorted((time + distance, agent) for agent, (node, time) in self.agents.items()
+            for distance in (self.distances(node)[0].get(room),) if distance is not None)
+        needed = 2 if extra_dirty else 1
+        if len(arrivals) < needed:
+            return Decimal("Infinity"), room, ()
+        arrivals = arrivals[:needed]
+        return arrivals[-1][0] + self.model["nodes"][room]["known"]["dirtiness"], room, \
+            tuple(agent for _, agent in arrivals)
+
+    def schedule(self, room, agents, extra_dirty):
+        start_time = max(self.move(agent, room) for agent in agents)
+        duration = self.model["nodes"][room]["known"]["dirtiness"]
+        if extra_dirty:
+            self.plan.append(ExtraClean(start_time, duration, agents[0], agents[1], room))
+        else:
+            self.plan.append(Clean(start_time, duration, agents[0], room))
+        for agent in agents:
+            self.agents[agent] = [room, as_start_time(start_time + duration)]
+
+    def move(self, agent, room):
+        node, time = self.agents[agent]
+        _, previous = self.distances(node)
+        path = [room]
+        while path[-1] != node:
+            path.append(previous[path[-1]])
+        path.reverse()
+        for start_node, end_node in zip(path, path[1:]):
+            distance = min(d for n, d in self.adjacency[start_node] if n == end_node)
+            self.plan.append(Move(time, distance, agent, start_node, end_node))
+            time = as_start_time(time + distance)
+        return time
+
+    def distances(self, source):
+        if source not in self.paths:
+            distances = {source: 0}
+            previous = {}
+            queue = [(0, source)]
+            while queue:
+                distance, node = heapq.heappop(queue)
+                if distance > distances[node]:
+                    continue
+                for neighbour, length in self.adjacency[node]:
+                    if distance + length < distances.get(neighbour, Decimal("Infinity")):
+                        distances[neighbour] = distance + length
+                        previous[neighbour] = node
+                        heapq.heappush(queue, (distance + length, neighbour))
+            self.paths[source] = distances, previous
+        return self.paths[source]
+
+
+class CountingSimulator(Simulator):
+    """Simulator that counts the action states it processes, including those of state prediction simulators."""
+
+    events = 0
+
+    def process_action_states(self, action_states):
+        CountingSimulator.events += len(action_states)
+        super().process_action_states(action_states)
+
+
+def run_once(model, executor_name, planning_time):
+    planner = GreedyPlanner(planning_time)
+    simulator = CountingSimulator(copy_model(model), executor_types[executor_name](planning_time),
+        planner)
+    CountingSimulator.events = 0
+    start = perf_counter()
+    goal_achieved = simulator.run()
+    wall_time = perf_counter() - start
+    return {
+        "goal_achieved": bool(goal_achieved),
+        "wall_time": wall_time,
+        "events": CountingSimulator.events,
+        "events_per_second": CountingSimulator.events / wall_time if wall_time else float("inf"),
+        "planner_called": planner.calls,
+        "end_simulation_time": simulator.time,
+    }
+
+
+def peak_memory(model, executor_name, planning_time):
+    tracemalloc.start()
+    try:
+        run_once(model, executor_name, planning_time)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(problem_file, executor_name, planning_time, repeats, measure_memory=True):
+    model = problem_parser.decode(problem_file)
+    result = {"problem": problem_file, "executor": executor_name}
+    try:
+        runs = [run_once(model, executor_name, planning_time) for _ in range(repeats)]
+    except Exception as e:
+        log.warning("{} on {} failed with: {!r}", executor_name, problem_file, e)
+        result["error"] = repr(e)
+        return result
+    failed = next((r for r in runs if not r["goal_achieved"]), None)
+    if failed:
+        # timings of a run cut short are not comparable with those of complete runs
+        log.warning("{} on {} did not achieve the goal", executor_name, problem_file)
+        result.update(goal_achieved=False, error="goal not achieved (simulation ended at {} after {} plans)".format(
+            failed["end_simulation_time"], failed["planner_called"]))
+        return result
+    fastest = min(runs, key=lambda r: r["wall_time"])
+    result.update(fastest)
+    result["mean_wall_time"] = sum(r["wall_time"] for r in runs) / len(runs)
+    if measure_memory:
+        result["peak_memory"] = peak_memory(model, executor_name, planning_time)
+    return result
+
+
+def format_results(results):
+    lines = ["{:<40} {:<52} {:>6} {:>10} {:>10} {:>12} {:>10} {:>8}".format("executor", "problem", "goal", "wall (s)",
+        "events", "events/s", "peak (KiB)", "plans")]
+    for r in results:
+        name = r["problem"].rsplit("/", 1)[-1][:52]
+        if "error" in r:
+            lines.append("{:<40} {:<52} error: {}".format(r["executor"], name, r["error"]))
+            continue
+        lines.append("{:<40} {:<52} {!s:>6} {:>10.4f} {:>10} {:>12.0f} {:>10} {:>8}".format(r["executor"], name,
+            r["goal_achieved"], r["wall_time"], r["events"], r["events_per_second"],
+            r["peak_memory"] // 1024 if "peak_memory" in r else "-", r["planner_called"]))
+    return "\n".join(lines)
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Benchmarks the simulator and executors using an in-process planner")
+    p.add_argument("problem_files", nargs="*", default=default_problems)
+    p.add_argument("--executor", "-e", choices=sorted(executor_types), nargs="+", default=sorted(executor_types))
+    p.add_argument("--planning-time", "-t", type=decimal.Decimal, default=Decimal(10))
+    p.add_argument("--repeats", "-n", type=int, default=3, help="number of timed runs of each problem (fastest kept)")
+    p.add_argument("--no-memory", dest="measure_memory", action="store_false",
+        help="skip the extra run measuring peak memory with tracemalloc")
+    p.add_argument("--output", "-o", help="json file to write results to, for comparison between versions")
+    p.add_argument("--log-level", default="ERROR")
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s [%(levelname)s] %(message)s",
+        datefmt="%X")
+    StyleAdapter.compile_out(args.log_level)
+    benchmark_results = [benchmark(problem, executor, args.planning_time, args.repeats, args.measure_memory)
+        for problem in args.problem_files for executor in args.executor]
+    print(format_results(benchmark_results))
+    if args.output:
+        with open(args.output, "w") as f:
+            simplejson.dump(benchmark_results, f, use_decimal=True, indent=2)
@@ -0,0 +1,98 @@
+import gzip
+import pickle
+
+from os import replace
+from logging import getLogger
+from action import Plan
+from action_state import ExecutionState
+from priority_queue import MultiActionQueue, MultiActionStateQueue
+from logger import StyleAdapter
+
+log = StyleAdapter(getLogger(__name__))
+
+CHECKPOINT_VERSION = 2
+
+
+class Checkpointer:
+    """Saves the state of a simulator at chosen times and/or whenever a new plan is received.
+
+    `filename' may contain a `{time}' field so that successive checkpoints do not overwrite each other.
+    """
+
+    def __init__(self, filename, times=(), on_replan=False):
+        self.filename = filename
+        self.times = sorted(times)
+        self.on_replan = on_replan
+
+    def notify(self, simulator, action_states):
+        due = False
+        while self.times and self.times[0] <= simulator.time:
+            self.times.pop(0)
+            due = True
+        if self.on_replan and any(type(a.action) is Plan and a.state == ExecutionState.executing
+                for a in action_states):
+            due = True
+        if due:
+            save_checkpoint(self.filename.format(time=simulator.time), simulator)
+
+
+class DummyCheckpointer:
+
+    def notify(self, simulator, action_states):
+        pass
+
+
+def save_checkpoint(filename, simulator):
+    log.info("saving checkpoint of Simulator({}) at time {} to {}", simulator.id, simulator.time, filename)
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "model": simulator.model,
+        "executor": _executor_state(simulator.executor),
+        "action_queue": list(simulator.action_queue.values()),
+        "executed": simulator.executed,
+        "stalled": simulator.stalled,
+        "time": simulator.time,
+        "start_time": simulator.start_time,
+    }
+    temp_filename = filename + ".partial"
+    with gzip.open(temp_filename, "wb") as fh:
+        pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    # only replace the previous checkpoint once the new one is complete
+    replace(temp_filename, filename)
+
+
+def load_checkpoint(filename, planner, plan_logger=None, checkpointer=None, heuristic_planner=None):
+    from new_simulator import Simulator
+
+    with gzip.open(filename, "rb") as fh:
+        state = pickle.load(fh)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError("unsupported checkpoint version {!r} in {}".format(state.get("version"), filename))
+
+    simulator = Simulator(state["model"], _restore_executor(state["executor"]), planner, plan_logger,
+        action_queue=MultiActionStateQueue(state["action_queue"]), time=state["time"], checkpointer=checkpointer,
+        heuristic_planner=heuristic_planner)
+    simulator.executed = state["executed"]
+    simulator.stalled = state["stalled"]
+    simulator.start_time = state["start_time"]
+    log.info("restored Simulator({}) at time {} from {}", simulator.id, simulator.time, filename)
+    return simulator
+
+
+def _executor_state(executor):
+    state = executor.get_state()
+    state.update({
+        "type": type(executor),
+        "planning_duration": executor.planning_duration,
+        "plan": list(executor.plan.values()),
+        "stalled": executor.stalled,
+    })
+    return state
+
+
+def _restore_executor(state):
+    state = dict(state)
+    executor_type = state.pop("type")
+    planning_duration = state.pop("planning_duration")
+    state["plan"] = MultiActionQueue(state["plan"])
+    return executor_type(planning_duration, **state)
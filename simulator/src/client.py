@@ -0,0 +1,72 @@
+#! /usr/bin/env python3
+"""Runs the simulator in a warm daemon (see `daemon.py'), rather than starting a fresh interpreter for every run.
+
+Takes the same arguments as `main.py'. The arguments and working directory of the client are sent to the daemon
+over a Unix socket, along with the client's standard input, output and error, so the run's output goes straight to
+wherever the client's would have. The daemon replies with the exit status of the run when it is finished.
+
+Only the standard library is imported here, so that starting the client is cheap.
+"""
+
+import array
+import json
+import os
+import socket
+import sys
+
+from tempfile import gettempdir
+
+SOCKET_ENVIRONMENT_VARIABLE = "JANITOR_SIMULATOR_SOCKET"
+STANDARD_STREAMS = (0, 1, 2)
+
+
+def get_socket_path():
+    return os.environ.get(SOCKET_ENVIRONMENT_VARIABLE) or os.path.join(gettempdir(), "janitor-simulator.sock")
+
+
+def send_message(connection, message, fds=()):
+    """Send a message as a line of JSON, passing the given file descriptors with it."""
+    data = (json.dumps(message) + "\n").encode("utf-8")
+    if fds:
+        ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+        sent = connection.sendmsg([data], ancillary)
+        data = data[sent:]
+    connection.sendall(data)
+
+
+def receive_message(connection, max_fds=len(STANDARD_STREAMS)):
+    """Receive a message sent by `send_message', and any file descriptors passed with it.
+
+    Returns None for the message if the connection was closed before a message was received.
+    """
+    fds = array.array("i")
+    data, ancillary, _flags, _address = connection.recvmsg(4096, socket.CMSG_SPACE(max_fds * fds.itemsize))
+    for level, type_, fd_data in ancillary:
+        if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+            fds.frombytes(fd_data[:len(fd_data) - len(fd_data) % fds.itemsize])
+    while data and not data.endswith(b"\n"):
+        chunk = connection.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    message = json.loads(data.decode("utf-8")) if data.endswith(b"\n") else None
+    return message, list(fds)
+
+
+def run(argv, socket_path=None):
+    """Have the daemon run the simulator with argv, returning the exit status of the run."""
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path if socket_path else get_socket_path())
+        send_message(connection, {"argv": list(argv), "cwd": os.getcwd()}, STANDARD_STREAMS)
+        reply, _fds = receive_message(connection)
+    finally:
+        connection.close()
+    if reply is None:
+        print("simulator daemon closed the connection without an exit status", file=sys.stderr)
+        return 1
+    return reply["exit"]
+
+
+if __name__ == "__main__":
+    sys.exit(run(sys.argv[1:]))
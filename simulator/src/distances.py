@@ -0,0 +1,224 @@
+#! /usr/bin/env python3
+"""All-pairs shortest path distances between the nodes of a problem.
+
+The distances (and the next node on each shortest path) are computed once per graph by Floyd-Warshall over the ids of
+the problem's nodes, in name order. The positions of agents in transit (see `transit') are not part of the matrix:
+agents can only move out of them, so the distances from such a position are the lesser of its distance to either
+end of its edge plus the distances from that end. These rows are added per model by `with_in_transit'.
+
+Matrices are kept in memory by graph, and can be cached next to the problem file (`<problem>.dist'). Lengths are
+stored as float64, which is exact for the whole and half unit lengths edges have.
+
+A cache file is laid out as:
+
+    magic (4 bytes) | version (uint16) | reserved (uint16) | header length (uint32) | JSON header | arrays
+
+The header describes each array (dtype, byte offset from the start of the arrays, and length). Arrays are aligned to
+8 bytes so they can be used directly from a memory mapping of the file.
+"""
+
+import argparse
+import mmap
+import struct
+
+from logging import getLogger
+from os import stat
+
+import numpy as np
+import simplejson
+
+from logger import StyleAdapter
+from transit import transit_edges
+
+log = StyleAdapter(getLogger(__name__))
+
+DISTANCE_MAGIC = b"JPDM"
+VERSION = 1
+EXTENSION = ".dist"
+
+_preamble = struct.Struct("<4sHHI")
+_alignment = 8
+
+_matrices = {}
+
+
+class DistanceMatrix:
+
+    def __init__(self, names, distances, next_hops, transit_rows=None):
+        self.names = names
+        self.name_ids = {name: i for i, name in enumerate(names)}
+        self.distances = distances
+        self.next_hops = next_hops
+        self.transit_rows = transit_rows if transit_rows else {}
+
+    def with_in_transit(self, model):
+        """A matrix sharing these distances, with rows for the in-transit positions of model."""
+        exits = {}
+        for start_node, end_node, length in transit_edges(model.get("in-transit", {})):
+            exits.setdefault(start_node, []).append((self.name_ids[end_node], float(length)))
+        transit_rows = {}
+        for name, edges in exits.items():
+            candidates = np.array([length + self.distances[node] for node, length in edges])
+            first = candidates.argmin(axis=0)
+            exit_nodes = np.array([node for node, _ in edges])
+            transit_rows[name] = candidates[first, np.arange(len(self.names))], exit_nodes[first]
+        return type(self)(self.names, self.distances, self.next_hops, transit_rows)
+
+    def row(self, source):
+        if source in self.transit_rows:
+            return self.transit_rows[source][0]
+        return self.distances[self.name_ids[source]]
+
+    def distance(self, source, target):
+        return self.row(source)[self.name_ids[target]]
+
+    def path(self, source, target):
+        """The nodes on the shortest path from source to target (inclusive), or None if there is no path."""
+        target_id = self.name_ids[target]
+        if source in self.transit_rows:
+            distances, first_hops = self.transit_rows[source]
+            if np.isinf(distances[target_id]):
+                return None
+            nodes = [source]
+            node = first_hops[target_id]
+        else:
+            nodes = []
+            node = self.name_ids[source]
+            if np.isinf(self.distances[node, target_id]):
+                return None
+        while node != target_id:
+            nodes.append(self.names[node])
+            node = self.next_hops[node, target_id]
+        nodes.append(target)
+        return nodes
+
+
+def base_graph(model):
+    """The names of the nodes of model, and its edges in both directions."""
+    names = tuple(sorted(model["nodes"]))
+    edges = [(start, end, length) for start, end, length in model["graph"]["edges"]]
+    if model["graph"]["bidirectional"]:
+        edges += [(end, start, length) for start, end, length in edges]
+    return names, tuple(edges)
+
+
+def compute(names, edges):
+    name_ids = {name: i for i, name in enumerate(names)}
+    size = len(names)
+    distances = np.full((size, size), np.inf)
+    next_hops = np.full((size, size), -1, dtype="<i4")
+    np.fill_diagonal(distances, 0)
+    np.fill_diagonal(next_hops, np.arange(size))
+    for start, end, length in edges:
+        i, j = name_ids[start], name_ids[end]
+        if float(length) < distances[i, j]:
+            distances[i, j] = float(length)
+            next_hops[i, j] = j
+    for k in range(size):
+        through = distances[:, k, None] + distances[None, k, :]
+        shorter = through < distances
+        distances = np.where(shorter, through, distances)
+        next_hops = np.where(shorter, next_hops[:, k, None], next_hops)
+    return DistanceMatrix(list(names), distances, next_hops)
+
+
+def for_model(model):
+    """The distance matrix for model's graph (computed when the graph is first seen), with rows for the positions
+    of its in-transit agents."""
+    key = base_graph(model)
+    matrix = _matrices.get(key)
+    if matrix is None:
+        matrix = _matrices[key] = compute(*key)
+    return matrix.with_in_transit(model)
+
+
+def distance_file_name(problem_file):
+    return problem_file + EXTENSION
+
+
+def write_container(filename, magic, header, arrays):
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.descr if array.dtype.names else array.dtype.str, "offset": offset,
+            "count": len(array)}
+        offset += _aligned(array.nbytes)
+    header = dict(header, arrays=layout)
+    header_bytes = simplejson.dumps(header, use_decimal=True).encode("utf-8")
+    header_bytes += b" " * (_aligned(_preamble.size + len(header_bytes)) - _preamble.size - len(header_bytes))
+
+    with open(filename, "wb") as fh:
+        fh.write(_preamble.pack(magic, VERSION, 0, len(header_bytes)))
+        fh.write(header_bytes)
+        for array in arrays.values():
+            data = array.tobytes()
+            fh.write(data)
+            fh.write(b"\0" * (_aligned(len(data)) - len(data)))
+
+
+def read_container(filename, magic):
+    """Memory map a container, returning its header and its arrays as read-only views of the mapping."""
+    with open(filename, "rb") as fh:
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    file_magic, version, _reserved, header_length = _preamble.unpack_from(buffer)
+    if file_magic != magic or version != VERSION:
+        raise ValueError("{} is not a version {} {} file".format(filename, VERSION, magic.decode()))
+    header = simplejson.loads(buffer[_preamble.size:_preamble.size + header_length].decode("utf-8"),
+        use_decimal=True)
+    start = _preamble.size + header_length
+    arrays = {}
+    for name, layout in header.pop("arrays").items():
+        dtype = np.dtype([tuple(field) for field in layout["dtype"]] if isinstance(layout["dtype"], list)
+            else layout["dtype"])
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=layout["count"], offset=start + layout["offset"])
+    return header, arrays
+
+
+def _aligned(size):
+    return -(-size // _alignment) * _alignment
+
+
+def file_signature(filename):
+    stats = stat(filename)
+    return [stats.st_size, stats.st_mtime_ns]
+
+
+def load(problem_file, model):
+    """The distance matrix for a problem, read from its cache file if up to date, else computed and cached."""
+    key = base_graph(model)
+    if key in _matrices:
+        return _matrices[key]
+    cache_file = distance_file_name(problem_file)
+    signature = file_signature(problem_file)
+    matrix = None
+    try:
+        header, arrays = read_container(cache_file, DISTANCE_MAGIC)
+        if header["source"] == signature and tuple(header["names"]) == key[0]:
+            size = len(header["names"])
+            matrix = DistanceMatrix(header["names"], arrays["distances"].reshape(size, size),
+                arrays["next_hops"].reshape(size, size))
+    except (OSError, ValueError) as e:
+        log.debug("not using cached distances {}: {!r}", cache_file, e)
+    if matrix is None:
+        matrix = compute(*key)
+        try:
+            write_container(cache_file, DISTANCE_MAGIC, {"names": matrix.names, "source": signature},
+                {"distances": matrix.distances.ravel(), "next_hops": matrix.next_hops.ravel()})
+        except OSError as e:
+            log.warning("could not cache distances in {}: {!r}", cache_file, e)
+    _matrices[key] = matrix
+    return matrix
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Computes and caches the shortest path distances of problems")
+    p.add_argument("problem_files", nargs="+")
+    return p
+
+
+if __name__ == "__main__":
+    import problem_parser
+    args = parser().parse_args()
+    for problem_file in args.problem_files:
+        load(problem_file, problem_parser.decode(problem_file))
+        print(distance_file_name(problem_file))
@@ -0,0 +1,87 @@
+from collections import deque
+from decimal import Decimal
+from logging import getLogger
+
+import action
+from logger import StyleAdapter
+
+log = StyleAdapter(getLogger(__name__))
+
+record_types = {cls.__name__: cls for cls in (action.Plan, action.Stalled, action.Move, action.Observe, action.Clean,
+    action.ExtraClean, action.GetExecutionHeuristic, action.PlanUpdate)}
+
+
+def format_record(action_):
+    """Format an action as a single line that `parse_record' can recreate it from."""
+    return "{}({})".format(type(action_).__name__,
+        ", ".join(repr(getattr(action_, attr)) for attr in action_._format_attrs if hasattr(action_, attr)))
+
+
+def parse_record(line):
+    return eval(line, {"Decimal": Decimal}, record_types)
+
+
+def read_trace(filename):
+    """Read back the actions of a trace file."""
+    with open(filename) as fh:
+        for line in fh:
+            yield parse_record(line)
+
+
+class ExecutionTrace:
+    """Stand-in for the list of executed actions that streams each action to a file as it is appended.
+
+    Only the last `window' actions are kept in memory (in `recent'). Iterating over the trace reads the actions back
+    from the file, one record per line.
+    """
+
+    def __init__(self, filename, window=0):
+        self.filename = filename
+        self.window = window
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self._file = open(filename, "w")
+
+    def append(self, action_):
+        self._file.write(format_record(action_))
+        self._file.write("\n")
+        self.recent.append(action_)
+        self.count += 1
+
+    def extend(self, actions):
+        for action_ in actions:
+            self.append(action_)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        self._file.flush()
+        yield from read_trace(self.filename)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, tb):
+        self.close()
+
+    def __getstate__(self):
+        # the file is left as is, and the trace resumes from the current end of it when unpickled
+        self._file.flush()
+        return {"filename": self.filename, "window": self.window, "recent": list(self.recent), "count": self.count,
+            "offset": self._file.tell()}
+
+    def __setstate__(self, state):
+        self.filename = state["filename"]
+        self.window = state["window"]
+        self.recent = deque(state["recent"], maxlen=self.window)
+        self.count = state["count"]
+        self._file = open(self.filename, "r+")
+        # discard anything written after the checkpoint was taken
+        self._file.truncate(state["offset"])
+        self._file.seek(state["offset"])
+        log.debug("resuming trace {} at record {}", self.filename, self.count)
@@ -4,10 +4,11 @@ from enum import Enum
 from operator import attrgetter
 from decimal import Decimal
 from accuracy import quantize, as_end_time, as_start_time
-from action import Plan, Observe, Move, GetExecutionHeuristic
+from action import Plan, PlanUpdate, Observe, Move, GetExecutionHeuristic
 from action_state import ExecutionState
 from copy import copy
 from logger import StyleAdapter
+from profiler import profile
 from new_simulator import ExecutionProblem
 from priority_queue import MultiActionQueue
 from requests import AdjustToPartialRequest, RemoveActionsWithStateRequest, ActionRequest, MultiRequest
@@ -30,6 +31,9 @@ class Executor:
 
     ID_COUNTER = 0
 
+    # whether the simulator should pass on the better plans the planner finds after the first (as PlanUpdate)
+    accepts_plan_updates = False
+
     def __init__(self, planning_duration, *, plan=None, executing=None, stalled=None,
             current_plan_execution_limit=Decimal("Infinity"), last_observation=quantize(-1), plan_valid=False):
         self.started = False
@@ -44,10 +48,15 @@ class Executor:
 
     def copy(self):
         log.debug("Executor.copy()")
-        return type(self)(self.planning_duration, plan=copy(self.plan), executing=dict(self.executing),
+        return type(self)(self.planning_duration, **self.get_state())
+
+    def get_state(self):
+        """The keyword arguments that recreate this executor (along with its planning duration)."""
+        return dict(plan=copy(self.plan), executing=dict(self.executing),
             current_plan_execution_limit=self.current_plan_execution_limit, last_observation=self.last_observation,
             plan_valid=self.plan_valid)
 
+    @profile.timed("executor decisions")
     def next_actions(self, current_time, future_time):
         log.debug("Executor.next_action() current_time={}, future_time={}", current_time, future_time)
         if not self.plan_valid and Plan.agent not in self.executing:
@@ -60,6 +69,19 @@ class Executor:
 
         return ActionRequest(actions)
 
+    def next_wake_up_time(self):
+        """The earliest time at which `next_actions' could return a request.
+
+        Calling `next_actions' with a `future_time' before this time will always return None and has no side effects,
+        so the simulator need not consult the executor until then. The time is derived from the current plan and
+        planning state, and so reflects any change made whilst processing results.
+        """
+        if not self.plan_valid and Plan.agent not in self.executing:
+            return Decimal("-Infinity")
+        elif self.plan.empty():
+            return Decimal("Infinity")
+        return self.plan.peek().start_time
+
     def add_agent_actions_to_executing(self, actions, future_time):
         for action in actions:
             if type(action) is not Observe:
@@ -91,6 +113,7 @@ class Executor:
         unstalled_actions = [action for action in all_actions if self.is_action_available(action, time)]
         return unstalled_actions
 
+    @profile.timed("executor decisions")
     def process_results(self, results):
         log.debug("Executor.process_results() results={}", results)
         requests = []
@@ -100,8 +123,9 @@ class Executor:
                 requests.append(request)
         return MultiRequest(requests) if requests else None
 
+    @profile.timed("executor decisions")
     def process_result(self, result):
-        if type(result.action) not in (Observe, list):
+        if type(result.action) not in (Observe, PlanUpdate, list):
             for agent in result.action.agents():
                 if self.match_action(self.executing[agent], result.action):
                     del self.executing[agent]
@@ -114,6 +138,8 @@ class Executor:
             self.current_plan_execution_limit = Decimal("Infinity")
             self.stalled.clear()
             return self.get_request_for_plan_complete(expected_plan_end)
+        elif type(result.action) is PlanUpdate:
+            return None
         elif type(result.action) is GetExecutionHeuristic:
             applicable_actions = self.plan.get_ends_before(as_start_time(self.current_plan_execution_limit))
             self.plan = MultiActionQueue(applicable_actions + self.adjust_plan(result.result, result.time))
@@ -205,7 +231,7 @@ class Executor:
     def get_plan_start_time_adjustment(self, actual_planning_duration):
         # should be "actual_planning_duration" mostly, except if planner is using state prediction
         # in which case it should be self.planning_duration
-        raise NotImplementedError()
+        return actual_planning_duration
 
     def get_additional_plan_requests(self, time):
         return None
@@ -231,6 +257,9 @@ class PartialExecutionOnObservationAndStatePredictionExecutor(Executor):
     def get_state_prediction_end_time(self, plan):
         return plan.end_time
 
+    def get_plan_start_time_adjustment(self, actual_planning_duration):
+        return self.planning_duration
+
 
 class PartialExecutionOnObservationExecutor(Executor):
 
@@ -269,6 +298,9 @@ class FinishActionsAndUseStatePredictionExecutor(Executor):
     def get_state_prediction_end_time(self, plan):
         return plan.end_time
 
+    def get_plan_start_time_adjustment(self, actual_planning_duration):
+        return self.planning_duration
+
 
 class FinishActionsExecutor(Executor):
 
@@ -313,3 +345,70 @@ class GreedyPlanHeuristicExecutor(Executor):
 
     def get_plan_start_time_adjustment(self, actual_planning_duration):
         return self.planning_duration
+
+
+class HotSwapPlanExecutor(PartialExecutionOnObservationExecutor):
+    """Executes the first plan the planner finds, and swaps in each better plan it finds afterwards.
+
+    A better plan is spliced in at the time it is found (the cut), provided the actions of the current plan that
+    have already started are exactly those the better plan starts before the cut. The actions of the better plan
+    after the cut then replace those of the current plan. Otherwise the better plan is inconsistent with what has
+    been executed, and is discarded.
+    """
+
+    accepts_plan_updates = True
+
+    def __init__(self, planning_duration, *, plan_start=None, plan_execution_start=None, current_plan=(), **kwargs):
+        super(HotSwapPlanExecutor, self).__init__(planning_duration, **kwargs)
+        self.plan_start = plan_start
+        self.plan_execution_start = plan_execution_start
+        self.current_plan = list(current_plan)
+
+    def get_state(self):
+        state = super(HotSwapPlanExecutor, self).get_state()
+        state.update(plan_start=self.plan_start, plan_execution_start=self.plan_execution_start,
+            current_plan=self.current_plan)
+        return state
+
+    @profile.timed("executor decisions")
+    def process_result(self, result):
+        if type(result.action) is PlanUpdate:
+            return self.process_plan_update(result)
+        if type(result.action) is Plan:
+            self.plan_start = result.action.start_time
+            self.plan_execution_start = result.action.start_time + result.action.duration
+            self.current_plan = self.adjust_plan(result.result, self.plan_execution_start)
+        return super(HotSwapPlanExecutor, self).process_result(result)
+
+    def process_plan_update(self, result):
+        if result.action.start_time != self.plan_start or not self.plan_valid or Plan.agent in self.executing:
+            log.debug("discarding plan update from an old plan: {}", result.action)
+            return None
+        cut = as_start_time(result.time)
+        started = [action for action in self.current_plan if action.start_time < cut]
+        if started:
+            # keep the timing of the current plan, so the actions already started can be compared
+            new_plan = self.adjust_plan(result.result, self.plan_execution_start)
+            if sorted(map(repr, started)) != sorted(repr(action) for action in new_plan if action.start_time < cut):
+                log.debug("discarding plan update inconsistent with executed actions: {}", result.action)
+                return None
+        else:
+            new_plan = self.adjust_plan(result.result, cut)
+            self.plan_execution_start = cut
+        remaining = [action for action in new_plan if action.start_time >= cut]
+        log.debug("swapping in plan update at {}, {} actions remaining", cut, len(remaining))
+        self.plan = MultiActionQueue(remaining)
+        self.current_plan = new_plan
+        return None
+
+
+executor_types = {
+    executor_type.__name__: executor_type for executor_type in (
+        PartialExecutionOnObservationAndStatePredictionExecutor,
+        PartialExecutionOnObservationExecutor,
+        FinishActionsAndUseStatePredictionExecutor,
+        FinishActionsExecutor,
+        GreedyPlanHeuristicExecutor,
+        HotSwapPlanExecutor,
+    )
+}
@@ -0,0 +1,245 @@
+"""In-process planner for the janitor domain, for use as the execution heuristic.
+
+Rooms are assigned to agents by a sequential auction: every agent (or pair of agents, for extra dirty rooms) bids
+the time at which it could finish cleaning each unassigned room, and the lowest bid is awarded. Rooms whose bids
+are close are ordered by regret, so rooms that only one agent can reach cheaply go first. The routes are then
+improved by relocating rooms away from the agent that finishes last, while that brings the end of the plan forward.
+
+Rooms are planned with the values assumed for them (as in the PDDL encoding of the problem), and plans start at
+time 0 as OPTIC's do.
+"""
+
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from logging import getLogger
+from time import perf_counter
+
+from accuracy import as_start_time, quantize
+from action import Move, Clean, ExtraClean
+from distances import for_model, base_graph
+from logger import StyleAdapter
+from pddl_parser import unknown_value_getter
+from profiler import profile
+from transit import transit_edges
+
+log = StyleAdapter(getLogger(__name__))
+
+INFINITY = Decimal("Infinity")
+
+
+class Task(namedtuple("Task", "room duration extra_dirty")):
+    pass
+
+
+class HeuristicPlanner:
+
+    def __init__(self, max_improvements=200):
+        self.max_improvements = max_improvements
+
+    @profile.timed("heuristic planner")
+    def get_plan(self, model, duration=None):
+        return HeuristicPlan(model, self.max_improvements).create()
+
+    def get_plan_and_time_taken(self, model, duration=None, cancellation=None):
+        if cancellation:
+            cancellation.check()
+        start = perf_counter()
+        plan = self.get_plan(model, duration)
+        return plan, quantize(perf_counter() - start)
+
+    def get_plans_and_times(self, model, duration=None):
+        return [self.get_plan_and_time_taken(model, duration)]
+
+
+def get_tasks(model):
+    """The rooms that still need cleaning to achieve the goal, using assumed values for unknown properties."""
+    assumed_values = model["assumed-values"]
+    tasks = []
+    for pred, room in model["goal"]["hard-goals"]:
+        node = model["nodes"][room]
+        values = {key: unknown_value_getter(value, key, assumed_values)
+            for key, value in node.get("unknown", {}).items()}
+        values.update(node.get("known", {}))
+        if pred != "cleaned" or values.get("cleaned", False):
+            continue
+        extra_dirty = values.get("extra-dirty", False)
+        if extra_dirty or values.get("dirty", False):
+            tasks.append(Task(room, values["dirtiness"], extra_dirty))
+    return tasks
+
+
+class HeuristicPlan:
+
+    def __init__(self, model, max_improvements):
+        self.max_improvements = max_improvements
+        self.distances = for_model(model)
+        self._distances = {}
+        _names, edges = base_graph(model)
+        self.edge_lengths = {}
+        for start, end, length in edges + tuple(transit_edges(model.get("in-transit", {}))):
+            self.edge_lengths[start, end] = min(length, self.edge_lengths.get((start, end), length))
+        self.start_nodes = {name: agent["at"][1] for name, agent in sorted(model["agents"].items())
+            if agent.get("available", True)}
+        self.agents = list(self.start_nodes)
+        self.tasks = get_tasks(model)
+
+    def create(self):
+        if not self.tasks or not self.agents:
+            return []
+        routes = self.auction()
+        routes = self.improve(routes)
+        return self.to_actions(routes)
+
+    def distance(self, source, target):
+        try:
+            return self._distances[source, target]
+        except KeyError:
+            distance = self._distances[source, target] = Decimal(self.distances.distance(source, target))
+            return distance
+
+    def path(self, source, target):
+        """The edges of the shortest path from source to target, as (start node, end node, length)."""
+        nodes = self.distances.path(source, target)
+        return [(start, end, self.edge_lengths[start, end]) for start, end in zip(nodes, nodes[1:])]
+
+    def auction(self):
+        """Assign every reachable task, appending each to the routes of the agent(s) that bid lowest for it."""
+        routes = {agent: [] for agent in self.agents}
+        position = dict(self.start_nodes)
+        free_time = {agent: Decimal(0) for agent in self.agents}
+        unassigned = set(range(len(self.tasks)))
+        while unassigned:
+            best = None
+            for task_id in unassigned:
+                bids = self.bids(self.tasks[task_id], position, free_time)
+                if not bids:
+                    continue
+                # regret: how much worse the task gets if its best bid is lost to another task
+                regret = bids[1][0] - bids[0][0] if len(bids) > 1 else INFINITY
+                key = (bids[0][0], -regret, task_id)
+                if best is None or key < best[0]:
+                    best = key, task_id, bids[0]
+            if best is None:
+                log.debug("{} rooms cannot be reached by any agent", len(unassigned))
+                break
+            _key, task_id, (finish_time, agents) = best
+            unassigned.remove(task_id)
+            for agent in agents:
+                routes[agent].append(task_id)
+                position[agent] = self.tasks[task_id].room
+                free_time[agent] = finish_time
+        return routes
+
+    def bids(self, task, position, free_time):
+        """Bids (finish time, agents) for a task, lowest first."""
+        arrivals = sorted((free_time[agent] + distance, agent) for agent in self.agents
+            for distance in (self.distance(position[agent], task.room),) if distance != INFINITY)
+        if task.extra_dirty:
+            # the pair arriving soonest is the two agents arriving soonest, other pairs are worse bids
+            return [(max(a[0], b[0]) + task.duration, (a[1], b[1])) for a, b in zip(arrivals, arrivals[1:])]
+        return [(arrival + task.duration, (agent,)) for arrival, agent in arrivals]
+
+    def schedule(self, routes):
+        """Start times of each task in the routes, or None if the routes deadlock (agents wait on each other to
+        start extra cleans in different orders)."""
+        assigned = defaultdict(list)
+        for agent in self.agents:
+            for task_id in routes[agent]:
+                assigned[task_id].append(agent)
+        next_task = {agent: 0 for agent in self.agents}
+        position = dict(self.start_nodes)
+        free_time = {agent: Decimal(0) for agent in self.agents}
+        start_times = {}
+        # an agent waiting for its partner is picked up again when the partner reaches the same task
+        ready = list(self.agents)
+        while ready:
+            agent = ready.pop()
+            if next_task[agent] == len(routes[agent]):
+                continue
+            task_id = routes[agent][next_task[agent]]
+            agents = assigned[task_id]
+            if any(next_task[a] == len(routes[a]) or routes[a][next_task[a]] != task_id for a in agents):
+                continue
+            task = self.tasks[task_id]
+            start_time = max(as_start_time(free_time[a] + self.distance(position[a], task.room))
+                for a in agents)
+            start_times[task_id] = start_time
+            for a in agents:
+                next_task[a] += 1
+                position[a] = task.room
+                free_time[a] = as_start_time(start_time + task.duration)
+            ready.extend(agents)
+        if any(next_task[agent] < len(routes[agent]) for agent in self.agents):
+            return None
+        return start_times
+
+    def makespan(self, routes):
+        start_times = self.schedule(routes)
+        if start_times is None:
+            return INFINITY, INFINITY
+        ends = [start_times[task_id] + self.tasks[task_id].duration for task_id in start_times]
+        return max(ends, default=0), sum(ends)
+
+    def insertion_point(self, route, agent, room):
+        """The position in an agent's route at which visiting room adds the least travel."""
+        nodes = [self.start_nodes[agent]] + [self.tasks[task_id].room for task_id in route]
+        distance = self.distances.distance
+
+        def detour(index):
+            added = distance(nodes[index], room)
+            if index + 1 < len(nodes):
+                added += distance(room, nodes[index + 1]) - distance(nodes[index], nodes[index + 1])
+            return added
+
+        return min(range(len(nodes)), key=detour)
+
+    def improve(self, routes):
+        """Relocate single agent tasks from the agent that finishes last, while it shortens the plan."""
+        best = self.makespan(routes)
+        for _ in range(self.max_improvements):
+            start_times = self.schedule(routes)
+            finish = {agent: max((start_times[t] + self.tasks[t].duration for t in routes[agent]), default=0)
+                for agent in self.agents}
+            critical = max(self.agents, key=finish.get)
+            improved = False
+            for index, task_id in enumerate(routes[critical]):
+                if self.tasks[task_id].extra_dirty:
+                    continue
+                for agent in self.agents:
+                    if agent == critical:
+                        continue
+                    insert_at = self.insertion_point(routes[agent], agent, self.tasks[task_id].room)
+                    candidate = dict(routes)
+                    candidate[critical] = routes[critical][:index] + routes[critical][index + 1:]
+                    candidate[agent] = routes[agent][:insert_at] + [task_id] + routes[agent][insert_at:]
+                    cost = self.makespan(candidate)
+                    if cost < best:
+                        best, routes, improved = cost, candidate, True
+                        break
+                if improved:
+                    break
+            if not improved:
+                break
+        return routes
+
+    def to_actions(self, routes):
+        start_times = self.schedule(routes)
+        position = dict(self.start_nodes)
+        free_time = {agent: Decimal(0) for agent in self.agents}
+        plan = []
+        for task_id in sorted(start_times, key=start_times.get):
+            task = self.tasks[task_id]
+            agents = [agent for agent in self.agents if task_id in routes[agent]]
+            for agent in agents:
+                time = free_time[agent]
+                for start_node, end_node, length in self.path(position[agent], task.room):
+                    plan.append(Move(time, length, agent, start_node, end_node))
+                    time = as_start_time(time + length)
+                position[agent] = task.room
+                free_time[agent] = as_start_time(start_times[task_id] + task.duration)
+            if task.extra_dirty:
+                plan.append(ExtraClean(start_times[task_id], task.duration, agents[0], agents[1], task.room))
+            else:
+                plan.append(Clean(start_times[task_id], task.duration, agents[0], task.room))
+        plan.sort(key=lambda action: action.start_time)
+        return plan
@@ -0,0 +1,213 @@
+"""Publishes the events of a running simulation to the visualiser over a websocket.
+
+The simulator notifies its listener when actions start and finish, when agents stall, and when plans are requested.
+`LivePublisher' queues these events and a background thread sends them in batches (at most one message per
+`batch_interval' seconds) to every connected page. Pages that connect part way through a run are first sent the
+most recent `max_history' events, in frames of at most `max_batch' events.
+
+Nothing is sent to a page whilst holding the publisher's lock, and a page that does not complete its handshake or
+take a frame within `send_timeout' seconds is disconnected, so a slow page cannot hold up the others.
+"""
+
+import socket
+
+from base64 import b64encode
+from collections import deque
+from hashlib import sha1
+from itertools import islice
+from logging import getLogger
+from queue import Queue, Empty
+from struct import pack
+from threading import Thread, Lock
+from time import monotonic
+
+import simplejson
+
+from logger import StyleAdapter
+from timeline import action_records, record_agents, record_label
+
+log = StyleAdapter(getLogger(__name__))
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class DummyListener:
+
+    def notify(self, event, action, time):
+        pass
+
+    def close(self):
+        pass
+
+
+def encode_event(event, action, time):
+    (type_name, attrs), = action_records([action])
+    start_time = float(attrs["start_time"])
+    return {
+        "event": event,
+        "time": float(time),
+        "type": type_name,
+        "lanes": record_agents(attrs),
+        "label": record_label(type_name, attrs),
+        "start": start_time,
+        "end": start_time + float(attrs.get("duration", 0)),
+        "partial": bool(attrs.get("partial")),
+    }
+
+
+def handshake_response(request):
+    """The response accepting a websocket upgrade request (RFC 6455), or None if the request is not an upgrade."""
+    headers = {}
+    for line in request.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    key = headers.get("sec-websocket-key")
+    if not key or "websocket" not in headers.get("upgrade", "").lower():
+        return None
+    accept = b64encode(sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+    return "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n" \
+        "Sec-WebSocket-Accept: {}\r\n\r\n".format(accept)
+
+
+def text_frame(text):
+    """A single, unmasked text frame, as sent from server to client."""
+    payload = text.encode("utf-8")
+    if len(payload) < 126:
+        header = pack("!BB", 0x81, len(payload))
+    elif len(payload) < 1 << 16:
+        header = pack("!BBH", 0x81, 126, len(payload))
+    else:
+        header = pack("!BBQ", 0x81, 127, len(payload))
+    return header + payload
+
+
+class LivePublisher:
+
+    def __init__(self, host="localhost", port=8765, batch_interval=0.25, max_batch=1000, max_history=10000,
+            send_timeout=1.0):
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.send_timeout = send_timeout
+        self.events = Queue()
+        self.history = deque(maxlen=max_history)
+        self.clients = []
+        # frames published whilst a connecting client is sent the history, by client
+        self.joining = {}
+        self._lock = Lock()
+        self._closed = False
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen()
+        self.address = self.server.getsockname()
+        log.info("publishing simulator events on ws://{}:{}", *self.address)
+
+        self._accepter = Thread(target=self._accept, name="live-accept", daemon=True)
+        self._sender = Thread(target=self._send_batches, name="live-send", daemon=True)
+        self._accepter.start()
+        self._sender.start()
+
+    def notify(self, event, action, time):
+        self.events.put(encode_event(event, action, time))
+
+    def close(self):
+        """Send any queued events, then disconnect all clients."""
+        if self._closed:
+            return
+        self._closed = True
+        self.events.put(None)
+        self._sender.join()
+        try:
+            # wakes the accepting thread
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+        with self._lock:
+            for client in self.clients + list(self.joining):
+                client.close()
+            self.clients = []
+            self.joining = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, tb):
+        self.close()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                client, _address = self.server.accept()
+            except OSError:
+                return
+            client.settimeout(self.send_timeout)
+            try:
+                request = client.recv(4096).decode("latin-1")
+                response = handshake_response(request)
+                if response is None:
+                    client.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                    client.close()
+                    continue
+                client.sendall(response.encode("latin-1"))
+                self._join(client)
+            except OSError as e:
+                log.warning("live client failed to connect: {!r}", e)
+                with self._lock:
+                    self.joining.pop(client, None)
+                client.close()
+
+    def _join(self, client):
+        """Send the history to a new client, then any frames published meanwhile, before adding it to the clients."""
+        with self._lock:
+            history = list(self.history)
+            self.joining[client] = []
+        frames = [text_frame(simplejson.dumps(history[start:start + self.max_batch]))
+            for start in range(0, len(history), self.max_batch)]
+        while True:
+            for frame in frames:
+                client.sendall(frame)
+            with self._lock:
+                frames = self.joining[client]
+                if not frames:
+                    del self.joining[client]
+                    self.clients.append(client)
+                    return
+                self.joining[client] = []
+
+    def _send_batches(self):
+        finished = False
+        while not finished:
+            batch = []
+            event = self.events.get()
+            deadline = monotonic() + self.batch_interval
+            while True:
+                if event is None:
+                    finished = True
+                    break
+                batch.append(event)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    event = self.events.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+            if batch:
+                self._publish(batch)
+
+    def _publish(self, batch):
+        frame = text_frame(simplejson.dumps(batch))
+        with self._lock:
+            self.history.extend(batch)
+            for frames in self.joining.values():
+                frames.append(frame)
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.sendall(frame)
+            except OSError as e:
+                log.info("live client disconnected: {!r}", e)
+                client.close()
+                with self._lock:
+                    self.clients.remove(client)
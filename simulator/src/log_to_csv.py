@@ -4,22 +4,33 @@ import argparse
 import re
 
 from csv import DictWriter, writer
-from os.path import join, basename, splitext
-from os import listdir
-from operator import mul
-from itertools import groupby
-from functools import partial, reduce
+from decimal import Decimal
+from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+from os.path import join, splitext, exists
+from os import listdir, stat, replace
+from itertools import chain
+import pickle
+
+from logger import read_json_lines
+from problem_parser import get_problem_parameters
 
 independent_vars = (
     'goal_achieved', 'planning_time', 'size', 'total_nodes', 'start', 'agents', 'edge', 'wait', 'dirt_type', 'dirt_min',
-    'dirt_max', 'extra_dirt', "id",
+    'dirt_max', 'extra_dirt', 'executor', "id",
 )
 
+# logs from before the executor was logged were all run with this executor
+default_executor = "GreedyPlanHeuristicExecutor"
+
 dependent_vars = (
     'planner_called', 'end_simulation_time', 'total_time_planning', 'time_waiting_for_actions_to_finish',
     'time_waiting_for_planner_to_finish',
 )
 
+# increment when the format of parsed rows changes, to invalidate existing caches
+cache_version = 1
+
 number_pattern = re.compile(r"((\A|(?<=\W))(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?)")
 
 
@@ -40,38 +51,103 @@ def deciexpr(expr):
     return number_pattern.sub(r"Decimal('\1')", expr)
 
 
-def run(out_file, input_dirs):
+def run(out_file, input_dirs, processes=None, cache_file=None):
+    """Write the raw and aggregate csv files for the logs in `input_dirs'.
+
+    Parsed rows are cached (by default next to `out_file') keyed by the size and modification time of each log. Only
+    new and changed logs are parsed, in a pool of processes, and only the groups containing them are re-aggregated.
+    """
     assert input_dirs
-    files = []
+    files = {}
     for input_dir in input_dirs:
         for filename in listdir(input_dir):
-            if filename.endswith(".log"):
-                files.append(join(input_dir, filename))
+            if filename.endswith((".log", ".jsonl")):
+                files[join(input_dir, filename)] = file_signature(join(input_dir, filename))
     assert files
 
-    raw_data = sorted((get_data(filename) for filename in files), key=data_key)
-
-    aggregated_data = (
-        indy_vars + aggregate_data(group) for (_key, indy_vars), group in
-        groupby(raw_data, partial(data_key, include_id=False))
-    )
+    cache_file = cache_file or out_file + ".cache"
+    cache = load_cache(cache_file)
+    stale = [filename for filename, signature in files.items() if cache["files"].get(filename, (None,))[0] != signature]
+    removed = [filename for filename in cache["files"] if filename not in files]
+    aggregate_file = "-aggregate".join(splitext(out_file))
+    if not stale and not removed and exists(out_file) and exists(aggregate_file):
+        return
+
+    changed_groups = set()
+    for filename in stale + removed:
+        _signature, rows = cache["files"].pop(filename, (None, ()))
+        changed_groups.update(group_key(row) for row in rows)
+    if stale:
+        with Pool(processes) as pool:
+            parsed = pool.map(read_data, stale, chunksize=max(1, len(stale) // (4 * (processes or cpu_count()))))
+        for filename, rows in zip(stale, parsed):
+            cache["files"][filename] = files[filename], rows
+            changed_groups.update(group_key(row) for row in rows)
+
+    raw_data = sorted(chain.from_iterable(rows for _signature, rows in cache["files"].values()), key=data_key)
+
+    groups = defaultdict(list)
+    for row in raw_data:
+        key = group_key(row)
+        if key in changed_groups:
+            groups[key].append(row)
+    for key in changed_groups:
+        if key in groups:
+            cache["aggregates"][key] = key[1] + aggregate_data(groups[key])
+        else:
+            cache["aggregates"].pop(key, None)
 
     with open(out_file, "w") as f:
-        out = DictWriter(f, independent_vars + dependent_vars)
+        out = DictWriter(f, independent_vars + dependent_vars, extrasaction="ignore")
         out.writeheader()
         out.writerows(raw_data)
     del out
 
-    with open("-aggregate".join(splitext(out_file)), "w") as f:
+    with open(aggregate_file, "w") as f:
         out = writer(f)
         out.writerow(independent_vars[:-1] + ("count",) + dependent_vars)
-        out.writerows(aggregated_data)
+        out.writerows(cache["aggregates"][key] for key in sorted(cache["aggregates"], key=repr_key))
+
+    save_cache(cache_file, cache)
+
+
+def file_signature(filename):
+    file_stat = stat(filename)
+    return file_stat.st_size, file_stat.st_mtime_ns
+
+
+def load_cache(filename):
+    try:
+        with open(filename, "rb") as f:
+            cache = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        cache = None
+    if not cache or cache.get("version") != cache_version:
+        cache = {"version": cache_version, "files": {}, "aggregates": {}}
+    return cache
+
+
+def save_cache(filename, cache):
+    # write then rename, so an interrupted run cannot leave a truncated cache
+    with open(filename + ".tmp", "wb") as f:
+        pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+    replace(filename + ".tmp", filename)
+
+
+def group_key(data):
+    return data_key(data, include_id=False)
+
+
+def repr_key(key):
+    # independent variables may mix types between logs (eg. None and bool), so sort their base key and then by repr
+    base_key, indy_vars = key
+    return base_key, repr(indy_vars)
 
 
 def data_key(data, include_id=True):
     base_key = (
         data["wait"], float(data["planning_time"]), data["extra_dirt"], int(data["total_nodes"]), data["size"],
-        int(data["edge"]), int(data["agents"]), int(data["dirt_max"]), int(data["dirt_min"]),
+        int(data["edge"]), int(data["agents"]), int(data["dirt_max"]), int(data["dirt_min"]), data["executor"],
         # data["dirt_type"],
     )
     if include_id:
@@ -86,32 +162,29 @@ def aggregate_data(data):
     return result
 
 
+def read_data(name):
+    if name.endswith(".jsonl"):
+        return [get_json_data(record) for record in read_json_lines([name])]
+    return [get_data(name)]
+
+
 def get_data(name):
     with open(name) as f:
         data = eval(f.read())
 
     del data["execution"]
+    data.update(get_problem_parameters(name))
+    data.setdefault("executor", default_executor)
+    return data
 
-    name_data = re.split("[\(\)]", basename(name)[5:-4])
-
-    for label, value in zip(name_data[::2], name_data[1::2]):
-        label = label.strip("-")
-        if label == "extra_dirt":
-            value = float(value.strip("%")) / 100
-            data[label] = value
-        elif label == "size":
-            data[label] = value
-            data["total_nodes"] = reduce(mul, eval(value))
-        elif label == "dirt":
-            dirt_type, dirt_min, dirt_max = value.split(",")
-            data["dirt_type"] = dirt_type
-            data["dirt_min"] = float(dirt_min)
-            data["dirt_max"] = float(dirt_max)
-        else:
-            data[label] = value
 
-    data["wait"] = (name_data[-1] == "-wait")
-    return data
+def get_json_data(record):
+    data = dict(record)
+    data.pop("execution", None)
+    data.update(data.pop("parameters"))
+    data.setdefault("executor", default_executor)
+    # numbers in repr logs and file names are read as floats, whereas non-integers in JSON are read as Decimals
+    return {key: float(value) if isinstance(value, Decimal) else value for key, value in data.items()}
 
 
 def parser():
@@ -119,10 +192,12 @@ def parser():
     p.add_argument("--output", "-o", required=True)
     p.add_argument("--input-dir", "-i", required=True, nargs="+")
     p.add_argument("--output-dir", "-d", default="/home/jack/Dropbox/work/results")
+    p.add_argument("--processes", "-p", type=int, default=None)
+    p.add_argument("--cache", help="file to cache parsed logs in (default: the output file with .cache appended)")
     return p
 
 
 if __name__ == "__main__":
     args = parser().parse_args()
     output_file = join(args.output_dir, args.output)
-    run(output_file, args.input_dir)
+    run(output_file, args.input_dir, args.processes, args.cache)
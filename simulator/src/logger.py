@@ -1,9 +1,14 @@
 from os.path import join, basename, splitext, isdir
 from os import makedirs
+from collections import OrderedDict
 
-from logging import LoggerAdapter
+from logging import LoggerAdapter, getLevelName, NOTSET, DEBUG, INFO, WARNING, ERROR
 from inspect import signature
 
+import simplejson
+
+import problem_parser
+
 
 class Logger(object):
 
@@ -43,7 +48,7 @@ class Logger(object):
         self.log.write(stringify(value))
         self.log.write(",\n")
 
-    def log_plan(self, plan):
+    def log_plan(self, plan, start_time=None, planning_duration=None):
         if not self.plan_log:
             self.plan_log = open(self.plan_log_file_name, "w")
         self.plan_log.write(repr(plan))
@@ -69,15 +74,81 @@ class Logger(object):
         return self
 
 
+class JsonLinesLogger(Logger):
+    """Logs the properties of a run as a single JSON object on one line, along with the parameters of the problem.
+
+    Properties are kept as their typed values (rather than stringified) and written in one go when the logger is
+    closed. Actions are written as objects with a `type' field and their attributes.
+    """
+
+    @classmethod
+    def get_log_file_name(cls, problem_name, planning_time):
+        return splitext(super().get_log_file_name(problem_name, planning_time))[0] + ".jsonl"
+
+    def __init__(self, log_file_name, working_directory="./logs", plans_subdir="plans", parameters=None):
+        super().__init__(log_file_name, working_directory, plans_subdir)
+        self.parameters = parameters if parameters is not None \
+            else problem_parser.get_problem_parameters(log_file_name)
+        self.properties = OrderedDict()
+
+    def log_property(self, name, value, stringify=str):
+        self.properties[str(name)] = value
+
+    def close(self):
+        try:
+            if self.properties:
+                record = OrderedDict([("parameters", self.parameters)])
+                record.update(self.properties)
+                with open(self.log_file_name, "a") as log:
+                    log.write(simplejson.dumps(record, use_decimal=True, default=_encode_value))
+                    log.write("\n")
+                self.properties.clear()
+        finally:
+            if self.plan_log and not self.plan_log.closed:
+                self.plan_log.close()
+
+
+def _encode_value(obj):
+    if hasattr(obj, "_format_attrs"):
+        record = OrderedDict([("type", type(obj).__name__)])
+        record.update((attr, getattr(obj, attr)) for attr in obj._format_attrs if hasattr(obj, attr))
+        return record
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError("{!r} is not JSON serializable".format(obj))
+
+
+def read_json_lines(filenames):
+    """Read the records of each JSON Lines log in turn."""
+    for filename in filenames:
+        with open(filename) as fh:
+            for line in fh:
+                if line.strip():
+                    yield simplejson.loads(line, use_decimal=True)
+
+
 class DummyLogger:
 
-    def log_plan(self, plan):
+    def log_plan(self, plan, start_time=None, planning_duration=None):
         pass
 
     def log_property(self, name, value, stringify=str):
         pass
 
 
+class MemoryLogger(DummyLogger):
+
+    def __init__(self):
+        self.properties = {}
+        self.plans = []
+
+    def log_plan(self, plan, start_time=None, planning_duration=None):
+        self.plans.append(plan)
+
+    def log_property(self, name, value, stringify=str):
+        self.properties[name] = value
+
+
 class BraceMessage:
     def __init__(self, fmt, args, kwargs):
         self.fmt = fmt
@@ -89,15 +160,44 @@ class BraceMessage:
 
 
 class StyleAdapter(LoggerAdapter):
+    """Logs messages using brace style formatting, which is only done if the message is actually emitted.
+
+    Logging below a given level can be compiled out for batch runs with `compile_out', which replaces the adapter's
+    logging methods for those levels with no-ops.
+    """
+
+    compiled_out_level = NOTSET
 
     def __init__(self, logger):
         self.logger = logger
+        # keyword arguments accepted by Logger._log (exc_info, extra, stack_info...) -- fixed for a given logger
+        self._log_arg_names = tuple(signature(logger._log).parameters)
 
     def log(self, level, msg, *args, **kwargs):
         if self.isEnabledFor(level):
             msg, log_kwargs = self.process(msg, kwargs)
             self.logger._log(level, BraceMessage(msg, args, kwargs), (), **log_kwargs)
 
+    def isEnabledFor(self, level):
+        return level >= self.compiled_out_level and super().isEnabledFor(level)
+
     def process(self, msg, kwargs):
-        return msg, {arg: kwargs[arg]
-            for arg in signature(self.logger._log).parameters if arg in kwargs}
\ No newline at end of file
+        return msg, {arg: kwargs[arg] for arg in self._log_arg_names if arg in kwargs}
+
+    @classmethod
+    def compile_out(cls, level):
+        """Make logging below `level' a no-op for all StyleAdapters. Use NOTSET to restore logging at all levels."""
+        level = getLevelName(level) if isinstance(level, str) else level
+        cls.compiled_out_level = level
+        for name, method_level in _level_methods:
+            if method_level < level:
+                setattr(cls, name, _no_op)
+            elif name in vars(cls):
+                delattr(cls, name)
+
+
+_level_methods = (("debug", DEBUG), ("info", INFO), ("warning", WARNING), ("error", ERROR))
+
+
+def _no_op(self, msg, *args, **kwargs):
+    pass
@@ -0,0 +1,160 @@
+#! /usr/bin/env python3
+
+import argparse
+import decimal
+import logging
+
+from csv import DictWriter
+from multiprocessing import Pool
+from random import Random
+from statistics import mean, stdev
+
+from accuracy import quantize
+from executor import executor_types, GreedyPlanHeuristicExecutor
+from logger import StyleAdapter, MemoryLogger
+from new_simulator import Simulator
+from planner import Planner, get_domain_file
+import problem_parser
+from transit import copy_model
+
+log = StyleAdapter(logging.getLogger(__name__))
+
+result_fields = ("sample", "seed", "goal_achieved", "end_simulation_time", "planner_called", "total_time_planning")
+
+summary_fields = ("end_simulation_time", "planner_called", "total_time_planning")
+
+
+def sampled_rooms(model):
+    return sorted(name for name, node in model["nodes"].items() if "dirtiness" in node.get("unknown", ()))
+
+
+def count_extra_dirty_rooms(model):
+    return sum(1 for name in sampled_rooms(model) if model["nodes"][name]["unknown"]["extra-dirty"]["actual"] is True)
+
+
+def sample_model(model, rng, extra_dirty_rooms):
+    """Create a realisation of `model' with the unknown values of each room drawn from the problem's ranges."""
+    model = copy_model(model)
+    rooms = sampled_rooms(model)
+    extra_dirty = set(rng.sample(rooms, extra_dirty_rooms))
+    for name in rooms:
+        unknown = model["nodes"][name]["unknown"]
+        dirtiness = unknown["dirtiness"]
+        dirty_value = quantize(rng.uniform(float(dirtiness["min"]), float(dirtiness["max"])))
+        set_actual_values(unknown, dirty_value, name in extra_dirty)
+    return model
+
+
+def set_actual_values(unknown, dirty_value, extra_dirty):
+    # mirrors problem_creator.create_room
+    has_dirtiness = dirty_value > 0
+    unknown["dirtiness"]["actual"] = dirty_value
+    unknown["extra-dirty"]["actual"] = extra_dirty and has_dirtiness
+    unknown["dirty"]["actual"] = not extra_dirty and has_dirtiness
+    unknown["cleaned"]["actual"] = not has_dirtiness
+    if "not-extra-dirty" in unknown:
+        unknown["not-extra-dirty"]["actual"] = not unknown["extra-dirty"]["actual"]
+
+
+def sample_seed(seed, sample):
+    return "{}:{}".format(seed, sample)
+
+
+def run_sample(task):
+    sample, seed, model, extra_dirty_rooms, executor_name, planning_time, domain_file = task
+    model = sample_model(model, Random(sample_seed(seed, sample)), extra_dirty_rooms)
+    executor = executor_types[executor_name](planning_time)
+    planner = Planner(planning_time, domain_file=domain_file or get_domain_file(model))
+    result_logger = MemoryLogger()
+
+    simulator = Simulator(model, executor, planner, result_logger)
+    try:
+        simulator.run()
+    except Exception as e:
+        log.warning("sample {} failed with: {!r}", sample, e)
+    simulator.print_results(result_logger)
+
+    result = {key: result_logger.properties[key] for key in result_fields[2:]}
+    result["sample"] = sample
+    result["seed"] = sample_seed(seed, sample)
+    return result
+
+
+def run(problem_file, samples, seed, executor_name, planning_time, processes=None, domain_file=None,
+        extra_dirty_rooms=None):
+    model = problem_parser.decode(problem_file)
+    if extra_dirty_rooms is None:
+        extra_dirty_rooms = count_extra_dirty_rooms(model)
+    tasks = ((sample, seed, model, extra_dirty_rooms, executor_name, planning_time, domain_file)
+        for sample in range(samples))
+
+    with Pool(processes) as pool:
+        results = sorted(pool.imap_unordered(run_sample, tasks), key=lambda r: r["sample"])
+    return results
+
+
+def summarise(results):
+    successful = [r for r in results if r["goal_achieved"]]
+    summary = {"samples": len(results), "goal_achieved": len(successful)}
+    for field in summary_fields:
+        summary[field] = describe(sorted(r[field] for r in successful))
+    return summary
+
+
+def describe(values):
+    if not values:
+        return None
+    values = [float(v) for v in values]
+    return {
+        "mean": mean(values),
+        "stdev": stdev(values) if len(values) > 1 else 0,
+        "min": values[0],
+        "p5": quantile(values, 0.05),
+        "median": quantile(values, 0.5),
+        "p95": quantile(values, 0.95),
+        "max": values[-1],
+    }
+
+
+def quantile(sorted_values, q):
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Runs the simulator over many realisations of a problem's unknown values")
+    p.add_argument("problem_file")
+    p.add_argument("--samples", "-n", type=int, default=100)
+    p.add_argument("--seed", "-s", type=int, default=0)
+    p.add_argument("--executor", "-e", choices=sorted(executor_types), default=GreedyPlanHeuristicExecutor.__name__)
+    p.add_argument("--planning-time", "-t", type=decimal.Decimal, default="nan")
+    p.add_argument("--processes", "-p", type=int, default=None, help="number of worker processes (default: cpu count)")
+    p.add_argument("--domain-file", "-d")
+    p.add_argument("--extra-dirty-rooms", type=int, default=None,
+        help="number of extra dirty rooms per sample (default: as many as in the problem)")
+    p.add_argument("--output", "-o", help="csv file to write the result of each sample to")
+    p.add_argument("--log-level", default="WARNING")
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s [%(levelname)s] %(message)s",
+        datefmt="%X")
+    # nothing below the log level would be emitted, so skip the cost of the logging calls entirely
+    StyleAdapter.compile_out(args.log_level)
+    sample_results = run(args.problem_file, args.samples, args.seed, args.executor, args.planning_time,
+        args.processes, args.domain_file, args.extra_dirty_rooms)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            out = DictWriter(f, result_fields)
+            out.writeheader()
+            out.writerows(sample_results)
+
+    results_summary = summarise(sample_results)
+    print("goal achieved: {goal_achieved}/{samples}".format(**results_summary))
+    for summary_field in summary_fields:
+        print("{}: {}".format(summary_field, results_summary[summary_field]))
@@ -1,18 +1,25 @@
 from enum import Enum
-from copy import copy, deepcopy
+from copy import copy
 from accuracy import quantize, as_end_time, as_start_time
 from pddl_parser import unknown_value_getter
-from action import Plan, Observe, Move, Clean, ExtraClean, Stalled, GetExecutionHeuristic
+from action import Plan, PlanUpdate, Move, Observe, GetExecutionHeuristic
 from action_state import ActionState, ExecutionState
 from planning_exceptions import ExecutionError
 from logger import StyleAdapter, DummyLogger
+from checkpoint import DummyCheckpointer
+from live import DummyListener
+from speculation import DummySpeculator
 from requests import Request
+from timeline import Timeline
+from execution_trace import ExecutionTrace
+from profiler import profile
+from transit import copy_model
 
 from collections import namedtuple, Iterable
 from priority_queue import MultiActionStateQueue
 from itertools import chain
 from decimal import Decimal
-from logging import getLogger
+from logging import getLogger, DEBUG
 
 log = StyleAdapter(getLogger(__name__))
 
@@ -28,31 +35,42 @@ class ExecutionProblem(Enum):
     ReachedDeadline = 1
 
 
+def format_execution(actions):
+    return repr("[{}]".format(", ".join(str(action) for action in actions)))
+
+
 class Simulator:
 
     ID_COUNTER = 0
 
-    def __init__(self, model, executor, planner, plan_logger=None, action_queue=None, time=quantize(0)):
+    def __init__(self, model, executor, planner, plan_logger=None, action_queue=None, time=quantize(0),
+            checkpointer=None, executed=None, listener=None, heuristic_planner=None, speculator=None):
         self.model = model
         self.executor = executor
         self.planner = planner
+        self.heuristic_planner = heuristic_planner if heuristic_planner else planner
         self.plan_logger = plan_logger if plan_logger else DummyLogger()
+        self.checkpointer = checkpointer if checkpointer else DummyCheckpointer()
+        self.listener = listener if listener else DummyListener()
+        self.speculator = speculator if speculator else DummySpeculator()
         self.action_queue = action_queue if action_queue else MultiActionStateQueue()
-        self.executed = []
+        self.executed = executed if executed is not None else []
         self.stalled = set()
         self.time = time
         self.start_time = self.time
         self.id = self.get_next_id()
 
-    def copy_with(self, *, model=None, executor=None, planner=None, action_queue=None, plan_logger=None, time=None):
-        model = model if model else deepcopy(self.model)
+    def copy_with(self, *, model=None, executor=None, planner=None, action_queue=None, plan_logger=None, time=None,
+            heuristic_planner=None):
+        model = model if model else copy_model(self.model)
         executor = executor if executor else self.executor.copy()
         planner = planner if planner else self.planner
+        heuristic_planner = heuristic_planner if heuristic_planner else self.heuristic_planner
         plan_logger = plan_logger if plan_logger else DummyLogger()
         action_queue = action_queue if action_queue else copy(self.action_queue)
         time = time if time else self.time
-        return Simulator(model=model, executor=executor, planner=planner, plan_logger=plan_logger,
-            action_queue=action_queue, time=time)
+        return type(self)(model=model, executor=executor, planner=planner, plan_logger=plan_logger,
+            action_queue=action_queue, time=time, heuristic_planner=heuristic_planner)
 
     def run(self, *, deadline=Decimal("Infinity")):
         log.info("Simulator({}).run() deadline={}", self.id, deadline)
@@ -84,8 +102,9 @@ class Simulator:
                     break
 
             # ask executor if it has an action to start before or at this time
-            action_request = self.executor.next_actions(self.time, min(first_action_state.time, deadline))
-            if self.process_request(action_request):
+            future_time = min(first_action_state.time, deadline)
+            if self.executor.next_wake_up_time() <= future_time and \
+                    self.process_request(self.executor.next_actions(self.time, future_time)):
                 self.action_queue.put(action_states)
                 continue
 
@@ -95,17 +114,20 @@ class Simulator:
             self.process_action_states(action_states)
 
             # ask executor last chance for next action if queue empty
-            if self.action_queue.empty():
+            if self.action_queue.empty() and self.executor.next_wake_up_time() <= deadline:
                 action_request = self.executor.next_actions(self.time, deadline)
                 self.process_request(action_request)
 
+            self.checkpointer.notify(self, action_states)
+
         log.info("Simulator({}).run() finished", self.id)
         return self.is_goal_in_model()
 
     def process_action_states(self, action_states):
         first = action_states[0]
-        log.debug("Simulator({}).process_action_state() time={a.time}, state={a.state!s}, action_state={a_s}", self.id,
-            a=first, a_s=action_states)
+        if log.isEnabledFor(DEBUG):
+            log.debug("Simulator({}).process_action_state() time={a.time}, state={a.state!s}, action_state={a_s}",
+                self.id, a=first, a_s=action_states)
 
         self.time = first.time
         if first.state == ExecutionState.pre_start:
@@ -129,20 +151,37 @@ class Simulator:
                 log.debug("{} has stalled attempting: {}", action_state.action.agents(), action_state.action)
                 self.stalled.update((a, action_state.time) for a in action_state.action.agents())
                 results.append(ActionResult(action_state.action, action_state.time, ExecutionProblem.AgentStalled))
+                self.listener.notify("stalled", action_state.action, action_state.time)
             else:
                 self.action_queue.put(action_state.start())
+                self.listener.notify("start", action_state.action, action_state.time)
+                if type(action_state.action) is Move:
+                    self.speculator.notify_move(self, action_state.action)
 
         if heuristic_action_state:
             duration = heuristic_action_state.action.duration
-            plan = self.planner.get_plan(self.model, duration)
+            plan = self.heuristic_planner.get_plan(self.model, duration)
             self.action_queue.put(
                 ActionState(heuristic_action_state.action.copy_with(plan=plan)).start())
             del plan, duration
-        if plan_action_state:
+        if plan_action_state and self.executor.accepts_plan_updates:
+            (plan, duration), updates = self.get_plans(duration=plan_action_state.action.duration)
+            plan_action = plan_action_state.action.copy_with(duration=duration, plan=plan)
+            self.action_queue.put(ActionState(plan_action).start())
+            self.listener.notify("plan", plan_action, plan_action_state.time)
+            self.plan_logger.log_plan(plan, plan_action.start_time, duration)
+            for plan, duration in updates:
+                update_action = PlanUpdate(plan_action.start_time, duration, plan=plan)
+                self.action_queue.put(ActionState(update_action).start())
+                self.listener.notify("plan", update_action, plan_action_state.time)
+                self.plan_logger.log_plan(plan, update_action.start_time, duration)
+            del plan, duration, updates
+        elif plan_action_state:
             plan, duration = self.get_plan(duration=plan_action_state.action.duration)
-            self.action_queue.put(
-                ActionState(plan_action_state.action.copy_with(duration=duration, plan=plan)).start())
-            self.plan_logger.log_plan(plan)
+            plan_action = plan_action_state.action.copy_with(duration=duration, plan=plan)
+            self.action_queue.put(ActionState(plan_action).start())
+            self.listener.notify("plan", plan_action, plan_action_state.time)
+            self.plan_logger.log_plan(plan, plan_action.start_time, duration)
             del plan, duration
 
         request = self.executor.process_results(results)
@@ -155,10 +194,12 @@ class Simulator:
                 log.debug("{} has stalled attempting: {}", action_state.action.agents(), action_state.action)
                 self.stalled.update((a, action_state.time) for a in action_state.action.agents())
                 results.append(ActionResult(action_state.action, action_state.time, ExecutionProblem.AgentStalled))
+                self.listener.notify("stalled", action_state.action, action_state.time)
             else:
                 action_state = action_state.finish()
                 result = action_state.action.apply(self.model)
                 self.executed.append(action_state.action)
+                self.listener.notify("finish", action_state.action, action_state.time)
                 results.append(ActionResult(action_state.action, as_start_time(action_state.time), result))
 
         request = self.executor.process_results(results)
@@ -169,23 +210,42 @@ class Simulator:
         if request is None:
             return False
         elif isinstance(request, Request):
-            adjustment = request.adjust(self.action_queue)
-            self.executor.update_executing_actions(adjustment)
+            with profile.phase("request adjustment"):
+                adjustment = request.adjust(self.action_queue)
+                self.executor.update_executing_actions(adjustment)
             return adjustment
         else:
             raise NotImplementedError("Unknown request type: {}".format(request))
 
     def get_plan(self, duration=None):
         log.debug("Simulator({}).get_plan()", self.id)
+        predicted_model = self.predict_model()
+        speculative_plan = self.speculator.get_plan(predicted_model, self.time)
+        if speculative_plan is not None:
+            return speculative_plan
+        return self.planner.get_plan_and_time_taken(predicted_model, duration=duration)
+
+    def get_plans(self, duration=None):
+        """The first plan found and its planning time, and the improved plans found after it with theirs."""
+        log.debug("Simulator({}).get_plans()", self.id)
+        predicted_model = self.predict_model()
+        speculative_plan = self.speculator.get_plan(predicted_model, self.time)
+        if speculative_plan is not None:
+            return speculative_plan, []
+        plans = self.planner.get_plans_and_times(predicted_model, duration=duration)
+        return plans[0], plans[1:]
+
+    def predict_model(self):
         deadline = self.executor.current_plan_execution_limit
         simulator = self.copy_with(model=self.convert_to_hypothesis_model(self.model))
-        simulator.run(deadline=deadline)
-        predicted_model = simulator.model
-        return self.planner.get_plan_and_time_taken(predicted_model, duration=duration)
+        with profile.phase("state prediction"):
+            simulator.run(deadline=deadline)
+        return simulator.model
 
+    @profile.timed("hypothesis conversion")
     def convert_to_hypothesis_model(self, model):
         log.debug("Simulator({}).convert_to_hypothesis_model()", self.id)
-        model = deepcopy(model)
+        model = copy_model(model)
         assumed_values = model["assumed-values"]
         for node in model["nodes"].values():
             if "known" in node:
@@ -222,14 +282,13 @@ class Simulator:
 
     def print_results(self, logger):
         goal_achieved = self.is_goal_in_model()
-        plan_actions = [a for a in self.executed if type(a) is Plan]
-        planner_called = len(plan_actions)
-        time_planning = sum(a.duration for a in self.executed if type(a) is Plan)
-        time_waiting_for_actions_to_finish = self.get_time_waiting_for_actions_to_finish()
-        time_waiting_for_planner_to_finish = self.get_time_waiting_for_planner_to_finish()
+        timeline = Timeline(self.executed)
+        planner_called = len(timeline.plan_actions)
+        time_planning = sum(a.duration for a in timeline.plan_actions)
+        time_waiting_for_actions_to_finish = timeline.time_waiting_for_actions_to_finish()
+        time_waiting_for_planner_to_finish = timeline.time_waiting_for_planner_to_finish()
         try:
-            stalled_actions = [Stalled(time, min(p.end_time for p in plan_actions if p.end_time > time) - time, agent)
-                           for agent, time in self.stalled]
+            stalled_actions = timeline.stalled_actions(self.stalled)
         except ValueError as e:
             log.warning("stalled action collation failed with: {}", e)
             stalled_actions = []
@@ -239,6 +298,8 @@ class Simulator:
         log.info("Time spent planning: {}", time_planning)
         log.info("time_waiting_for_actions_to_finish {}", time_waiting_for_actions_to_finish)
         log.info("time_waiting_for_planner_to_finish {}", time_waiting_for_planner_to_finish)
+        for agent, totals in sorted(timeline.agent_totals(self.start_time, self.time, stalled_actions).items()):
+            log.info("{}: busy={a.busy} stalled={a.stalled} idle={a.idle}", agent, a=totals)
 
         logger.log_property("goal_achieved", goal_achieved)
         logger.log_property("planner_called", planner_called)
@@ -246,42 +307,22 @@ class Simulator:
         logger.log_property("total_time_planning", time_planning)
         logger.log_property("time_waiting_for_actions_to_finish", time_waiting_for_actions_to_finish)
         logger.log_property("time_waiting_for_planner_to_finish", time_waiting_for_planner_to_finish)
-        executed_str = "[{}]".format(", ".join(str(action) for action in (self.executed + stalled_actions)
-            if type(action) is not Observe))
-        logger.log_property("execution", executed_str, stringify=repr)
+        if isinstance(self.executed, ExecutionTrace):
+            self.executed.extend(stalled_actions)
+            logger.log_property("execution", self.executed.filename, stringify=repr)
+        else:
+            execution = [action for action in (self.executed + stalled_actions) if type(action) is not Observe]
+            logger.log_property("execution", execution, stringify=format_execution)
 
-        log.info("remaining temp nodes: {}",
-            [(name, node) for name, node in self.model["nodes"].items() if name.startswith("temp")])
+        log.info("remaining in-transit agents: {}", self.model.get("in-transit", {}))
 
         return goal_achieved
 
     def get_time_waiting_for_actions_to_finish(self):
-        plan_actions = [a for a in self.executed if type(a) is Plan]
-        real_actions = [a for a in self.executed if type(a) in (Move, Clean, ExtraClean)]
-
-        total_time = 0
-        for p in plan_actions:
-            overlapping_actions = [a for a in real_actions if a.start_time < p.end_time <= a.end_time]
-            if len(overlapping_actions) > 0:
-                t = max(a.end_time - p.end_time for a in overlapping_actions)
-                total_time += t
-
-        return total_time
+        return Timeline(self.executed).time_waiting_for_actions_to_finish()
 
     def get_time_waiting_for_planner_to_finish(self):
-        plan_actions = [a for a in self.executed if type(a) is Plan]
-        real_actions = [a for a in self.executed if type(a) in (Move, Clean, ExtraClean)]
-
-        total_time = 0
-        for p in plan_actions:
-            previous_actions = [p.end_time - a.end_time for a in real_actions if a.end_time <= p.end_time]
-            if len(previous_actions) == 0:
-                t = p.duration
-            else:
-                t = min(p.end_time - a.end_time for a in real_actions if a.end_time <= p.end_time)
-            total_time += t
-
-        return total_time
+        return Timeline(self.executed).time_waiting_for_planner_to_finish()
 
     @classmethod
     def get_next_id(cls):
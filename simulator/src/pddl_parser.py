@@ -4,6 +4,7 @@ from itertools import dropwhile, chain
 from io import TextIOWrapper, RawIOBase, BufferedIOBase
 from accuracy import quantize
 import action
+from transit import transit_edges
 from planning_exceptions import IncompletePlanException
 
 _action_map = {
@@ -65,9 +66,11 @@ def encode_problem(out, model):
 
     _encode_preamble(out, "problem-name", model["domain"], has_metric)
 
-    _encode_objects(out, chain(model["agents"].keys(), model["nodes"].keys()))
+    in_transit = model.get("in-transit", {})
 
-    _encode_init(out, model["agents"], model["nodes"], model["graph"], model["assumed-values"])
+    _encode_objects(out, chain(model["agents"].keys(), model["nodes"].keys(), in_transit.keys()))
+
+    _encode_init(out, model["agents"], model["nodes"], model["graph"], model["assumed-values"], in_transit)
 
     _encode_goal(out, model["goal"])
 
@@ -97,11 +100,13 @@ def _encode_objects(out, objects):
     out.write(")\n")
 
 
-def _encode_init(out, agents, nodes, graph, assumed_values):
+def _encode_init(out, agents, nodes, graph, assumed_values, in_transit=None):
     out.write("(:init ")
     _encode_init_helper(out, agents, assumed_values)
     _encode_init_helper(out, nodes, assumed_values)
     _encode_graph(out, graph)
+    if in_transit:
+        _encode_in_transit(out, in_transit)
     out.write(") ")
 
 
@@ -172,6 +177,15 @@ def _encode_graph(out, graph):
             _encode_function(out, ("distance", node1, node0), value)
 
 
+def _encode_in_transit(out, in_transit):
+    # in-transit agents are at a node that can only be left
+    for name in in_transit:
+        _encode_predicate(out, ("node", name))
+    for node0, node1, value in transit_edges(in_transit):
+        _encode_predicate(out, ("edge", node0, node1))
+        _encode_function(out, ("distance", node0, node1), value)
+
+
 def _encode_goal(out, goals):
     out.write("(:goal (and ")
     if isinstance(goals, list):
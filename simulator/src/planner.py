@@ -3,32 +3,65 @@ from subprocess import Popen, PIPE
 from pddl_parser import decode_plan_from_optic, encode_problem_to_file
 import tempfile
 from os.path import join as path_join
-from threading import Timer, Thread, RLock
+from threading import Timer, Thread, RLock, Lock
 from time import time
 from math import isnan
-from planning_exceptions import NoPlanException, IncompletePlanException
+from planning_exceptions import NoPlanException, IncompletePlanException, PlanningCancelled
 from accuracy import quantize
 from logging import getLogger
 from logger import StyleAdapter
+from profiler import profile
 
 
 log = StyleAdapter(getLogger(__name__))
 
 
+def get_domain_file(model):
+    return "../janitor/{}-domain.pddl".format(model["domain"])
+
+
+# only one planner process is run at a time
+_planner_lock = RLock()
+
+
 def synchronized(func):
-    lock = RLock()
     @wraps(func)
     def f(*args, **kwargs):
+        if not _planner_lock.acquire(blocking=False):
+            log.warning("Trying to run planner when another instance of planner is running")
+            _planner_lock.acquire()
         try:
-            if not lock.acquire(blocking=False):
-                log.warning("Trying to run planner when another instance of planner is running")
-                lock.acquire()
             return func(*args, **kwargs)
         finally:
-            lock.release()
+            _planner_lock.release()
     return f
 
 
+class Cancellation:
+    """Lets another thread stop a planner call, before it starts or by terminating the planner's process."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.cancelled = False
+        self.process = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self.process:
+                self.process.terminate()
+
+    def check(self):
+        if self.cancelled:
+            raise PlanningCancelled()
+
+    def watch(self, process):
+        with self._lock:
+            self.process = process
+            if self.cancelled:
+                process.terminate()
+
+
 class Planner(object):
 
     def __init__(self, planning_time, planner_location="../optic-cplex", domain_file="../janitor/janitor-domain.pddl",
@@ -41,8 +74,32 @@ class Planner(object):
 
         tempfile.tempdir = path_join(working_directory, "temp_problems")
 
+    @profile.timed("planner")
     @synchronized
-    def get_plan(self, model, duration=None):
+    def get_plan(self, model, duration=None, cancellation=None):
+        plans, report, single_pass = self.run_planner(model, duration, cancellation)
+        if cancellation:
+            cancellation.check()
+        if plans:
+            return plans[-1][0]
+        if report:
+            raise NoPlanException()
+        if single_pass:
+            return []
+        raise RuntimeError("Illegal state")
+
+    @profile.timed("planner")
+    @synchronized
+    def get_plans_and_times(self, model, duration=None):
+        """Every plan the planner finds within duration (each better than the last), with the time it was found."""
+        plans, report, _single_pass = self.run_planner(model, duration)
+        if plans:
+            return plans
+        if report:
+            raise NoPlanException()
+        return [([], quantize(0))]
+
+    def run_planner(self, model, duration, cancellation=None):
         # problem_file = self.create_problem_file(model)
         problem_file = "/dev/stdin"
         report = True
@@ -56,34 +113,37 @@ class Planner(object):
             report = False
             single_pass = True
 
+        if cancellation:
+            cancellation.check()
+        start = time()
         p = Popen(args, stdin=PIPE, stdout=PIPE, cwd=self.working_directory)
-        Thread(target=encode_problem_to_file, name="problem-writer", args=(p.stdin, model)).start()
+        if cancellation:
+            cancellation.watch(p)
+        Thread(target=self.encode_problem, name="problem-writer", args=(p.stdin, model)).start()
         timer = Timer(float(duration), p.terminate)
         timer.start()
 
-        plan = None
+        plans = []
         # run loop only once when duration is 0
         while True:
             try:
-                plan = list(decode_plan_from_optic(self.decode(p.stdout), report_incomplete_plan=report))
+                with profile.phase("plan decoding"):
+                    plan = list(decode_plan_from_optic(self.decode(p.stdout), report_incomplete_plan=report))
             except IncompletePlanException:
                 break
+            plans.append((plan, quantize(time() - start)))
             if single_pass:
                 break
         timer.cancel()
         p.wait(1)
 
-        if plan is not None:
-            return plan
-        if report:
-            raise NoPlanException()
-        if single_pass:
-            return []
-        raise RuntimeError("Illegal state")
+        return plans, report, single_pass
 
-    def get_plan_and_time_taken(self, model, duration=None):
+    @synchronized
+    def get_plan_and_time_taken(self, model, duration=None, cancellation=None):
+        # timed once the planner is free, so waiting for another planner call is not counted
         start = time()
-        plan = self.get_plan(model, duration)
+        plan = self.get_plan(model, duration, cancellation)
         end = time()
         return plan, quantize(end - start)
 
@@ -93,6 +153,19 @@ class Planner(object):
         encode_problem_to_file(fh, model)
         return fh.name
 
+    @staticmethod
+    def encode_problem(fh, model):
+        with profile.phase("pddl encoding"):
+            try:
+                encode_problem_to_file(fh, model)
+            except BrokenPipeError:
+                log.debug("planner exited before reading the whole problem")
+
     def decode(self, data_stream):
-        for line in data_stream:
+        lines = iter(data_stream)
+        while True:
+            with profile.phase("planner wait"):
+                line = next(lines, None)
+            if line is None:
+                return
             yield line.decode(self.encoding)
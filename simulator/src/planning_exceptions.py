@@ -15,4 +15,8 @@ class StateException(Exception):
 
 
 class PlannerException(Exception):
+    pass
+
+
+class PlanningCancelled(Exception):
     pass
\ No newline at end of file
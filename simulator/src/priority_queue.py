@@ -2,6 +2,7 @@ from collections import deque, Iterable
 from functools import partial
 from heapq import heapify, heappop, heappush
 from copy import copy
+from itertools import count
 from operator import attrgetter
 
 
@@ -77,6 +78,91 @@ class PriorityQueue(AbstractBaseQueue):
         return heappop(self.queue)
 
 
+class EndTimeIndexedQueue(AbstractBaseQueue):
+    """Priority queue of action states that is also indexed by the end times of their actions.
+
+    Action states whose actions end after a given time can be taken out of the queue (`pop_ends_after') without
+    visiting the rest of the queue. Entries taken out this way are left in the heap, and skipped when they reach its
+    front. The heap and the index are rebuilt when they hold more such stale entries than live ones.
+    """
+
+    def __init__(self, sequence=()):
+        super().__init__([])
+        self._live = {}
+        self._by_end = []
+        self._ids = count()
+        self.extend(sequence)
+
+    def append(self, item):
+        id_ = next(self._ids)
+        self._live[id_] = item
+        heappush(self.queue, (item, id_))
+        heappush(self._by_end, (-item.action.end_time, id_))
+
+    def extend(self, iterable):
+        for item in iterable:
+            id_ = next(self._ids)
+            self._live[id_] = item
+            self.queue.append((item, id_))
+            self._by_end.append((-item.action.end_time, id_))
+        heapify(self.queue)
+        heapify(self._by_end)
+
+    def pop(self):
+        self._discard_stale()
+        item, id_ = heappop(self.queue)
+        del self._live[id_]
+        self._compact()
+        return item
+
+    def peek(self):
+        self._discard_stale()
+        return self.queue[0][0]
+
+    def pop_ends_after(self, time):
+        """Take the action states whose actions end after time out of the queue."""
+        items = []
+        while self._by_end and -self._by_end[0][0] > time:
+            _end_time, id_ = heappop(self._by_end)
+            item = self._live.pop(id_, None)
+            if item is not None:
+                items.append(item)
+        self._compact()
+        return items
+
+    def _discard_stale(self):
+        while self.queue[0][1] not in self._live:
+            heappop(self.queue)
+
+    def _compact(self):
+        limit = 2 * len(self._live) + 32
+        if len(self.queue) > limit:
+            self._queue = [entry for entry in self.queue if entry[1] in self._live]
+            heapify(self.queue)
+        if len(self._by_end) > limit:
+            self._by_end = [entry for entry in self._by_end if entry[1] in self._live]
+            heapify(self._by_end)
+
+    def empty(self):
+        return not self._live
+
+    def values(self):
+        return iter(self._live.values())
+
+    def clear(self):
+        self.queue.clear()
+        self._live.clear()
+        self._by_end.clear()
+
+    def __copy__(self):
+        return type(self)(self.values())
+
+    def __str__(self):
+        return "{}([{!s}])".format(type(self).__name__, ", ".join(repr(i) for i in sorted(self.values())))
+
+    __repr__ = __str__
+
+
 class MultiQueue:
 
     def __init__(self, sequence=(), *, queue_type=AbstractBaseQueue, key=None, cmp=None):
@@ -173,7 +259,10 @@ class MultiActionQueue(MultiQueue):
 class MultiActionStateQueue(MultiQueue):
 
     def __init__(self, sequence=()):
-        super().__init__(sequence, queue_type=PriorityQueue)
+        super().__init__(sequence, queue_type=EndTimeIndexedQueue)
+
+    def get_ends_after(self, time):
+        return self.queue.pop_ends_after(time)
 
     def __copy__(self):
         return MultiActionStateQueue(self.queue)
\ No newline at end of file
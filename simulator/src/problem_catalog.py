@@ -0,0 +1,185 @@
+#! /usr/bin/env python3
+"""Catalog of a corpus of problems, kept in an sqlite database.
+
+The catalog records the parameters of each problem (parsed from its file name), a hash of its contents, and stats
+derived from the problem itself. Building the catalog is incremental, only files that have changed size or
+modification time since they were last catalogued are read. Subsets of the corpus can then be selected by query,
+eg. to feed `run_problems.sh -'.
+"""
+
+import argparse
+import hashlib
+import sqlite3
+
+from glob import glob
+from multiprocessing import Pool
+from os import stat
+from os.path import join, isdir, abspath
+
+import problem_parser
+
+columns = (
+    ("path", "TEXT PRIMARY KEY"),
+    ("file_size", "INTEGER"),
+    ("mtime", "REAL"),
+    ("hash", "TEXT"),
+    ("size", "TEXT"),
+    ("total_nodes", "INTEGER"),
+    ("dirt_type", "TEXT"),
+    ("dirt_min", "REAL"),
+    ("dirt_max", "REAL"),
+    ("edge", "INTEGER"),
+    ("agents", "INTEGER"),
+    ("start", "TEXT"),
+    ("extra_dirt", "REAL"),
+    ("id", "INTEGER"),
+    ("rooms", "INTEGER"),
+    ("extra_dirty_rooms", "INTEGER"),
+    ("total_dirtiness", "REAL"),
+)
+column_names = tuple(name for name, _ in columns)
+integer_parameters = ("edge", "agents", "id")
+
+problem_extensions = (".json",)
+
+
+def connect(database):
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE IF NOT EXISTS problems ({})".format(
+        ", ".join("{} {}".format(name, type_) for name, type_ in columns)))
+    for name in ("agents", "total_nodes", "dirt_max", "extra_dirt"):
+        connection.execute("CREATE INDEX IF NOT EXISTS problems_{0} ON problems ({0})".format(name))
+    return connection
+
+
+def find_problems(paths):
+    """Expand directories into the problem files they contain (recursively)."""
+    for path in paths:
+        if isdir(path):
+            for extension in problem_extensions:
+                yield from sorted(glob(join(path, "**", "*" + extension), recursive=True))
+        else:
+            yield path
+
+
+def catalog_entry(path):
+    """Create the row for a single problem file."""
+    file_stat = stat(path)
+    with open(path, "rb") as fh:
+        content_hash = hashlib.sha1(fh.read()).hexdigest()
+    entry = dict.fromkeys(column_names)
+    entry.update(path=path, file_size=file_stat.st_size, mtime=file_stat.st_mtime, hash=content_hash)
+
+    parameters = problem_parser.get_problem_parameters(path)
+    for name in column_names:
+        if name in parameters and entry[name] is None:
+            entry[name] = parameters[name]
+    for name in integer_parameters:
+        try:
+            entry[name] = int(entry[name])
+        except (TypeError, ValueError):
+            entry[name] = None
+
+    entry.update(get_problem_stats(problem_parser.decode(path)))
+    return tuple(entry[name] for name in column_names)
+
+
+def get_problem_stats(model):
+    rooms = extra_dirty_rooms = 0
+    total_dirtiness = 0
+    for node in model["nodes"].values():
+        known, unknown = node.get("known", {}), node.get("unknown", {})
+        if not known.get("is-room", False):
+            continue
+        rooms += 1
+        extra_dirty = known["extra-dirty"] if "extra-dirty" in known else \
+            unknown.get("extra-dirty", {}).get("actual", False)
+        extra_dirty_rooms += bool(extra_dirty)
+        dirtiness = known["dirtiness"] if "dirtiness" in known else unknown.get("dirtiness", {}).get("actual", 0)
+        total_dirtiness += dirtiness
+    return {"rooms": rooms, "extra_dirty_rooms": extra_dirty_rooms, "total_dirtiness": float(total_dirtiness)}
+
+
+def build_catalog(database, paths, processes=None):
+    """Add or update the catalog entries of the problems in `paths', returning the number of entries written.
+
+    Files already catalogued with the same size and modification time are skipped. Entries for files under `paths'
+    that no longer exist are removed.
+    """
+    connection = connect(database)
+    try:
+        known = {path: (file_size, mtime) for path, file_size, mtime in
+            connection.execute("SELECT path, file_size, mtime FROM problems")}
+        found = set()
+        stale = []
+        for path in find_problems(paths):
+            path = abspath(path)
+            found.add(path)
+            file_stat = stat(path)
+            if known.get(path) != (file_stat.st_size, file_stat.st_mtime):
+                stale.append(path)
+
+        roots = tuple(join(abspath(path), "") if isdir(path) else abspath(path) for path in paths)
+        removed = [(path,) for path in known if path not in found and path.startswith(roots)]
+
+        if stale:
+            with Pool(processes) as pool:
+                entries = pool.map(catalog_entry, stale, chunksize=max(1, len(stale) // 64))
+        else:
+            entries = []
+        with connection:
+            connection.executemany("DELETE FROM problems WHERE path = ?", removed)
+            connection.executemany("INSERT OR REPLACE INTO problems VALUES ({})".format(
+                ", ".join("?" * len(column_names))), entries)
+        return len(entries)
+    finally:
+        connection.close()
+
+
+def query(database, where=None, parameters=(), order_by="path", **equal_to):
+    """Select the paths of problems matching an sql `where' clause and/or columns equal to the given values."""
+    unknown = set(equal_to) - set(column_names)
+    if unknown:
+        raise ValueError("unknown columns: {}".format(", ".join(sorted(unknown))))
+    if order_by not in column_names:
+        raise ValueError("unknown column: {}".format(order_by))
+    clauses = ["{} = ?".format(name) for name in sorted(equal_to)]
+    parameters = [equal_to[name] for name in sorted(equal_to)] + list(parameters)
+    if where:
+        clauses.append("({})".format(where))
+    sql = "SELECT path FROM problems"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY " + order_by
+
+    connection = connect(database)
+    try:
+        return [path for path, in connection.execute(sql, parameters)]
+    finally:
+        connection.close()
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Builds and queries a catalog of problems")
+    p.add_argument("--database", "-db", default="problems/catalog.sqlite")
+    subparsers = p.add_subparsers(dest="command")
+    subparsers.required = True
+
+    build = subparsers.add_parser("build", help="catalog new and changed problems")
+    build.add_argument("paths", nargs="+", help="problem files or directories containing problems")
+    build.add_argument("--processes", "-p", type=int, default=None)
+
+    select = subparsers.add_parser("query", help="print the paths of matching problems, one per line")
+    select.add_argument("where", nargs="?", help="sql condition, eg. \"agents = 3 AND total_nodes >= 16\"")
+    select.add_argument("--order-by", default="path", choices=column_names)
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    if args.command == "build":
+        written = build_catalog(args.database, args.paths, args.processes)
+        print("catalogued {} problems in {}".format(written, args.database))
+    else:
+        for problem in query(args.database, args.where, order_by=args.order_by):
+            print(problem)
@@ -95,7 +95,7 @@ def create_problem(output, size, dirtiness, assume_clean, empty_rooms, edge_leng
     # start problem such that agents have observed starting location
     for agent_name, agent in problem["agents"].items():
         rm = agent["at"][1]
-        Observe(None, agent_name, rm).apply(problem)
+        Observe(quantize(0), agent_name, rm).apply(problem)
 
     encode(output, problem)
 
@@ -199,8 +199,9 @@ def create_metric():
     }
 
 
-def create_room(dirtiness, extra_dirty):
-    dirty_value = dirtiness.actual if dirtiness.actual != "random" else quantize(rand(dirtiness.min, dirtiness.max))
+def create_room(dirtiness, extra_dirty, dirty_value=None):
+    if dirty_value is None:
+        dirty_value = dirtiness.actual if dirtiness.actual != "random" else quantize(rand(dirtiness.min, dirtiness.max))
     has_dirtiness = 0 < (dirty_value if dirty_value not in ("max", "min") else getattr(dirtiness, dirty_value))
     return {
         "known": {
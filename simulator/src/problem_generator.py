@@ -0,0 +1,173 @@
+#! /usr/bin/env python3
+
+import argparse
+
+from decimal import Decimal
+from multiprocessing import Pool
+from os import makedirs
+from os.path import join
+
+import numpy as np
+
+from action import Observe
+from accuracy import quantize
+from problem_creator import Point, ActualMinMax, PointAction, create_agents, create_metric, create_room
+from problem_parser import encode
+
+EMPTY, ROOM, EXTRA_DIRTY = 0, 1, 2
+
+
+def generate_problem(size, dirtiness, edge_length, agents, agent_start, rng, *, extra_dirty_rooms=None,
+        percentage_extra_dirty=None, empty_rooms=None, problem_name="generated", domain="janitor",
+        assume_clean=False):
+    """Create a grid problem in memory, with the same structure and naming as `problem_creator.create_problem'.
+
+    Room types, names, edges and dirtiness are computed over arrays for the whole grid, so large grids (50x50 and
+    beyond) are cheap to create. `rng' is a numpy Generator, and is the only source of randomness. Extra dirty rooms
+    are either given as points or sampled as a percentage of the rooms that are not empty.
+    """
+    empty_rooms = (agent_start,) if empty_rooms is None else empty_rooms
+    kinds = np.full(size, ROOM, dtype=np.int8)
+    for point in empty_rooms:
+        kinds[point] = EMPTY
+    if extra_dirty_rooms is None:
+        candidates = np.flatnonzero(kinds == ROOM)
+        count = int(round(percentage_extra_dirty * len(candidates))) if percentage_extra_dirty else 0
+        kinds.flat[rng.choice(candidates, count, replace=False)] = EXTRA_DIRTY
+    else:
+        for point in extra_dirty_rooms:
+            if kinds[point] == EMPTY:
+                raise ValueError("rooms cannot be both empty rooms and extra dirty: {}".format(point))
+            kinds[point] = EXTRA_DIRTY
+
+    names = grid_names(kinds)
+    assume_dirty = not assume_clean
+    problem = {
+        "problem": problem_name,
+        "domain": domain,
+        "assumed-values": {
+            "dirty": assume_dirty,
+            "cleaned": assume_clean,
+            "dirtiness": ("max" if assume_dirty else 0),
+            "extra-dirty": False,
+        },
+        "nodes": create_nodes(names, kinds, dirtiness, rng),
+        "graph": {"bidirectional": False, "edges": grid_edges(names, edge_length)},
+        "agents": create_agents(agents, names[agent_start]),
+        "goal": {"hard-goals": [["cleaned", name] for name in goal_rooms(kinds)]},
+        "metric": create_metric(),
+    }
+
+    # start problem such that agents have observed starting location
+    for agent_name, agent in problem["agents"].items():
+        Observe(quantize(0), agent_name, agent["at"][1]).apply(problem)
+
+    return problem
+
+
+def grid_names(kinds):
+    """Name each grid cell by its kind, numbering each kind separately in column (x then y) order."""
+    flat_kinds = kinds.ravel()
+    numbers = np.zeros(flat_kinds.shape, dtype=int)
+    for kind in (EMPTY, ROOM, EXTRA_DIRTY):
+        mask = flat_kinds == kind
+        numbers[mask] = np.arange(1, mask.sum() + 1)
+    prefixes = {EMPTY: "empty-rm", ROOM: "rm", EXTRA_DIRTY: "rm-ed"}
+    names = np.array(["{}{}".format(prefixes[kind], number) for kind, number in zip(flat_kinds.tolist(),
+        numbers.tolist())], dtype=object)
+    return names.reshape(kinds.shape)
+
+
+def grid_edges(names, edge_length):
+    """Edges between each cell and its neighbours, in both directions."""
+    pairs = [
+        (names[1:, :], names[:-1, :]),
+        (names[:-1, :], names[1:, :]),
+        (names[:, 1:], names[:, :-1]),
+        (names[:, :-1], names[:, 1:]),
+    ]
+    return [[start, end, edge_length] for starts, ends in pairs
+        for start, end in zip(starts.ravel().tolist(), ends.ravel().tolist())]
+
+
+def goal_rooms(kinds):
+    return ["rm{}".format(i) for i in range(1, (kinds == ROOM).sum() + 1)] + \
+        ["rm-ed{}".format(i) for i in range(1, (kinds == EXTRA_DIRTY).sum() + 1)]
+
+
+def create_nodes(names, kinds, dirtiness, rng):
+    flat_names, flat_kinds = names.ravel().tolist(), kinds.ravel()
+    if dirtiness.actual == "random":
+        dirty_values = np.floor(rng.uniform(dirtiness.min, dirtiness.max, len(flat_names))).astype(int).tolist()
+        dirty_values = [Decimal(value) for value in dirty_values]
+    else:
+        dirty_values = [dirtiness.actual] * len(flat_names)
+
+    nodes = {}
+    for name, kind, dirty_value in zip(flat_names, flat_kinds.tolist(), dirty_values):
+        if kind == EMPTY:
+            nodes[name] = {"node": True}
+        else:
+            nodes[name] = create_room(dirtiness, extra_dirty=(kind == EXTRA_DIRTY), dirty_value=dirty_value)
+    return nodes
+
+
+def generate_problem_name(size, dirtiness, edge_length, agents, starting_location, percentage_extra_dirty):
+    keys = dict(locals())
+    format_string = "auto-size({size.x},{size.y})-dirt({dirtiness.actual},{dirtiness.min},{dirtiness.max})-" \
+        "edge({edge_length})-agents({agents})-start({starting_location})-extra_dirt({percentage_extra_dirty:.0%})"
+    return format_string.format(**keys)
+
+
+def get_centre(size):
+    return Point(*(int(i/2.0 - 0.5) for i in size))
+
+
+def write_problem(task):
+    directory, seed, index, size, dirtiness, edge_length, agents, percentage_extra_dirty, domain = task
+    problem_name = generate_problem_name(size, dirtiness, edge_length, agents, "centre", percentage_extra_dirty)
+    rng = np.random.default_rng([seed, index])
+    problem = generate_problem(size, dirtiness, edge_length, agents, get_centre(size), rng,
+        percentage_extra_dirty=percentage_extra_dirty, problem_name=problem_name, domain=domain)
+    output = join(directory, problem_name + "-id({}).json".format(index))
+    encode(output, problem)
+    return output
+
+
+def generate_corpus(directory, sizes, dirtinesses, edge_lengths, agent_counts, percentages_extra_dirty, repeats,
+        seed=0, domain="janitor", processes=None):
+    """Generate and write `repeats' problems for every combination of parameters, using a pool of processes.
+
+    Each problem is generated in the process that writes it, and is seeded by `seed' and its id, so the corpus is the
+    same regardless of the number of processes.
+    """
+    tasks = [(directory, seed, index, size, dirtiness, edge_length, agents, percentage_extra_dirty, domain)
+        for size in sizes for dirtiness in dirtinesses for edge_length in edge_lengths for agents in agent_counts
+        for percentage_extra_dirty in percentages_extra_dirty for index in range(repeats)]
+    makedirs(directory, exist_ok=True)
+    with Pool(processes) as pool:
+        return list(pool.imap_unordered(write_problem, tasks))
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Generates a corpus of grid problems")
+    p.add_argument("--output-dir", "-o", required=True)
+    p.add_argument("--size", "-s", required=True, nargs="+", action=PointAction,
+        help="the sizes of the map grid, specified as x,y")
+    p.add_argument("--dirtiness", "-d", nargs=2, type=int, default=(20, 40), metavar=("MIN", "MAX"))
+    p.add_argument("--edge-length", "-el", nargs="+", type=int, default=(20,))
+    p.add_argument("--agents", "-a", nargs="+", type=int, required=True)
+    p.add_argument("--extra-dirty", "-ed", nargs="+", type=float, default=(0.2,),
+        help="the proportion of rooms that are extra dirty")
+    p.add_argument("--repeats", "-r", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--domain", "-dn", default="janitor")
+    p.add_argument("--processes", "-p", type=int, default=None)
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    generated = generate_corpus(args.output_dir, args.size, (ActualMinMax("random", *args.dirtiness),), args.edge_length,
+        args.agents, args.extra_dirty, args.repeats, args.seed, args.domain, args.processes)
+    print("generated {} problems in {}".format(len(generated), args.output_dir))
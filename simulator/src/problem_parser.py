@@ -1,5 +1,10 @@
+import re
 import simplejson
 
+from functools import reduce
+from operator import mul
+from os.path import basename
+
 
 def decode(filename):
     with open(filename) as fh:
@@ -10,3 +15,33 @@ def decode(filename):
 def encode(filename, obj):
     with open(filename, mode="w") as fh:
         simplejson.dump(obj, fh, use_decimal=True)
+
+
+def get_problem_parameters(filename):
+    """Parse the parameters of a generated problem from its file name, or from the name of a log of a run of it.
+
+    eg. auto-size(4,4)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id(0)-planning_time(10).log
+    """
+    name = re.sub(r"\.(log|jsonl|json)$", "", basename(filename))
+    if name.startswith("auto-"):
+        name = name[len("auto-"):]
+    name_data = re.split("[\(\)]", name)
+
+    parameters = {}
+    for label, value in zip(name_data[::2], name_data[1::2]):
+        label = label.strip("-").replace("-", "_")
+        if label == "extra_dirt":
+            parameters[label] = float(value.strip("%")) / 100
+        elif label == "size":
+            parameters[label] = value
+            parameters["total_nodes"] = reduce(mul, (int(dimension) for dimension in value.split(",")))
+        elif label == "dirt":
+            dirt_type, dirt_min, dirt_max = value.split(",")
+            parameters["dirt_type"] = dirt_type
+            parameters["dirt_min"] = float(dirt_min)
+            parameters["dirt_max"] = float(dirt_max)
+        else:
+            parameters[label] = value
+
+    parameters["wait"] = (name_data[-1] == "-wait")
+    return parameters
@@ -0,0 +1,109 @@
+from collections import defaultdict, Counter
+from functools import wraps
+from threading import local, Lock
+from time import perf_counter
+
+
+class Profiler:
+    """Records the time spent in, and the number of calls to, named phases of a run.
+
+    Phases are marked with `phase' (a context manager) or `timed' (a decorator). When the profiler is not enabled
+    phases do nothing. Phases may be nested, in which case the self time of the outer phase excludes the time spent
+    in the inner phase. A phase nested directly in a phase of the same name is counted as part of the outer phase.
+    Each thread has its own stack of phases, so phases in different threads may overlap.
+    """
+
+    def __init__(self, clock=perf_counter):
+        self.enabled = False
+        self.clock = clock
+        self._local = local()
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = Counter()
+        self.total_time = defaultdict(float)
+        self.self_time = defaultdict(float)
+
+    def phase(self, name):
+        if not self.enabled:
+            return _null_phase
+        return _Phase(self, name)
+
+    def timed(self, name):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Phase(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record(self, name, total_time, self_time):
+        with self._lock:
+            self.calls[name] += 1
+            self.total_time[name] += total_time
+            self.self_time[name] += self_time
+
+    def report(self):
+        lines = ["{:<24} {:>8} {:>12} {:>12} {:>12}".format("phase", "calls", "total (s)", "self (s)", "mean (ms)")]
+        for name in sorted(self.calls, key=self.total_time.get, reverse=True):
+            lines.append("{:<24} {:>8} {:>12.3f} {:>12.3f} {:>12.3f}".format(name, self.calls[name],
+                self.total_time[name], self.self_time[name], 1000 * self.total_time[name] / self.calls[name]))
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, filename):
+        with open(filename, "w") as fh:
+            fh.write(self.report())
+
+
+class _Phase:
+
+    __slots__ = ("profiler", "name", "start", "nested_time", "stack")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.stack = self.profiler._stack()
+        if self.stack and self.stack[-1].name == self.name:
+            return self
+        self.nested_time = 0.
+        self.stack.append(self)
+        self.start = self.profiler.clock()
+        return self
+
+    def __exit__(self, type_, value, tb):
+        if self.start is None:
+            return False
+        elapsed = self.profiler.clock() - self.start
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1].nested_time += elapsed
+        self.profiler._record(self.name, elapsed, elapsed - self.nested_time)
+        return False
+
+
+class _NullPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, tb):
+        return False
+
+
+_null_phase = _NullPhase()
+
+profile = Profiler()
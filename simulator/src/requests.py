@@ -1,4 +1,3 @@
-from heapq import heapify
 from itertools import chain
 from logging import getLogger
 from action import Plan
@@ -63,14 +62,12 @@ class RemoveActionsWithStateRequest(Request):
         log.debug("RemoveActionsWithStateRequest.adjust() with queue {}", action_queue.queue)
         queue = []
         adjusted_actions = []
-        for action_state in action_queue.queue:
-            action = action_state.action
-            if action.end_time <= self.deadline or action_state.state not in self.states:
+        for action_state in action_queue.get_ends_after(self.deadline):
+            if action_state.state not in self.states:
                 queue.append(action_state)
             else:
-                adjusted_actions.append(ChangedAction(agents=action.agents(), action=None))
-        heapify(queue)
-        action_queue.queue = queue
+                adjusted_actions.append(ChangedAction(agents=action_state.action.agents(), action=None))
+        action_queue.put(queue)
         return adjusted_actions
 
 
@@ -83,9 +80,9 @@ class AdjustToPartialRequest(Request):
         log.debug("AdjustmentRequest.adjust() with queue {}", action_queue.queue)
         queue = []
         adjusted_actions = []
-        for action_state in action_queue.values():
+        for action_state in action_queue.get_ends_after(self.deadline):
             action = action_state.action
-            if action.end_time <= self.deadline or type(action) is Plan:
+            if type(action) is Plan:
                 queue.append(action_state)
                 continue
 
@@ -103,8 +100,6 @@ class AdjustToPartialRequest(Request):
                 else:
                     action_state = ActionState(action)
                 queue.append(action_state)
-        heapify(queue)
-        action_queue.clear()
         action_queue.put(queue)
         return adjusted_actions
 
@@ -115,6 +110,6 @@ class AssertAgentsFinishingNowRequest(Request):
         self.deadline = deadline
 
     def adjust(self, action_queue):
-        for action_state in action_queue.queue:
+        for action_state in action_queue.values():
             assert action_state.action.end_time == self.deadline
         return ()
\ No newline at end of file
@@ -0,0 +1,205 @@
+#! /usr/bin/env python3
+"""Group by statistics over run results, held as columns of numpy arrays.
+
+Rows (eg. the raw csv written by `log_to_csv') are converted once to columns. Grouping assigns each row an integer
+group id, and every statistic is then computed for all groups at once with `np.bincount' and sorting, so re-slicing
+a large set of results by different variables is cheap.
+"""
+
+import argparse
+
+from collections import namedtuple
+from csv import DictReader, DictWriter
+from statistics import NormalDist
+
+import numpy as np
+
+from log_to_csv import independent_vars, dependent_vars
+
+
+class Groups(namedtuple("Groups", "levels codes ids")):
+    """The groups of a set of rows. `levels' are the distinct values of each grouping column, `codes' the index into
+    them of each group's value, and `ids' the group of each row."""
+
+    @property
+    def count(self):
+        return len(self.codes[0]) if self.codes else 1
+
+    @property
+    def keys(self):
+        """The values of the grouping columns for each group (as a tuple)."""
+        levels = tuple(level.tolist() for level in self.levels)
+        return [tuple(level[i] for level, i in zip(levels, index)) for index in
+            zip(*(code.tolist() for code in self.codes))] if self.codes else [()]
+
+
+class Columns:
+    """Run results as a dict of columns. Each column's distinct values and the code of each row are computed once,
+    on first use, so grouping again by the same columns only combines integer codes."""
+
+    def __init__(self, columns, factors=None):
+        self.columns = columns
+        self._factors = factors or {}
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def factor(self, name):
+        """The sorted distinct values of a column, and the index into them of each row's value."""
+        if name not in self._factors:
+            column = self.columns[name]
+            if column.dtype == object:
+                # object columns may mix types (eg. booleans with strings), which numpy cannot order
+                column = column.astype(str)
+            self._factors[name] = np.unique(column, return_inverse=True)
+        return self._factors[name]
+
+    def select(self, mask):
+        return Columns({name: column[mask] for name, column in self.columns.items()},
+            {name: (levels, codes[mask]) for name, (levels, codes) in self._factors.items()})
+
+
+def to_columns(rows, numeric=dependent_vars):
+    """Convert rows (dicts) to columns. Columns named in `numeric' are floats, all others are kept as objects."""
+    rows = list(rows)
+    names = rows[0].keys() if rows else ()
+    columns = {}
+    for name in names:
+        values = [row[name] for row in rows]
+        columns[name] = np.array(values, dtype=float) if name in numeric else np.array(values, dtype=object)
+    return Columns(columns)
+
+
+def read_columns(filename, numeric=dependent_vars):
+    with open(filename) as f:
+        return to_columns(DictReader(f), numeric)
+
+
+def group_by(columns, by):
+    """Assign each row a group id by the values of the columns in `by'. Groups are ordered by their key."""
+    if not by:
+        return Groups((), (), np.zeros(len(columns), dtype=np.intp))
+    levels, codes = zip(*(columns.factor(name) for name in by))
+    shape = tuple(len(level) for level in levels)
+    combined = np.ravel_multi_index(tuple(code.ravel() for code in codes), shape)
+    group_codes, ids = np.unique(combined, return_inverse=True)
+    return Groups(levels, np.unravel_index(group_codes, shape), ids.ravel())
+
+
+def summarise(values, groups, confidence=0.95, quantiles=(0.25, 0.5, 0.75)):
+    """Count, mean, (sample) variance, confidence interval half width and quantiles of `values' for each group.
+
+    Rows whose value is nan are ignored. Statistics that are undefined for a group (eg. the variance of a single
+    value) are nan. Returns a dict of arrays with one entry per group.
+    """
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    ids, values = groups.ids[present], values[present]
+
+    count = np.bincount(ids, minlength=groups.count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(ids, weights=values, minlength=groups.count) / count
+        squares = np.bincount(ids, weights=(values - mean[ids]) ** 2, minlength=groups.count)
+        variance = np.where(count > 1, squares / (count - 1), np.nan)
+        half_width = t_quantile((1 + confidence) / 2, count - 1) * np.sqrt(variance / count)
+
+    result = {"count": count, "mean": mean, "variance": variance, "ci": half_width}
+    result.update(("q{:g}".format(100 * q), value) for q, value in zip(quantiles, group_quantiles(values, ids, count,
+        quantiles)))
+    return result
+
+
+def group_quantiles(values, ids, count, quantiles):
+    """Quantiles of each group, with linear interpolation (as `np.quantile')."""
+    # sorting by value and then (stably) by group is faster than a lexsort, as integer stable sorts are radix sorts
+    order = np.argsort(values, kind="stable")
+    order = order[np.argsort(ids[order], kind="stable")]
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    results = []
+    for q in quantiles:
+        position = starts + q * np.maximum(count - 1, 0)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, starts + np.maximum(count - 1, 0))
+        fraction = position - lower
+        valid = count > 0
+        result = np.full(len(count), np.nan)
+        lower, upper, fraction = lower[valid], upper[valid], fraction[valid]
+        result[valid] = sorted_values[lower] + fraction * (sorted_values[upper] - sorted_values[lower])
+        results.append(result)
+    return results
+
+
+def t_quantile(p, df):
+    """Quantile of Student's t distribution, exact for 1 and 2 degrees of freedom and otherwise by the
+    Cornish-Fisher expansion (accurate to about 1e-3 for 3 degrees of freedom, and better for more)."""
+    df = np.asarray(df, dtype=float)
+    z = NormalDist().inv_cdf(p)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expansion = z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2) \
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3) \
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4)
+    result = np.where(df == 1, np.tan(np.pi * (p - 0.5)), expansion)
+    result = np.where(df == 2, (2 * p - 1) / np.sqrt(2 * p * (1 - p)), result)
+    return np.where(df >= 1, result, np.nan)
+
+
+def paired_differences(columns, value, baseline, treatment="executor", pair_on=("id",), by=()):
+    """Differences in `value' between each treatment and the baseline treatment, over runs paired by the `pair_on'
+    and `by' columns.
+
+    Returns the differences, grouped by the `by' columns and the treatment. Runs without a baseline run to pair with
+    are dropped, as are baseline runs themselves.
+    """
+    values = np.asarray(columns[value], dtype=float)
+    pairs = group_by(columns, tuple(by) + tuple(pair_on))
+    is_baseline = columns[treatment] == baseline
+
+    baseline_values = np.full(pairs.count, np.nan)
+    baseline_values[pairs.ids[is_baseline]] = values[is_baseline]
+    differences = values - baseline_values[pairs.ids]
+
+    keep = ~is_baseline & ~np.isnan(differences)
+    return differences[keep], group_by(columns.select(keep), tuple(by) + (treatment,))
+
+
+def summary_rows(groups, by, stats):
+    for i, key in enumerate(groups.keys):
+        row = dict(zip(by, key))
+        row.update((name, stat[i]) for name, stat in stats.items())
+        yield row
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Summarises run results from the raw csv written by log_to_csv")
+    p.add_argument("input")
+    p.add_argument("--output", "-o", required=True)
+    p.add_argument("--by", nargs="*", default=[v for v in independent_vars if v != "id"])
+    p.add_argument("--value", "-v", default="end_simulation_time", choices=dependent_vars)
+    p.add_argument("--baseline", "-b", help="summarise differences from this executor instead of raw values")
+    p.add_argument("--pair-on", nargs="+", default=["id"])
+    p.add_argument("--confidence", type=float, default=0.95)
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    results = read_columns(args.input)
+    if args.baseline:
+        # runs are paired regardless of whether each achieved the goal
+        by = [name for name in args.by if name not in ("executor", "goal_achieved")]
+        differences, result_groups = paired_differences(results, args.value, args.baseline, pair_on=args.pair_on,
+            by=by)
+        by.append("executor")
+        summary = summarise(differences, result_groups, args.confidence)
+    else:
+        by = args.by
+        result_groups = group_by(results, by)
+        summary = summarise(results[args.value], result_groups, args.confidence)
+    with open(args.output, "w") as f:
+        out = DictWriter(f, list(by) + list(summary))
+        out.writeheader()
+        out.writerows(summary_rows(result_groups, by, summary))
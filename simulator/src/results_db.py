@@ -0,0 +1,230 @@
+#! /usr/bin/env python3
+"""Results of simulator runs, kept in an sqlite database.
+
+Each run is a row of `runs': the parameters of its problem (parsed from the log file name), the executor and
+planning time, and the metrics logged at the end of the run. Properties without a column of their own are kept as
+JSON. Each plan the planner returned during the run is a row of `plans', with when it was requested, how long
+planning took, and the size and makespan of the plan. A run and its plans are written in a single transaction when
+the logger is closed, so a run is either recorded completely or not at all.
+
+Existing JSON Lines logs can be imported, and runs selected by query, eg. to compare executors over a subset of
+problems.
+"""
+
+import argparse
+import sqlite3
+
+from collections import OrderedDict
+from decimal import Decimal
+from os.path import join, basename, splitext
+
+import simplejson
+
+import problem_parser
+from logger import Logger, read_json_lines, _encode_value
+
+run_columns = (
+    ("id", "INTEGER PRIMARY KEY"),
+    ("name", "TEXT"),
+    ("size", "TEXT"),
+    ("total_nodes", "INTEGER"),
+    ("dirt_type", "TEXT"),
+    ("dirt_min", "REAL"),
+    ("dirt_max", "REAL"),
+    ("edge", "INTEGER"),
+    ("agents", "INTEGER"),
+    ("start", "TEXT"),
+    ("extra_dirt", "REAL"),
+    ("problem_id", "INTEGER"),
+    ("planning_time", "REAL"),
+    ("executor", "TEXT"),
+    ("goal_achieved", "INTEGER"),
+    ("planner_called", "INTEGER"),
+    ("end_simulation_time", "REAL"),
+    ("total_time_planning", "REAL"),
+    ("time_waiting_for_actions_to_finish", "REAL"),
+    ("time_waiting_for_planner_to_finish", "REAL"),
+    ("properties", "TEXT"),
+)
+run_column_names = tuple(name for name, _ in run_columns)
+plan_columns = (
+    ("run_id", "INTEGER REFERENCES runs (id)"),
+    ("seq", "INTEGER"),
+    ("start_time", "REAL"),
+    ("planning_duration", "REAL"),
+    ("actions", "INTEGER"),
+    ("makespan", "REAL"),
+)
+plan_column_names = tuple(name for name, _ in plan_columns)
+integer_parameters = ("edge", "agents", "problem_id")
+real_parameters = ("planning_time",)
+indexed_columns = ("agents", "total_nodes", "dirt_max", "extra_dirt", "executor", "planning_time")
+
+DATABASE_NAME = "results.sqlite"
+
+
+def connect(database):
+    connection = sqlite3.connect(database, timeout=60)
+    connection.execute("CREATE TABLE IF NOT EXISTS runs ({})".format(
+        ", ".join("{} {}".format(name, type_) for name, type_ in run_columns)))
+    connection.execute("CREATE TABLE IF NOT EXISTS plans ({}, PRIMARY KEY (run_id, seq))".format(
+        ", ".join("{} {}".format(name, type_) for name, type_ in plan_columns)))
+    for name in indexed_columns:
+        connection.execute("CREATE INDEX IF NOT EXISTS runs_{0} ON runs ({0})".format(name))
+    connection.execute("CREATE INDEX IF NOT EXISTS runs_executor_planning_time ON runs (executor, planning_time)")
+    return connection
+
+
+class DatabaseLogger(Logger):
+    """Logs the properties of a run, and stats of the plans it used, to a results database."""
+
+    def __init__(self, log_file_name, working_directory="./logs", plans_subdir="plans", database=None,
+            parameters=None):
+        super().__init__(log_file_name, working_directory, plans_subdir)
+        self.database = database if database else join(working_directory, DATABASE_NAME)
+        self.name = splitext(basename(log_file_name))[0]
+        self.parameters = parameters if parameters is not None \
+            else problem_parser.get_problem_parameters(log_file_name)
+        self.properties = OrderedDict()
+        self.plans = []
+
+    def log_property(self, name, value, stringify=str):
+        self.properties[str(name)] = value
+
+    def log_plan(self, plan, start_time=None, planning_duration=None):
+        self.plans.append((start_time, planning_duration, len(plan), max((action.end_time for action in plan),
+            default=0)))
+
+    def close(self):
+        if not self.properties:
+            return
+        connection = connect(self.database)
+        try:
+            with connection:
+                insert_run(connection, self.name, self.parameters, self.properties, self.plans)
+            self.properties.clear()
+            self.plans = []
+        finally:
+            connection.close()
+
+
+def insert_run(connection, name, parameters, properties, plans=()):
+    """Insert a run and its plans, returning the run's id. `plans' are the (start time, planning duration, actions,
+    makespan) of each plan."""
+    row = dict.fromkeys(run_column_names)
+    row.update((key, value) for key, value in parameters.items() if key in row)
+    row.update(name=name, problem_id=parameters.get("id"))
+    extra_properties = OrderedDict()
+    for key, value in properties.items():
+        if key in row and key not in ("id", "name", "properties"):
+            row[key] = value
+        elif key != "execution":
+            extra_properties[key] = value
+    row["properties"] = simplejson.dumps(extra_properties, use_decimal=True, default=_encode_value)
+    for key in integer_parameters:
+        row[key] = _to_number(row[key], int)
+    for key in real_parameters:
+        row[key] = _to_number(row[key], float)
+    row = {key: float(value) if isinstance(value, Decimal) else value for key, value in row.items()}
+
+    cursor = connection.execute("INSERT INTO runs ({}) VALUES ({})".format(
+        ", ".join(run_column_names[1:]), ", ".join("?" * (len(run_column_names) - 1))),
+        tuple(row[key] for key in run_column_names[1:]))
+    run_id = cursor.lastrowid
+
+    plan_rows = [(run_id, seq, _to_number(start_time, float), _to_number(planning_duration, float), actions,
+        float(makespan)) for seq, (start_time, planning_duration, actions, makespan) in enumerate(plans)]
+    connection.executemany("INSERT INTO plans VALUES ({})".format(", ".join("?" * len(plan_column_names))),
+        plan_rows)
+    return run_id
+
+
+def _to_number(value, type_):
+    try:
+        return type_(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def import_json_lines(database, filenames):
+    """Add the runs recorded in JSON Lines logs, returning the number of runs added."""
+    connection = connect(database)
+    try:
+        count = 0
+        with connection:
+            for filename in filenames:
+                name = splitext(basename(filename))[0]
+                for record in read_json_lines([filename]):
+                    parameters = record.pop("parameters", {})
+                    # plans are not kept in the log, only the actions executed
+                    record.pop("execution", None)
+                    insert_run(connection, name, parameters, record)
+                    count += 1
+        return count
+    finally:
+        connection.close()
+
+
+def query(database, where=None, parameters=(), columns=("name",), order_by="id", **equal_to):
+    """Select columns of the runs matching an sql `where' clause and/or columns equal to the given values."""
+    unknown = (set(equal_to) | set(columns) | {order_by}) - set(run_column_names)
+    if unknown:
+        raise ValueError("unknown columns: {}".format(", ".join(sorted(unknown))))
+    clauses = ["{} = ?".format(name) for name in sorted(equal_to)]
+    parameters = [equal_to[name] for name in sorted(equal_to)] + list(parameters)
+    if where:
+        clauses.append("({})".format(where))
+    sql = "SELECT {} FROM runs".format(", ".join(columns))
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY " + order_by
+
+    connection = connect(database)
+    try:
+        return connection.execute(sql, parameters).fetchall()
+    finally:
+        connection.close()
+
+
+def get_plans(database, run_id):
+    """The stats of each plan of a run, in the order the plans were received."""
+    connection = connect(database)
+    try:
+        return connection.execute("SELECT {} FROM plans WHERE run_id = ? ORDER BY seq".format(
+            ", ".join(plan_column_names[1:])), (run_id,)).fetchall()
+    finally:
+        connection.close()
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Imports and queries the results of simulator runs")
+    p.add_argument("--database", "-db", default=join("logs", DATABASE_NAME))
+    subparsers = p.add_subparsers(dest="command")
+    subparsers.required = True
+
+    import_ = subparsers.add_parser("import", help="add the runs recorded in JSON Lines logs")
+    import_.add_argument("log_files", nargs="+")
+
+    select = subparsers.add_parser("query", help="print columns of matching runs, one run per line")
+    select.add_argument("where", nargs="?",
+        help="sql condition, eg. \"agents = 3 AND executor = 'GreedyPlanHeuristicExecutor'\"")
+    select.add_argument("--columns", "-c", nargs="+", default=["name"], choices=run_column_names)
+    select.add_argument("--order-by", default="id", choices=run_column_names)
+
+    plans = subparsers.add_parser("plans", help="print the stats of each plan of a run")
+    plans.add_argument("run_id", type=int)
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    if args.command == "import":
+        added = import_json_lines(args.database, args.log_files)
+        print("added {} runs to {}".format(added, args.database))
+    elif args.command == "query":
+        for row in query(args.database, args.where, columns=args.columns, order_by=args.order_by):
+            print("\t".join(map(str, row)))
+    else:
+        print("\t".join(plan_column_names[1:]))
+        for row in get_plans(args.database, args.run_id):
+            print("\t".join(map(str, row)))
@@ -57,7 +57,7 @@ class Simulator:
             else:
                 log.info("observation whilst planning, using predicted model")
                 plan, time_taken = self.planner.get_plan_and_time_taken(predicted_model)
-            self.logger.log_plan(plan)
+            self.logger.log_plan(plan, planning_start, time_taken)
             time_planning += time_taken
             planner_called += 1
             executed.append(Plan(planning_start, time_taken))
@@ -119,8 +119,7 @@ class Simulator:
         executed_str = "[{}]".format(", ".join(str(action) for action in executed if type(action) is not Observe))
         self.logger.log_property("execution", executed_str, stringify=repr)
 
-        log.info("remaining temp nodes: {}",
-            [(name, node) for name, node in self.model["nodes"].items() if name.startswith("temp")])
+        log.info("remaining in-transit agents: {}", self.model.get("in-transit", {}))
 
         return goal_achieved
 
@@ -0,0 +1,162 @@
+"""Planning in the background for the outcomes of observations agents are on their way to make.
+
+When an agent starts moving to a room that has not been observed, the room will turn out to be dirty, extra dirty or
+already clean. Any outcome other than the assumed one makes the executor ask for a new plan when the room is
+observed. For each such outcome, `Speculator' runs a copy of the simulation in which the room has that outcome (and
+every other unknown value is as assumed) up to the plan request, and passes the model the copy would plan on to the
+planner in a background thread.
+
+When the simulator later needs a plan, it first asks the speculator. If the model to plan on is the same problem as
+one planned on speculatively (compared by its PDDL encoding), that plan is used. The time spent planning in the
+background whilst the simulation moved on is not counted against the plan's duration. Otherwise, the simulator
+plans as normal. Either way, the outstanding speculations are discarded, as the state they predicted has passed,
+and their planner processes are stopped so they do not hold up the planner. Only one set of outcomes is speculated
+on per room at a time, and at most `max_pending' speculations are outstanding.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+from logging import getLogger
+
+from accuracy import as_start_time
+from action import Observe
+from logger import StyleAdapter
+from pddl_parser import encode_problem, unknown_value_getter
+from planner import Cancellation
+
+log = StyleAdapter(getLogger(__name__))
+
+
+class DummySpeculator:
+
+    def notify_move(self, simulator, move):
+        pass
+
+    def get_plan(self, model, time):
+        return None
+
+    def close(self):
+        pass
+
+
+class Speculation(namedtuple("Speculation", "room outcome problem start_time future cancellation")):
+
+    def discard(self):
+        self.future.cancel()
+        self.cancellation.cancel()
+
+
+class _PlanRequested(Exception):
+
+    def __init__(self, model, duration):
+        super(_PlanRequested, self).__init__()
+        self.model = model
+        self.duration = duration
+
+
+class _CapturingPlanner:
+    """Stops a speculative simulation at its first plan request, with the model it would plan on."""
+
+    def get_plan_and_time_taken(self, model, duration=None):
+        raise _PlanRequested(model, duration)
+
+    def get_plans_and_times(self, model, duration=None):
+        raise _PlanRequested(model, duration)
+
+
+class _NoHeuristicPlanner:
+
+    def get_plan(self, model, duration=None):
+        return []
+
+
+class Speculator:
+
+    def __init__(self, planner, max_workers=1, max_pending=4):
+        self.planner = planner
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        self.speculations = []
+
+    def notify_move(self, simulator, move):
+        """Start planning for the outcomes of observing move's destination that would need a new plan."""
+        node = simulator.model["nodes"].get(move.end_node, {})
+        if not node.get("unknown") or any(speculation.room == move.end_node for speculation in self.speculations):
+            return
+        for outcome, unknown in deviating_outcomes(node["unknown"], simulator.model["assumed-values"]):
+            if len(self.speculations) >= self.max_pending:
+                return
+            request = self.predict_plan_request(simulator, move.end_node, unknown)
+            if request is None:
+                continue
+            problem = encode(request.model)
+            if any(speculation.problem == problem for speculation in self.speculations):
+                continue
+            log.debug("speculatively planning for {} being {}", move.end_node, outcome)
+            cancellation = Cancellation()
+            future = self.pool.submit(self.planner.get_plan_and_time_taken, request.model, request.duration,
+                cancellation=cancellation)
+            self.speculations.append(
+                Speculation(move.end_node, outcome, problem, simulator.time, future, cancellation))
+
+    @staticmethod
+    def predict_plan_request(simulator, room, unknown):
+        model = simulator.convert_to_hypothesis_model(simulator.model)
+        node = model["nodes"][room]
+        node["known"] = dict(simulator.model["nodes"][room]["known"])
+        node["unknown"] = unknown
+        speculative_simulator = simulator.copy_with(model=model, planner=_CapturingPlanner(),
+            heuristic_planner=_NoHeuristicPlanner())
+        try:
+            speculative_simulator.run()
+        except _PlanRequested as request:
+            return request
+        return None
+
+    def get_plan(self, model, time):
+        """A speculative plan for model and the planning time not hidden by the simulation, or None."""
+        speculations, self.speculations = self.speculations, []
+        problem = encode(model)
+        match = None
+        for speculation in speculations:
+            if match is None and speculation.problem == problem:
+                match = speculation
+            else:
+                speculation.discard()
+        if match is None:
+            return None
+        plan, time_taken = match.future.result()
+        duration = max(as_start_time(time_taken - (time - match.start_time)), Decimal(0))
+        log.info("using speculative plan for room being {} (planning time {}, reduced to {})", match.outcome,
+            time_taken, duration)
+        return plan, duration
+
+    def close(self):
+        for speculation in self.speculations:
+            speculation.discard()
+        self.speculations = []
+        self.pool.shutdown()
+
+
+def deviating_outcomes(unknown, assumed_values):
+    """The possible outcomes of observing a room with the unknown values that are not what is assumed, as the
+    outcome's name and the room's unknown values with the actual values of that outcome."""
+    dirtiness = unknown_value_getter(unknown["dirtiness"], "dirtiness", assumed_values) \
+        if "dirtiness" in unknown else None
+    outcomes = (
+        ("dirty", {"dirty": True, "extra-dirty": False, "cleaned": False, "dirtiness": dirtiness}),
+        ("extra-dirty", {"dirty": False, "extra-dirty": True, "cleaned": False, "dirtiness": dirtiness}),
+        ("clean", {"dirty": False, "extra-dirty": False, "cleaned": True, "dirtiness": Decimal(0)}),
+    )
+    for name, values in outcomes:
+        outcome_unknown = {key: dict(value, actual=values.get(key, value["actual"])) for key, value in unknown.items()}
+        if Observe._check_new_knowledge(outcome_unknown, assumed_values):
+            yield name, outcome_unknown
+
+
+def encode(model):
+    out = StringIO()
+    encode_problem(out, model)
+    return out.getvalue()
@@ -0,0 +1,238 @@
+#! /usr/bin/env python3
+
+import argparse
+
+from bisect import bisect_right
+from collections import namedtuple, defaultdict
+from decimal import Decimal
+from operator import attrgetter
+
+import simplejson
+
+from action import Plan, Move, Clean, ExtraClean, Stalled
+from execution_trace import read_trace
+from logger import read_json_lines
+
+# colours of each type of action in the visualiser, partially executed actions are drawn in a lighter shade
+colours = {
+    "Move": "#8B0000",
+    "Clean": "#FFA500",
+    "ExtraClean": "#006400",
+    "Plan": "#0000FF",
+    "Other": "#000000",
+    "Partial Clean": "#ffc04d",
+    "Partial ExtraClean": "#4d934d",
+    "Partial Move": "#ae4d4d",
+    "Partial Plan": "#8282ff",
+    "Stalled": "#FF0000",
+}
+
+
+class AgentTotals(namedtuple("AgentTotals", "busy stalled idle")):
+    pass
+
+
+class Timeline:
+    """Index of executed actions for answering overlap queries between plan actions and real actions.
+
+    Plan actions are kept sorted by end time, and real actions by start time and by end time, so each query is a sweep
+    or a binary search rather than a scan of every executed action.
+    """
+
+    real_action_types = (Move, Clean, ExtraClean)
+
+    def __init__(self, executed):
+        self.plan_actions = []
+        self.real_actions = []
+        for action in executed:
+            if type(action) is Plan:
+                self.plan_actions.append(action)
+            elif type(action) in self.real_action_types:
+                self.real_actions.append(action)
+        self.plan_actions.sort(key=attrgetter("end_time"))
+        self._plan_end_times = [p.end_time for p in self.plan_actions]
+        self._real_by_start = sorted(self.real_actions, key=attrgetter("start_time"))
+        self._real_end_times = sorted(a.end_time for a in self.real_actions)
+
+    def time_waiting_for_actions_to_finish(self):
+        """Sum over plans of how long the longest action executing when the plan finished continued executing."""
+        total_time = 0
+        i = 0
+        max_end_time = None
+        for plan_end_time in self._plan_end_times:
+            # any action that started before the plan finished and ends with or after it overlaps its end
+            while i < len(self._real_by_start) and self._real_by_start[i].start_time < plan_end_time:
+                end_time = self._real_by_start[i].end_time
+                if max_end_time is None or end_time > max_end_time:
+                    max_end_time = end_time
+                i += 1
+            if max_end_time is not None and max_end_time >= plan_end_time:
+                total_time += max_end_time - plan_end_time
+        return total_time
+
+    def time_waiting_for_planner_to_finish(self):
+        """Sum over plans of the time between the last action finishing and the plan finishing."""
+        total_time = 0
+        for plan in self.plan_actions:
+            i = bisect_right(self._real_end_times, plan.end_time)
+            if i == 0:
+                total_time += plan.duration
+            else:
+                total_time += plan.end_time - self._real_end_times[i - 1]
+        return total_time
+
+    def stalled_actions(self, stalled):
+        """Create Stalled actions lasting from when each agent stalled until the next plan was received.
+
+        Raises ValueError if no plan finished after an agent stalled.
+        """
+        actions = []
+        for agent, time in stalled:
+            i = bisect_right(self._plan_end_times, time)
+            if i == len(self._plan_end_times):
+                raise ValueError("no plan finished after {} stalled at {}".format(agent, time))
+            actions.append(Stalled(time, self._plan_end_times[i] - time, agent))
+        return actions
+
+    def agent_totals(self, start_time, end_time, stalled_actions=()):
+        """Total time each agent (including the planner) spent busy, stalled and idle between start and end time."""
+        busy = defaultdict(int)
+        stalled = defaultdict(int)
+        for action in self.real_actions + self.plan_actions:
+            for agent in action.agents():
+                busy[agent] += action.duration
+        for action in stalled_actions:
+            stalled[action.agent] += action.duration
+        total_time = end_time - start_time
+        return {
+            agent: AgentTotals(busy[agent], stalled[agent], max(total_time - busy[agent] - stalled[agent], 0))
+            for agent in set(busy) | set(stalled)
+        }
+
+
+def action_records(executed):
+    """Type name and attributes of each executed action, whether given as actions or as decoded JSON records."""
+    for action in executed:
+        if isinstance(action, dict):
+            attrs = dict(action)
+            yield attrs.pop("type"), attrs
+        else:
+            yield type(action).__name__, {attr: getattr(action, attr) for attr in action._format_attrs
+                if hasattr(action, attr)}
+
+
+def record_agents(attrs):
+    if "agent" in attrs:
+        return [attrs["agent"]]
+    return [attrs["agent0"], attrs["agent1"]]
+
+
+def record_label(type_name, attrs):
+    if type_name == "Move":
+        label = "Move " + attrs["end_node"]
+    elif type_name in ("Clean", "ExtraClean"):
+        label = type_name + " " + attrs["room"]
+    else:
+        label = type_name
+    return "Partial " + label if attrs.get("partial") else label
+
+
+def export_columns(executed):
+    """Convert executed actions to a compact columnar timeline for the visualiser.
+
+    There is one row per agent of each action (so an ExtraClean has two rows). Rows are sorted by lane (the planner
+    first, then agents by name) and then by start time. Strings are stored once, in the `types', `labels' and `lanes'
+    tables, and rows refer to them by index. Each lane records its range of rows and the duration of its longest
+    action, so the rows overlapping any time window can be found by binary search on start time.
+    """
+    rows = []
+    for type_name, attrs in action_records(executed):
+        start_time = float(attrs["start_time"])
+        end_time = start_time + float(attrs.get("duration", 0))
+        for agent in record_agents(attrs):
+            rows.append((agent, start_time, end_time, type_name, record_label(type_name, attrs),
+                bool(attrs.get("partial"))))
+    lanes = sorted({row[0] for row in rows}, key=lambda agent: (agent != Plan.agent, agent))
+    lane_ids = {agent: i for i, agent in enumerate(lanes)}
+    rows.sort(key=lambda row: (lane_ids[row[0]], row[1], row[2]))
+
+    types, type_ids = [], {}
+    labels, label_ids = [], {}
+    columns = {"lane": [], "start": [], "end": [], "type": [], "label": [], "partial": []}
+    lane_info = [{"name": agent, "first": None, "last": None, "max_duration": 0.} for agent in lanes]
+    for i, (agent, start_time, end_time, type_name, label, partial) in enumerate(rows):
+        lane = lane_info[lane_ids[agent]]
+        if lane["first"] is None:
+            lane["first"] = i
+        lane["last"] = i + 1
+        lane["max_duration"] = max(lane["max_duration"], end_time - start_time)
+        columns["lane"].append(lane_ids[agent])
+        columns["start"].append(start_time)
+        columns["end"].append(end_time)
+        columns["type"].append(type_ids.setdefault(type_name, len(type_ids)))
+        if type_ids[type_name] == len(types):
+            types.append(type_name)
+        columns["label"].append(label_ids.setdefault(label, len(label_ids)))
+        if label_ids[label] == len(labels):
+            labels.append(label)
+        columns["partial"].append(int(partial))
+
+    return dict(
+        version=1,
+        lanes=lane_info,
+        types=types,
+        labels=labels,
+        colours={type_name: colours.get(type_name, colours["Other"]) for type_name in
+            types + ["Partial " + type_name for type_name in types]},
+        start_time=min(columns["start"], default=0.),
+        end_time=max(columns["end"], default=0.),
+        columns=columns,
+    )
+
+
+class _ActionRecord:
+    """Creates records of actions from the repr of actions in a log."""
+
+    def __init__(self, type_name):
+        self.type_name = type_name
+
+    def __call__(self, **attrs):
+        return dict(attrs, type=self.type_name)
+
+
+class _ActionRecords(dict):
+
+    def __missing__(self, key):
+        return _ActionRecord(key)
+
+
+def read_execution(filename, record=-1):
+    """Read the executed actions of a run from a repr log, a JSON Lines log (`record' selects the run) or an execution
+    trace (any other file)."""
+    if filename.endswith(".jsonl"):
+        return list(read_json_lines([filename]))[record]["execution"]
+    elif filename.endswith(".log"):
+        with open(filename) as fh:
+            log = eval(fh.read(), {}, _ActionRecords(Decimal=Decimal))
+        execution = log["execution"]
+        if isinstance(execution, str):
+            # the execution was streamed to a trace file
+            return list(read_trace(execution))
+        return execution
+    return list(read_trace(filename))
+
+
+def parser():
+    p = argparse.ArgumentParser(description="Exports the timeline of a run for the visualiser")
+    p.add_argument("input", help="a repr or JSON Lines log, or an execution trace")
+    p.add_argument("--output", "-o", help="defaults to the input file with the extension .timeline.json")
+    p.add_argument("--record", type=int, default=-1, help="the run to export from a JSON Lines log")
+    return p
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+    output = args.output or args.input.rsplit(".", 1)[0] + ".timeline.json"
+    with open(output, "w") as f:
+        simplejson.dump(export_columns(read_execution(args.input, args.record)), f, separators=(",", ":"))
+    print(output)
@@ -0,0 +1,36 @@
+"""Agents part way along an edge.
+
+When a move is partially applied, the agent is left in transit: `model["in-transit"]' maps the name of its
+position (`temp-<agent>-<start node>-<end node>', as seen by the planner) to the edge it is on and how far along
+the edge it is (its offset from the start node). Agents can only move out of these positions, to either end of the
+edge. The graph itself is never changed, so it can be shared between copies of a model. Encoders see an in-transit
+position as a node with an edge to each end of its edge.
+"""
+
+from copy import deepcopy
+
+TEMP_PREFIX = "temp"
+
+
+def is_temp_node(name):
+    return name.startswith(TEMP_PREFIX)
+
+
+def temp_node_name(agent, start_node, end_node):
+    return "-".join((TEMP_PREFIX, agent, start_node, end_node))
+
+
+def transit_edges(in_transit):
+    """The edges out of each in-transit position, as [position, node, length]."""
+    edges = []
+    for name, transit in in_transit.items():
+        start_node, end_node, length = transit["edge"]
+        edges.append([name, start_node, transit["offset"]])
+        edges.append([name, end_node, length - transit["offset"]])
+    return edges
+
+
+def copy_model(model):
+    """A deep copy of model that shares its graph, which is not changed by applying actions."""
+    memo = {id(model["graph"]): model["graph"]} if "graph" in model else {}
+    return deepcopy(model, memo)
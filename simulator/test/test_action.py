@@ -10,13 +10,15 @@ import random
 
 import action
 from action_state import ExecutionState
-from accuracy import as_start_time, as_end_time
+from accuracy import as_end_time
+from transit import transit_edges
 
 
+from copy import deepcopy
 from decimal import Decimal
 
 from util.builder import ModelBuilder
-from util.matchers import has_agent, has_edge, has_node
+from util.matchers import has_agent, has_node
 
 
 ZERO = Decimal("0")
@@ -99,16 +101,16 @@ class MoveTest(unittest.TestCase):
 
     def test_apply_when_moving_from_temp_node(self):
         object.__setattr__(self.move, "start_node", "temp_start_node")
-        distance = 1
         model = ModelBuilder().with_agent("agent", at="temp_start_node") \
-            .with_edge("temp_start_node", "end_node").with_edge("end_node", "other_node", distance=distance).model
+            .with_edge("start_node", "end_node", distance=Decimal(3)) \
+            .with_in_transit("temp_start_node", "agent", "start_node", "end_node", Decimal(3), Decimal(1)).model
+        edges = deepcopy(model["graph"]["edges"])
 
         self.move.apply(model)
 
         assert_that(model, has_agent("agent").at("end_node"))
-        assert_that(model, has_agent("agent").at("end_node"))
-        assert_that(model["nodes"], is_not(has_item("temp_start_node")))
-        assert_that(model["graph"]["edges"], is_not(has_item(["temp_start_node", "end_node", distance])))
+        assert_that(model["in-transit"], is_not(has_item("temp_start_node")))
+        assert_that(model["graph"]["edges"], equal_to(edges))
 
     def test_create_temp_node_creates_partial_action(self):
         deadline = Decimal("1.6")
@@ -125,22 +127,33 @@ class MoveTest(unittest.TestCase):
         deadline = Decimal("1.6")
         model = ModelBuilder().with_agent("agent", at="start_node")\
             .with_edge("start_node", "end_node", distance=self.move.duration).model
+        edges = deepcopy(model["graph"]["edges"])
         temp_node = "temp-agent-start_node-end_node"
 
         self.move.create_temp_node(model, deadline)
 
         assert_that(model, has_agent("agent").at(temp_node))
-        assert_that(model, has_edge().with_distance(deadline - self.move.start_time)
-            .from_(temp_node).to(self.move.start_node))
-        assert_that(model, has_edge().with_distance(as_start_time(self.move.end_time) - deadline)
-            .from_(temp_node).to(self.move.end_node))
+        assert_that(model["in-transit"][temp_node], equal_to({"agent": "agent",
+            "edge": ["start_node", "end_node", self.move.duration], "offset": deadline - self.move.start_time}))
+        assert_that(model["nodes"], is_not(has_item(temp_node)))
+        assert_that(model["graph"]["edges"], equal_to(edges))
+
+    def test_create_temp_node_on_reverse_of_bidirectional_edge(self):
+        deadline = Decimal("1.6")
+        model = ModelBuilder().with_agent("agent", at="start_node") \
+            .with_edge("end_node", "start_node", distance=self.move.duration).model
+        model["graph"]["bidirectional"] = True
+
+        self.move.create_temp_node(model, deadline)
+
+        assert_that(model["in-transit"]["temp-agent-start_node-end_node"]["edge"],
+            equal_to(["start_node", "end_node", self.move.duration]))
 
     def test_modify_temp_node_creates_partial_move(self):
         object.__setattr__(self.move, "start_node", "temp_node")
         deadline = Decimal("1.6")
         model = ModelBuilder().with_agent("agent", at="temp_node") \
-            .with_edge("temp_node", "start_node", Decimal(12)) \
-            .with_edge("temp_node", "end_node", Decimal(15)).model
+            .with_in_transit("temp_node", "agent", "start_node", "end_node", Decimal(27), Decimal(12)).model
 
         expected = action.Move(self.move.start_time, Decimal("0.6"), "agent",
             "temp_node", "end_node", True)
@@ -155,15 +168,16 @@ class MoveTest(unittest.TestCase):
         to_start = Decimal(12)
         to_end = Decimal(15)
         model = ModelBuilder().with_agent("agent", at="temp_node") \
-            .with_edge("temp_node", "start_node", to_start) \
-            .with_edge("temp_node", "end_node", to_end).model
+            .with_in_transit("temp_node", "agent", "start_node", "end_node", to_start + to_end, to_start).model
 
         self.move.modify_temp_node(model, deadline)
 
         movement = deadline - self.move.start_time
         assert_that(model, has_agent("agent").at("temp_node"))
-        assert_that(model, has_edge().with_distance(to_start + movement).from_("temp_node").to("start_node"))
-        assert_that(model, has_edge().with_distance(to_end - movement).from_("temp_node").to("end_node"))
+        assert_that(transit_edges(model["in-transit"]), equal_to([
+            ["temp_node", "start_node", to_start + movement],
+            ["temp_node", "end_node", to_end - movement],
+        ]))
 
     def test_modify_temp_node_applies_partial_move_backward(self):
         object.__setattr__(self.move, "start_node", "temp_node")
@@ -172,15 +186,16 @@ class MoveTest(unittest.TestCase):
         to_start = Decimal(12)
         to_end = Decimal(15)
         model = ModelBuilder().with_agent("agent", at="temp_node") \
-            .with_edge("temp_node", "start_node", to_start) \
-            .with_edge("temp_node", "end_node", to_end).model
+            .with_in_transit("temp_node", "agent", "start_node", "end_node", to_start + to_end, to_start).model
 
         self.move.modify_temp_node(model, deadline)
 
         movement = deadline - self.move.start_time
         assert_that(model, has_agent("agent").at("temp_node"))
-        assert_that(model, has_edge().with_distance(to_start - movement).from_("temp_node").to("start_node"))
-        assert_that(model, has_edge().with_distance(to_end + movement).from_("temp_node").to("end_node"))
+        assert_that(transit_edges(model["in-transit"]), equal_to([
+            ["temp_node", "start_node", to_start - movement],
+            ["temp_node", "end_node", to_end + movement],
+        ]))
 
     @patch("action.Move.create_temp_node")
     @patch("action.Move.is_applicable", new=Mock(return_value=True))
@@ -0,0 +1,76 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains
+
+from decimal import Decimal
+
+from action import Move, Clean, ExtraClean
+from batch_simulator import BatchSimulator
+from problem_creator import create_room, ActualMinMax
+
+
+class TestBatchSimulator(unittest.TestCase):
+
+    def setUp(self):
+        dirtiness = ActualMinMax(10, 5, 20)
+        self.model = {
+            "agents": {
+                "agent0": {"agent": True, "available": True, "at": [True, "n0"]},
+                "agent1": {"agent": True, "available": True, "at": [True, "n0"]},
+            },
+            "nodes": {
+                "n0": {"node": True},
+                "rm1": create_room(dirtiness, extra_dirty=False),
+                "rm2": create_room(dirtiness, extra_dirty=True),
+            },
+            "graph": {"bidirectional": False, "edges": [["n0", "rm1", 10], ["rm1", "rm2", 10]]},
+            "goal": {"hard-goals": [["cleaned", "rm1"], ["cleaned", "rm2"]]},
+        }
+        self.plan = [
+            Move(Decimal(0), Decimal(10), "agent0", "n0", "rm1"),
+            Move(Decimal(0), Decimal(10), "agent1", "n0", "rm1"),
+            Clean(Decimal(10), Decimal(10), "agent0", "rm1"),
+            Move(Decimal(10), Decimal(10), "agent1", "rm1", "rm2"),
+            Move(Decimal(20), Decimal(10), "agent0", "rm1", "rm2"),
+            ExtraClean(Decimal(30), Decimal(10), "agent0", "agent1", "rm2"),
+        ]
+
+    def test_plan_succeeds_for_expected_variant(self):
+        simulator = BatchSimulator(self.model, [[10, 10]], [[False, True]])
+
+        actual = simulator.run(self.plan)
+
+        assert_that(list(actual.goal_achieved), contains(True))
+        assert_that(list(actual.goal_time), contains(39.5))
+        assert_that(actual.stalled.any(), equal_to(False))
+
+    def test_agents_stall_when_room_not_as_expected(self):
+        simulator = BatchSimulator(self.model, [[10, 10], [10, 10]], [[False, True], [True, False]])
+
+        actual = simulator.run(self.plan)
+
+        assert_that(list(actual.goal_achieved), contains(True, False))
+        assert_that(list(actual.stalled[1]), contains(True, False))
+        assert_that(actual.stall_time[1][0], equal_to(10.))
+
+    def test_room_with_no_dirtiness_is_already_clean(self):
+        simulator = BatchSimulator(self.model, [[0, 10]], [[False, True]])
+
+        actual = simulator.run(self.plan)
+
+        assert_that(list(actual.goal_achieved), contains(False))
+        assert_that(list(actual.cleaned[0]), contains(True, False))
+        assert_that(list(actual.stalled[0]), contains(True, False))
+
+    def test_from_samples_is_deterministic(self):
+        first = BatchSimulator.from_samples(self.model, 100, seed=1)
+        second = BatchSimulator.from_samples(self.model, 100, seed=1)
+
+        assert_that(first.dirtiness.tolist(), equal_to(second.dirtiness.tolist()))
+        assert_that(first.extra_dirty.tolist(), equal_to(second.extra_dirty.tolist()))
+        assert_that(first.extra_dirty.sum(axis=1).tolist(), equal_to([1] * 100))
+        assert_that(((first.dirtiness >= 5) & (first.dirtiness <= 20)).all(), equal_to(True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to, contains, is_not, has_key
+
+from decimal import Decimal
+
+from action import Move, Clean, ExtraClean
+from benchmark import GreedyPlanner, run_once, benchmark, format_results
+from problem_creator import create_room, ActualMinMax
+
+
+class TestGreedyPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.model = {
+            "agents": {
+                "agent0": {"agent": True, "available": True, "at": [True, "n0"]},
+                "agent1": {"agent": True, "available": True, "at": [True, "n0"]},
+            },
+            "nodes": {
+                "n0": {"node": True},
+                "rm1": create_room(ActualMinMax(10, 5, 20), extra_dirty=False),
+                "rm2": create_room(ActualMinMax(5, 5, 20), extra_dirty=True),
+            },
+            "graph": {"bidirectional": True, "edges": [["n0", "rm1", 10], ["rm1", "rm2", 10]]},
+            "goal": {"hard-goals": [["cleaned", "rm1"], ["cleaned", "rm2"]]},
+            "assumed-values": {"cleaned": False, "dirty": True, "dirtiness": "max", "extra-dirty": False},
+        }
+
+    def test_plan_for_known_rooms(self):
+        for room in ("rm1", "rm2"):
+            node = self.model["nodes"][room]
+            node["known"].update((key, value["actual"]) for key, value in node["unknown"].items())
+            node["unknown"].clear()
+
+        actual = GreedyPlanner(Decimal(1)).get_plan(self.model)
+
+        assert_that(actual, contains(
+            Move(Decimal(0), 10, "agent0", "n0", "rm1"),
+            Clean(Decimal(10), 10, "agent0", "rm1"),
+            Move(Decimal(0), 10, "agent1", "n0", "rm1"),
+            Move(Decimal(10), 10, "agent1", "rm1", "rm2"),
+            Move(Decimal(20), 10, "agent0", "rm1", "rm2"),
+            ExtraClean(Decimal(30), 5, "agent1", "agent0", "rm2"),
+        ))
+
+    def test_run_achieves_goal(self):
+        for executor in ("GreedyPlanHeuristicExecutor", "PartialExecutionOnObservationExecutor"):
+            with self.subTest(executor=executor):
+                actual = run_once(self.model, executor, Decimal(1))
+
+                assert_that(actual["goal_achieved"], equal_to(True))
+                assert_that(actual["planner_called"] > 1, equal_to(True))
+                assert_that(actual["events"] > 0, equal_to(True))
+
+
+class TestBenchmark(unittest.TestCase):
+
+    @patch("benchmark.problem_parser.decode")
+    @patch("benchmark.run_once")
+    def test_run_not_achieving_goal_is_failure(self, run_once_, decode):
+        run_once_.return_value = {"goal_achieved": False, "wall_time": 0.5, "events": 10, "events_per_second": 20.,
+            "planner_called": 3, "end_simulation_time": Decimal(100)}
+
+        actual = benchmark("problem.json", "FinishActionsExecutor", Decimal(1), 1, measure_memory=False)
+
+        assert_that(actual, is_not(has_key("wall_time")))
+        assert_that(actual["error"], equal_to("goal not achieved (simulation ended at 100 after 3 plans)"))
+        assert_that(format_results([actual]).splitlines()[1].split(), contains(
+            "FinishActionsExecutor", "problem.json", "error:", "goal", "not", "achieved", "(simulation", "ended", "at",
+            "100", "after", "3", "plans)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, equal_to, contains, is_
+
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from os.path import join
+
+from action import Move, Plan, PlanUpdate, Observe, Clean
+from action_state import ActionState, ExecutionState
+from checkpoint import Checkpointer, save_checkpoint, load_checkpoint
+from executor import GreedyPlanHeuristicExecutor, HotSwapPlanExecutor
+from new_simulator import ActionResult, Simulator
+from priority_queue import MultiActionQueue, MultiActionStateQueue
+from util.builder import ModelBuilder
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.filename = join(self.temp_dir.name, "checkpoint")
+
+        self.model = ModelBuilder().with_agent("agent", at="n0").with_edge("n0", "n1", Decimal(10)).model
+        self.move = Move(Decimal(0), Decimal(10), "agent", "n0", "n1")
+        self.clean = Clean(Decimal(10), Decimal(5), "agent", "n1")
+        executor = GreedyPlanHeuristicExecutor(Decimal(5), plan=MultiActionQueue([self.clean]),
+            executing={"agent": self.move}, stalled={"other"}, plan_valid=True)
+        action_queue = MultiActionStateQueue([ActionState(self.move).start()])
+        self.simulator = Simulator(self.model, executor, Mock(name="planner"), action_queue=action_queue,
+            time=Decimal(3))
+        self.simulator.executed.append(Plan(Decimal(0), Decimal(3)))
+        self.simulator.stalled.add(("other", Decimal(2)))
+
+    def test_restores_simulator_state(self):
+        planner = Mock(name="new_planner")
+
+        save_checkpoint(self.filename, self.simulator)
+        actual = load_checkpoint(self.filename, planner)
+
+        assert_that(actual.model, equal_to(self.model))
+        assert_that(actual.planner, is_(planner))
+        assert_that(actual.time, equal_to(Decimal(3)))
+        assert_that(actual.executed, contains(Plan(Decimal(0), Decimal(3))))
+        assert_that(actual.stalled, equal_to({("other", Decimal(2))}))
+        action_state = actual.action_queue.get()[0]
+        assert_that(action_state.action, equal_to(self.move))
+        assert_that(action_state.state, equal_to(ExecutionState.executing))
+
+    def test_restores_executor_state(self):
+        save_checkpoint(self.filename, self.simulator)
+        actual = load_checkpoint(self.filename, Mock(name="planner")).executor
+
+        assert_that(type(actual), equal_to(GreedyPlanHeuristicExecutor))
+        assert_that(actual.planning_duration, equal_to(Decimal(5)))
+        assert_that(list(actual.plan.values()), contains(self.clean))
+        assert_that(actual.executing, equal_to({"agent": self.move}))
+        assert_that(actual.stalled, equal_to({"other"}))
+        assert_that(actual.plan_valid, is_(True))
+
+    def test_restores_hot_swap_executor_with_pending_update(self):
+        executor = HotSwapPlanExecutor(Decimal(5))
+        executor.get_plan_request(Decimal(0))
+        plan = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1"), Move(Decimal(5), Decimal(5), "agent", "n1", "n2")]
+        executor.process_result(ActionResult(Plan(Decimal(0), Decimal(2), plan=plan), Decimal(2), plan))
+        update = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1"), Move(Decimal(5), Decimal(3), "agent", "n1", "n3")]
+        update_action = PlanUpdate(Decimal(0), Decimal(6), plan=update)
+        self.simulator.executor = executor
+        self.simulator.action_queue = MultiActionStateQueue([ActionState(update_action).start()])
+
+        save_checkpoint(self.filename, self.simulator)
+        actual = load_checkpoint(self.filename, Mock(name="planner"))
+        actual.executor.process_result(ActionResult(actual.action_queue.get()[0].action, Decimal(6), update))
+
+        assert_that(type(actual.executor), equal_to(HotSwapPlanExecutor))
+        assert_that(actual.executor.plan_start, equal_to(Decimal(0)))
+        assert_that(sorted(map(repr, actual.executor.plan.values())), equal_to(sorted(map(repr, [
+            Observe(Decimal(7), "agent", "n1"),
+            Move(Decimal(7), Decimal(3), "agent", "n1", "n3"),
+            Observe(Decimal(10), "agent", "n3"),
+        ]))))
+
+    def test_restores_partial_actions(self):
+        partial_move = self.move.as_partial(duration=Decimal(5))
+        self.simulator.executed.append(partial_move)
+
+        save_checkpoint(self.filename, self.simulator)
+        actual = load_checkpoint(self.filename, Mock(name="planner"))
+
+        assert_that(actual.executed[-1].partial, is_(True))
+        assert_that(actual.executed[-1].end_time, equal_to(partial_move.end_time))
+
+
+class TestCheckpointer(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Mock(name="simulator", time=Decimal(10))
+
+    def test_saves_checkpoint_when_time_reached(self):
+        checkpointer = Checkpointer("checkpoint-{time}", times=[Decimal(5), Decimal(20)])
+
+        with patch("checkpoint.save_checkpoint") as save:
+            checkpointer.notify(self.simulator, [])
+
+        save.assert_called_once_with("checkpoint-10", self.simulator)
+        assert_that(checkpointer.times, contains(Decimal(20)))
+
+    def test_saves_checkpoint_on_replan(self):
+        checkpointer = Checkpointer("checkpoint", on_replan=True)
+        plan_state = ActionState(Plan(Decimal(0), Decimal(10))).start()
+
+        with patch("checkpoint.save_checkpoint") as save:
+            checkpointer.notify(self.simulator, [plan_state])
+
+        save.assert_called_once_with("checkpoint", self.simulator)
+
+    def test_does_not_save_checkpoint_when_plan_requested(self):
+        checkpointer = Checkpointer("checkpoint", on_replan=True)
+        plan_state = ActionState(Plan(Decimal(0), Decimal(10)))
+
+        with patch("checkpoint.save_checkpoint") as save:
+            checkpointer.notify(self.simulator, [plan_state])
+
+        self.assertEqual(False, save.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, has_length
+
+import os
+import socket
+
+from client import send_message, receive_message
+
+
+class TestClientProtocol(unittest.TestCase):
+
+    def setUp(self):
+        self.client, self.server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(self.client.close)
+        self.addCleanup(self.server.close)
+
+    def test_message_with_file_descriptors(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+
+        send_message(self.client, {"argv": ["problem.json", "-t", "10"], "cwd": "/tmp"}, (write_fd,))
+        message, fds = receive_message(self.server)
+
+        assert_that(message, equal_to({"argv": ["problem.json", "-t", "10"], "cwd": "/tmp"}))
+        assert_that(fds, has_length(1))
+        # the received descriptor is a new descriptor for the same pipe
+        with os.fdopen(fds[0], "w") as fh:
+            fh.write("output")
+        assert_that(os.read(read_fd, 6), equal_to(b"output"))
+
+    def test_long_message(self):
+        argv = ["x" * 10000]
+
+        send_message(self.client, {"argv": argv})
+        message, fds = receive_message(self.server)
+
+        assert_that(message, equal_to({"argv": argv}))
+        assert_that(fds, equal_to([]))
+
+    def test_closed_connection(self):
+        self.client.close()
+
+        assert_that(receive_message(self.server), equal_to((None, [])))
+
+
+if __name__ == "__main__":
+    unittest.main()
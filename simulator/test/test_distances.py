@@ -0,0 +1,87 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains, is_
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import distances
+import problem_parser
+from distances import compute, base_graph, for_model, load, distance_file_name
+
+
+class TestDistances(unittest.TestCase):
+
+    def setUp(self):
+        distances._matrices.clear()
+        self.model = {
+            "nodes": {"n0": {}, "rm1": {}, "rm2": {}, "rm3": {}},
+            "graph": {"bidirectional": False, "edges": [
+                ["n0", "rm1", 10], ["rm1", "n0", 10], ["rm1", "rm2", 10], ["rm2", "rm1", 10],
+                ["n0", "rm3", 5], ["rm3", "n0", 5], ["rm3", "rm2", 30],
+            ]},
+        }
+
+    def test_compute(self):
+        matrix = compute(*base_graph(self.model))
+
+        assert_that(matrix.names, equal_to(["n0", "rm1", "rm2", "rm3"]))
+        assert_that(matrix.distances.tolist(), equal_to([
+            [0, 10, 20, 5],
+            [10, 0, 10, 15],
+            [20, 10, 0, 25],
+            [5, 15, 25, 0],
+        ]))
+        assert_that(matrix.path("rm3", "rm2"), contains("rm3", "n0", "rm1", "rm2"))
+        assert_that(matrix.path("rm2", "rm2"), contains("rm2"))
+
+    def test_bidirectional_and_unreachable(self):
+        self.model["graph"] = {"bidirectional": True, "edges": [["n0", "rm1", 10], ["rm1", "rm2", 10]]}
+
+        matrix = compute(*base_graph(self.model))
+
+        assert_that(matrix.distance("rm2", "n0"), equal_to(20))
+        assert_that(np.isinf(matrix.distance("n0", "rm3")), is_(True))
+        assert_that(matrix.path("n0", "rm3"), equal_to(None))
+
+    def test_temp_nodes(self):
+        self.model["in-transit"] = {"temp-agent0-n0-rm1": {"agent": "agent0", "edge": ["n0", "rm1", 10], "offset": 8}}
+
+        matrix = for_model(self.model)
+
+        assert_that("temp-agent0-n0-rm1" in matrix.names, is_(False))
+        assert_that(matrix.row("temp-agent0-n0-rm1").tolist(), equal_to([8, 2, 12, 13]))
+        assert_that(matrix.path("temp-agent0-n0-rm1", "rm3"), contains("temp-agent0-n0-rm1", "n0", "rm3"))
+        assert_that(matrix.path("temp-agent0-n0-rm1", "rm2"), contains("temp-agent0-n0-rm1", "rm1", "rm2"))
+
+    def test_for_model_shares_matrix_between_models_with_same_graph(self):
+        first = for_model(self.model)
+        self.model["in-transit"] = {"temp-agent0-n0-rm1": {"agent": "agent0", "edge": ["n0", "rm1", 10], "offset": 8}}
+
+        second = for_model(self.model)
+
+        assert_that(second.distances is first.distances, is_(True))
+
+    def test_load_caches_next_to_problem(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        problem_file = os.path.join(directory, "problem.json")
+        problem_parser.encode(problem_file, self.model)
+        model = problem_parser.decode(problem_file)
+
+        computed = load(problem_file, model)
+        distances._matrices.clear()
+        loaded = load(problem_file, model)
+
+        assert_that(os.path.exists(distance_file_name(problem_file)), is_(True))
+        # read from the memory mapped cache
+        assert_that(loaded.distances.flags.writeable, is_(False))
+        assert_that(loaded.distances.tolist(), equal_to(computed.distances.tolist()))
+        assert_that(loaded.next_hops.tolist(), equal_to(computed.next_hops.tolist()))
+
+
+if __name__ == "__main__":
+    unittest.main()
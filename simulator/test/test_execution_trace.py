@@ -0,0 +1,74 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains, is_
+
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from os.path import join
+import pickle
+
+from action import Move, Plan, Clean, ExtraClean, Observe, Stalled
+from execution_trace import ExecutionTrace, format_record, parse_record
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_round_trip(self):
+        actions = [
+            Plan(Decimal(0), Decimal("2.5")),
+            Move(Decimal(0), Decimal(10), "agent", "n0", "n1"),
+            Observe(Decimal(10), "agent", "n1"),
+            Clean(Decimal(10), Decimal(5), "agent", "n1"),
+            ExtraClean(Decimal(10), Decimal(5), "agent0", "agent1", "n1"),
+            Stalled(Decimal(3), Decimal(4), "agent"),
+        ]
+        for action in actions:
+            with self.subTest(action=action):
+                assert_that(parse_record(format_record(action)), equal_to(action))
+
+    def test_round_trip_partial(self):
+        action = Move(Decimal(0), Decimal(10), "agent", "n0", "n1").as_partial(duration=Decimal(4))
+
+        actual = parse_record(format_record(action))
+
+        assert_that(actual.partial, is_(True))
+        assert_that(actual.end_time, equal_to(action.end_time))
+
+
+class TestExecutionTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.filename = join(self.temp_dir.name, "trace")
+        self.actions = [Plan(Decimal(0), Decimal(3)), Move(Decimal(3), Decimal(10), "agent", "n0", "n1"),
+            Clean(Decimal(13), Decimal(5), "agent", "n1")]
+
+    def test_streams_actions_to_file(self):
+        with ExecutionTrace(self.filename, window=1) as trace:
+            trace.extend(self.actions)
+
+            assert_that(list(trace), equal_to(self.actions))
+            assert_that(len(trace), equal_to(3))
+            assert_that(list(trace.recent), contains(self.actions[-1]))
+
+        with open(self.filename) as fh:
+            assert_that(len(fh.readlines()), equal_to(3))
+
+    def test_resumes_from_pickled_state(self):
+        trace = ExecutionTrace(self.filename, window=2)
+        trace.extend(self.actions[:2])
+        state = pickle.dumps(trace)
+        trace.append(self.actions[2])
+        trace.close()
+
+        with pickle.loads(state) as actual:
+            assert_that(len(actual), equal_to(2))
+            assert_that(list(actual), equal_to(self.actions[:2]))
+            actual.append(self.actions[2])
+            assert_that(list(actual), equal_to(self.actions))
+            assert_that(list(actual.recent), equal_to(self.actions[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, is_
+
+from decimal import Decimal
+
+from action import Move, Plan, PlanUpdate, Observe, Clean
+from executor import PartialExecutionOnObservationExecutor, HotSwapPlanExecutor
+from new_simulator import ActionResult, Simulator
+from priority_queue import MultiActionQueue
+
+
+class TestNextWakeUpTime(unittest.TestCase):
+
+    def setUp(self):
+        self.move = Move(Decimal(10), Decimal(5), "agent", "n0", "n1")
+
+    def test_wake_up_immediately_when_plan_needed(self):
+        executor = PartialExecutionOnObservationExecutor(Decimal(5))
+
+        assert_that(executor.next_wake_up_time(), equal_to(Decimal("-Infinity")))
+
+    def test_no_wake_up_when_plan_empty(self):
+        executor = PartialExecutionOnObservationExecutor(Decimal(5), plan_valid=True)
+
+        assert_that(executor.next_wake_up_time(), equal_to(Decimal("Infinity")))
+
+    def test_no_wake_up_when_planning_and_plan_empty(self):
+        executor = PartialExecutionOnObservationExecutor(Decimal(5), executing={Plan.agent: Plan(0, 5)})
+
+        assert_that(executor.next_wake_up_time(), equal_to(Decimal("Infinity")))
+
+    def test_wake_up_at_start_of_next_action(self):
+        executor = PartialExecutionOnObservationExecutor(Decimal(5), plan=MultiActionQueue([self.move]),
+            plan_valid=True)
+
+        assert_that(executor.next_wake_up_time(), equal_to(Decimal(10)))
+
+    def test_no_actions_before_wake_up_time(self):
+        executor = PartialExecutionOnObservationExecutor(Decimal(5), plan=MultiActionQueue([self.move]),
+            plan_valid=True)
+
+        assert_that(executor.next_actions(Decimal(0), Decimal(9)), is_(None))
+        assert_that(executor.next_wake_up_time(), equal_to(Decimal(10)))
+
+    def test_actions_at_wake_up_time(self):
+        executor = PartialExecutionOnObservationExecutor(Decimal(5), plan=MultiActionQueue([self.move]),
+            plan_valid=True)
+
+        actual = executor.next_actions(Decimal(0), executor.next_wake_up_time())
+
+        assert_that(list(actual.actions), equal_to([self.move]))
+        assert_that(executor.next_wake_up_time(), equal_to(Decimal("Infinity")))
+
+
+class TwoPlanPlanner:
+
+    def __init__(self, first, second):
+        self.plans = [(first, Decimal(2)), (second, Decimal(4))]
+
+    def get_plans_and_times(self, model, duration=None):
+        return self.plans
+
+
+class TestHotSwapPlanExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = HotSwapPlanExecutor(Decimal(5))
+        self.executor.get_plan_request(Decimal(0))
+        plan = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1"), Move(Decimal(5), Decimal(5), "agent", "n1", "n2")]
+        self.executor.process_result(ActionResult(Plan(Decimal(0), Decimal(2), plan=plan), Decimal(2), plan))
+
+    def remaining_plan(self):
+        return sorted(map(repr, self.executor.plan.values()))
+
+    def test_swaps_in_plan_consistent_with_started_actions(self):
+        update = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1"), Move(Decimal(5), Decimal(3), "agent", "n1", "n3")]
+
+        self.executor.process_result(ActionResult(PlanUpdate(Decimal(0), Decimal(6), plan=update), Decimal(6), update))
+
+        assert_that(self.remaining_plan(), equal_to(sorted(map(repr, [
+            Observe(Decimal(7), "agent", "n1"),
+            Move(Decimal(7), Decimal(3), "agent", "n1", "n3"),
+            Observe(Decimal(10), "agent", "n3"),
+        ]))))
+
+    def test_swaps_in_successive_plans_when_first_has_nothing_started(self):
+        executor = HotSwapPlanExecutor(Decimal(5))
+        executor.get_plan_request(Decimal(0))
+        plan = [Move(Decimal(10), Decimal(5), "agent", "n0", "n2")]
+        executor.process_result(ActionResult(Plan(Decimal(0), Decimal(2), plan=plan), Decimal(2), plan))
+        first = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1"), Move(Decimal(5), Decimal(5), "agent", "n1", "n3")]
+        second = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1"), Move(Decimal(5), Decimal(3), "agent", "n1", "n4")]
+
+        executor.process_result(ActionResult(PlanUpdate(Decimal(0), Decimal(6), plan=first), Decimal(6), first))
+        executor.next_actions(Decimal(6), Decimal(6))
+        executor.process_result(ActionResult(PlanUpdate(Decimal(0), Decimal(8), plan=second), Decimal(8), second))
+
+        assert_that(sorted(map(repr, executor.plan.values())), equal_to(sorted(map(repr, [
+            Observe(Decimal(11), "agent", "n1"),
+            Move(Decimal(11), Decimal(3), "agent", "n1", "n4"),
+            Observe(Decimal(14), "agent", "n4"),
+        ]))))
+
+    def test_discards_plan_inconsistent_with_started_actions(self):
+        expected = self.remaining_plan()
+        update = [Move(Decimal(0), Decimal(4), "agent", "n0", "n3")]
+
+        self.executor.process_result(ActionResult(PlanUpdate(Decimal(0), Decimal(6), plan=update), Decimal(6), update))
+
+        assert_that(self.remaining_plan(), equal_to(expected))
+
+    def test_discards_update_to_old_plan(self):
+        expected = self.remaining_plan()
+        update = [Move(Decimal(0), Decimal(5), "agent", "n0", "n1")]
+
+        self.executor.process_result(
+            ActionResult(PlanUpdate(Decimal(-5), Decimal(11), plan=update), Decimal(6), update))
+
+        assert_that(self.remaining_plan(), equal_to(expected))
+
+    def test_simulator_executes_update(self):
+        model = {
+            "agents": {"agent0": {"agent": True, "available": True, "at": [True, "n0"]}},
+            "nodes": {"n0": {"node": True}, "rm1": {"known": {"node": True, "is-room": True, "dirty": True,
+                "extra-dirty": False, "cleaned": False, "dirtiness": 10}, "unknown": {}}},
+            "graph": {"bidirectional": True, "edges": [["n0", "rm1", 10]]},
+            "goal": {"hard-goals": [["cleaned", "rm1"]]},
+            "assumed-values": {"cleaned": False, "dirty": True, "dirtiness": "max", "extra-dirty": False},
+        }
+        move = Move(Decimal(0), Decimal(10), "agent0", "n0", "rm1")
+        first = [move, Clean(Decimal(10), Decimal(20), "agent0", "rm1")]
+        second = [move, Clean(Decimal(10), Decimal(10), "agent0", "rm1")]
+        simulator = Simulator(model, HotSwapPlanExecutor(Decimal(5)), TwoPlanPlanner(first, second))
+
+        simulator.run()
+
+        assert_that(simulator.executed[-1], equal_to(Clean(Decimal(12), Decimal(10), "agent0", "rm1")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains, contains_inanyorder, has_length
+
+from decimal import Decimal
+
+from action import Move, Clean, ExtraClean
+from benchmark import GreedyPlanner
+from executor import GreedyPlanHeuristicExecutor
+from heuristic_planner import HeuristicPlanner, HeuristicPlan, get_tasks
+from new_simulator import Simulator
+from problem_creator import create_room, ActualMinMax
+
+
+class TestHeuristicPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.model = {
+            "agents": {
+                "agent0": {"agent": True, "available": True, "at": [True, "n0"]},
+                "agent1": {"agent": True, "available": True, "at": [True, "n0"]},
+            },
+            "nodes": {
+                "n0": {"node": True},
+                "rm1": create_room(ActualMinMax(10, 5, 20), extra_dirty=False),
+                "rm2": create_room(ActualMinMax(5, 5, 20), extra_dirty=True),
+                "rm3": create_room(ActualMinMax(10, 5, 20), extra_dirty=False),
+            },
+            "graph": {"bidirectional": False, "edges": [["n0", "rm1", 10], ["rm1", "n0", 10], ["rm1", "rm2", 10],
+                ["rm2", "rm1", 10], ["n0", "rm3", 5], ["rm3", "n0", 5]]},
+            "goal": {"hard-goals": [["cleaned", "rm1"], ["cleaned", "rm2"], ["cleaned", "rm3"]]},
+            "assumed-values": {"cleaned": False, "dirty": True, "dirtiness": "max", "extra-dirty": False},
+        }
+
+    def make_known(self, *rooms):
+        for room in rooms:
+            node = self.model["nodes"][room]
+            node["known"].update((key, value["actual"]) for key, value in node["unknown"].items())
+            node["unknown"].clear()
+
+    def test_get_tasks_uses_assumed_values(self):
+        self.make_known("rm2")
+        self.model["nodes"]["rm3"]["known"]["cleaned"] = True
+        del self.model["nodes"]["rm3"]["unknown"]["cleaned"]
+
+        actual = get_tasks(self.model)
+
+        assert_that(actual, contains_inanyorder(("rm1", 20, False), ("rm2", 5, True)))
+
+    def test_path_out_of_temp_node(self):
+        self.model["in-transit"] = {"temp-agent0-n0-rm1": {"agent": "agent0", "edge": ["n0", "rm1", 10],
+            "offset": Decimal("5.5")}}
+        plan = HeuristicPlan(self.model, max_improvements=10)
+
+        assert_that(plan.distance("temp-agent0-n0-rm1", "rm2"), equal_to(Decimal("14.5")))
+        assert_that(plan.path("temp-agent0-n0-rm1", "rm3"),
+            contains(("temp-agent0-n0-rm1", "n0", Decimal("5.5")), ("n0", "rm3", 5)))
+
+    def test_plan_for_known_rooms(self):
+        self.make_known("rm1", "rm2", "rm3")
+
+        actual = HeuristicPlanner().get_plan(self.model)
+
+        assert_that(actual, contains(
+            Move(Decimal(0), 5, "agent0", "n0", "rm3"),
+            Move(Decimal(0), 10, "agent1", "n0", "rm1"),
+            Clean(Decimal(5), 10, "agent0", "rm3"),
+            Clean(Decimal(10), 10, "agent1", "rm1"),
+            Move(Decimal(15), 5, "agent0", "rm3", "n0"),
+            Move(Decimal(20), 10, "agent0", "n0", "rm1"),
+            Move(Decimal(20), 10, "agent1", "rm1", "rm2"),
+            Move(Decimal(30), 10, "agent0", "rm1", "rm2"),
+            ExtraClean(Decimal(40), 5, "agent0", "agent1", "rm2"),
+        ))
+
+    def test_improve_moves_rooms_off_agent_finishing_last(self):
+        self.make_known("rm1", "rm2", "rm3")
+        plan = HeuristicPlan(self.model, max_improvements=10)
+        routes = {"agent0": [0, 1, 2], "agent1": [1]}
+
+        actual = plan.improve(routes)
+
+        assert_that(actual["agent1"], has_length(2))
+        assert_that(plan.makespan(actual) < plan.makespan(routes), equal_to(True))
+
+    def test_schedule_rejects_deadlock(self):
+        self.make_known("rm1", "rm2", "rm3")
+        self.model["nodes"]["rm1"]["known"].update({"dirty": False, "extra-dirty": True})
+        plan = HeuristicPlan(self.model, max_improvements=10)
+
+        actual = plan.schedule({"agent0": [0, 1, 2], "agent1": [1, 0]})
+
+        assert_that(actual, equal_to(None))
+
+    def test_no_plan_when_goal_achieved(self):
+        for room in ("rm1", "rm2", "rm3"):
+            self.model["nodes"][room]["known"]["cleaned"] = True
+
+        assert_that(HeuristicPlanner().get_plan(self.model), equal_to([]))
+
+    def test_simulator_uses_heuristic_planner(self):
+        simulator = Simulator(self.model, GreedyPlanHeuristicExecutor(Decimal(1)), GreedyPlanner(Decimal(1)),
+            heuristic_planner=HeuristicPlanner())
+
+        simulator.run()
+
+        assert_that(simulator.is_goal_in_model(), equal_to(True))
+
+
+if __name__ == "__main__":
+    unittest.main()
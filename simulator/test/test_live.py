@@ -0,0 +1,156 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, has_item, is_
+
+import socket
+from decimal import Decimal
+from time import sleep
+
+import simplejson
+
+from action import Move, Plan
+from benchmark import GreedyPlanner
+from executor import GreedyPlanHeuristicExecutor
+from live import LivePublisher, encode_event, handshake_response, text_frame
+from new_simulator import Simulator
+from problem_creator import create_room, ActualMinMax
+
+
+def read_frame(connection):
+    header = _read_exactly(connection, 2)
+    length = header[1] & 0x7f
+    if length == 126:
+        length = int.from_bytes(_read_exactly(connection, 2), "big")
+    elif length == 127:
+        length = int.from_bytes(_read_exactly(connection, 8), "big")
+    return _read_exactly(connection, length).decode("utf-8")
+
+
+def _read_exactly(connection, size):
+    data = b""
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+class RecordingListener:
+
+    def __init__(self):
+        self.events = []
+
+    def notify(self, event, action, time):
+        self.events.append((event, type(action).__name__))
+
+    def close(self):
+        pass
+
+
+class TestLive(unittest.TestCase):
+
+    def test_handshake_response(self):
+        # example from RFC 6455
+        request = "GET /chat HTTP/1.1\r\nHost: server.example.com\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n" \
+            "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n"
+
+        actual = handshake_response(request)
+
+        assert_that("Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in actual, is_(True))
+
+    def test_handshake_response_to_plain_request(self):
+        assert_that(handshake_response("GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"), equal_to(None))
+
+    def test_text_frame_lengths(self):
+        for length, header in ((5, b"\x81\x05"), (300, b"\x81\x7e\x01\x2c"),
+                (70000, b"\x81\x7f" + (70000).to_bytes(8, "big"))):
+            with self.subTest(length=length):
+                assert_that(text_frame("x" * length)[:len(header)], equal_to(header))
+
+    def test_encode_event(self):
+        action = Move(Decimal(10), Decimal(5), "agent0", "n0", "rm1").as_partial(duration=Decimal(2))
+
+        actual = encode_event("finish", action, Decimal("11.5"))
+
+        assert_that(actual, equal_to({"event": "finish", "time": 11.5, "type": "Move", "lanes": ["agent0"],
+            "label": "Partial Move rm1", "start": 10., "end": 12., "partial": True}))
+
+    def test_publishes_batches_and_history(self):
+        with LivePublisher(port=0, batch_interval=0.01) as publisher:
+            publisher.notify("plan", Plan(Decimal(0), Decimal(10)), Decimal(0))
+            publisher.notify("start", Move(Decimal(10), Decimal(5), "agent0", "n0", "rm1"), Decimal(10))
+            connection = socket.create_connection(publisher.address)
+            self.addCleanup(connection.close)
+            connection.sendall(b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n")
+
+            response = b""
+            while not response.endswith(b"\r\n\r\n"):
+                response += connection.recv(1)
+            events = []
+            while len(events) < 2:
+                events.extend(simplejson.loads(read_frame(connection)))
+
+        assert_that(response.startswith(b"HTTP/1.1 101"), is_(True))
+        assert_that([event["event"] for event in events], equal_to(["plan", "start"]))
+
+    def test_replays_recent_history_in_batches(self):
+        with LivePublisher(port=0, batch_interval=0.01, max_batch=2, max_history=3) as publisher:
+            for time in range(5):
+                publisher.notify("plan", Plan(Decimal(time), Decimal(1)), Decimal(time))
+            while not publisher.history or publisher.history[-1]["time"] != 4:
+                sleep(0.01)
+            connection = socket.create_connection(publisher.address)
+            self.addCleanup(connection.close)
+            connection.sendall(b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n")
+
+            response = b""
+            while not response.endswith(b"\r\n\r\n"):
+                response += connection.recv(1)
+            frames = [simplejson.loads(read_frame(connection)) for _ in range(2)]
+
+        assert_that([[event["time"] for event in frame] for frame in frames], equal_to([[2, 3], [4]]))
+
+    def test_idle_client_does_not_block_others(self):
+        with LivePublisher(port=0, batch_interval=0.01, send_timeout=0.1) as publisher:
+            idle = socket.create_connection(publisher.address)
+            self.addCleanup(idle.close)
+            connection = socket.create_connection(publisher.address, timeout=5)
+            self.addCleanup(connection.close)
+            connection.sendall(b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n")
+
+            response = b""
+            while not response.endswith(b"\r\n\r\n"):
+                response += connection.recv(1)
+            publisher.notify("plan", Plan(Decimal(0), Decimal(10)), Decimal(0))
+            events = simplejson.loads(read_frame(connection))
+
+        assert_that([event["event"] for event in events], equal_to(["plan"]))
+        # the idle client was disconnected without completing its handshake
+        assert_that(idle.recv(1), equal_to(b""))
+
+
+class TestSimulatorListener(unittest.TestCase):
+
+    def test_simulator_notifies_listener(self):
+        model = {
+            "agents": {"agent0": {"agent": True, "available": True, "at": [True, "n0"]}},
+            "nodes": {"n0": {"node": True}, "rm1": create_room(ActualMinMax(10, 5, 20), extra_dirty=False)},
+            "graph": {"bidirectional": True, "edges": [["n0", "rm1", 10]]},
+            "goal": {"hard-goals": [["cleaned", "rm1"]]},
+            "assumed-values": {"cleaned": False, "dirty": True, "dirtiness": "max", "extra-dirty": False},
+        }
+        listener = RecordingListener()
+
+        Simulator(model, GreedyPlanHeuristicExecutor(Decimal(1)), GreedyPlanner(Decimal(1)), listener=listener).run()
+
+        assert_that(listener.events[0], equal_to(("plan", "Plan")))
+        assert_that(listener.events, has_item(("start", "Move")))
+        assert_that(listener.events, has_item(("finish", "Clean")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, has_length, contains
+
+from csv import DictReader
+from os import remove, mkdir
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import log_to_csv
+
+log_name = "auto-size(4,4)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id({})" \
+    "-planning_time(10).log"
+
+
+class TestLogToCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.out_file = join(self.temp_dir.name, "results.csv")
+        self.aggregate_file = join(self.temp_dir.name, "results-aggregate.csv")
+        self.log_dir = join(self.temp_dir.name, "logs")
+        mkdir(self.log_dir)
+
+    def write_log(self, id_, end_simulation_time, executor="GreedyPlanHeuristicExecutor"):
+        filename = join(self.log_dir, log_name.format(id_))
+        with open(filename, "w") as f:
+            f.write(repr({
+                "goal_achieved": True, "executor": executor, "planner_called": 2,
+                "end_simulation_time": end_simulation_time, "total_time_planning": 20.,
+                "time_waiting_for_actions_to_finish": 0., "time_waiting_for_planner_to_finish": 5., "execution": [],
+            }))
+        return filename
+
+    def read_csv(self, filename):
+        with open(filename) as f:
+            return list(DictReader(f))
+
+    def run_log_to_csv(self):
+        return log_to_csv.run(self.out_file, [self.log_dir], processes=1)
+
+    def test_run(self):
+        self.write_log(0, 100.)
+        self.write_log(1, 200.)
+
+        self.run_log_to_csv()
+
+        assert_that(self.read_csv(self.out_file), has_length(2))
+        aggregate, = self.read_csv(self.aggregate_file)
+        assert_that(aggregate["count"], equal_to("2"))
+        assert_that(float(aggregate["end_simulation_time"]), equal_to(150.))
+
+    def test_run_with_new_log(self):
+        self.write_log(0, 100.)
+        self.run_log_to_csv()
+        self.write_log(1, 200.)
+        self.write_log(2, 0., executor="PartialExecutionOnObservationExecutor")
+
+        self.run_log_to_csv()
+
+        assert_that([row["id"] for row in self.read_csv(self.out_file)], contains("0", "1", "2"))
+        aggregates = self.read_csv(self.aggregate_file)
+        assert_that([(row["executor"], row["count"]) for row in aggregates],
+            contains(("GreedyPlanHeuristicExecutor", "2"), ("PartialExecutionOnObservationExecutor", "1")))
+
+    def test_run_with_removed_log(self):
+        self.write_log(0, 100.)
+        removed = self.write_log(1, 200.)
+        self.run_log_to_csv()
+        remove(removed)
+
+        self.run_log_to_csv()
+
+        aggregate, = self.read_csv(self.aggregate_file)
+        assert_that(aggregate["count"], equal_to("1"))
+        assert_that(float(aggregate["end_simulation_time"]), equal_to(100.))
+
+    def test_run_without_changes_leaves_outputs(self):
+        self.write_log(0, 100.)
+        self.run_log_to_csv()
+        with open(self.out_file, "w") as f:
+            f.write("unchanged")
+
+        self.run_log_to_csv()
+
+        with open(self.out_file) as f:
+            assert_that(f.read(), equal_to("unchanged"))
+
+    def test_run_with_corrupt_cache(self):
+        self.write_log(0, 100.)
+        with open(self.out_file + ".cache", "w") as f:
+            f.write("corrupt")
+
+        self.run_log_to_csv()
+
+        assert_that(self.read_csv(self.out_file), has_length(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,9 +7,14 @@ Created on 21 Jun 2014
 import unittest
 from unittest.mock import patch, Mock, DEFAULT, call
 
-from logger import Logger
+from logger import Logger, JsonLinesLogger, read_json_lines, StyleAdapter
+from action import Move
 
+from decimal import Decimal
 from io import StringIO
+import logging
+from os.path import join
+from tempfile import TemporaryDirectory
 
 
 # noinspection PyUnresolvedReferences
@@ -169,5 +174,91 @@ class LoggerInitTest(unittest.TestCase):
         self.assertEqual(None, log.plan_log)
 
 
+class JsonLinesLoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.log_file_name = JsonLinesLogger.get_log_file_name("auto-size(4,4)-agents(2)-id(3).json", 10)
+
+    def test_get_log_file_name(self):
+        self.assertEqual("auto-size(4,4)-agents(2)-id(3)-planning_time(10).jsonl", self.log_file_name)
+
+    def test_writes_one_record_per_run(self):
+        move = Move(Decimal(0), Decimal("2.5"), "agent", "n0", "n1")
+        for end_time in (Decimal(10), Decimal(20)):
+            with JsonLinesLogger(self.log_file_name, self.temp_dir.name) as logger:
+                logger.log_property("goal_achieved", True)
+                logger.log_property("end_simulation_time", end_time)
+                logger.log_property("execution", [move], stringify=repr)
+
+        actual = list(read_json_lines([join(self.temp_dir.name, self.log_file_name)]))
+
+        self.assertEqual(2, len(actual))
+        self.assertEqual([Decimal(10), Decimal(20)], [record["end_simulation_time"] for record in actual])
+        self.assertEqual(True, actual[0]["goal_achieved"])
+        self.assertEqual({"type": "Move", "start_time": 0, "duration": Decimal("2.5"), "agent": "agent",
+            "start_node": "n0", "end_node": "n1"}, actual[0]["execution"][0])
+        self.assertEqual("10", actual[0]["parameters"]["planning_time"])
+        self.assertEqual(16, actual[0]["parameters"]["total_nodes"])
+        self.assertEqual("3", actual[0]["parameters"]["id"])
+
+    def test_nothing_written_without_properties(self):
+        with JsonLinesLogger(self.log_file_name, self.temp_dir.name):
+            pass
+
+        self.assertRaises(FileNotFoundError, open, join(self.temp_dir.name, self.log_file_name))
+
+
+class StyleAdapterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = StringIO()
+        self.handler = logging.StreamHandler(self.stream)
+        self.logger = logging.getLogger("test_style_adapter")
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.addCleanup(StyleAdapter.compile_out, logging.NOTSET)
+
+    def test_brace_formatting(self):
+        StyleAdapter(self.logger).info("{} {a}", 1, a=2)
+
+        self.assertEqual("1 2\n", self.stream.getvalue())
+
+    def test_passes_on_log_keyword_arguments(self):
+        StyleAdapter(self.logger).info("{}", 1, extra={"key": "value"})
+
+        self.assertEqual("1\n", self.stream.getvalue())
+
+    def test_compile_out(self):
+        log = StyleAdapter(self.logger)
+
+        StyleAdapter.compile_out(logging.WARNING)
+        log.debug("debug")
+        log.info("info")
+        log.log(logging.INFO, "info")
+        log.warning("warning")
+
+        self.assertEqual("warning\n", self.stream.getvalue())
+        self.assertFalse(log.isEnabledFor(logging.INFO))
+
+    def test_compile_out_by_level_name(self):
+        StyleAdapter.compile_out("INFO")
+
+        StyleAdapter(self.logger).debug("debug")
+        StyleAdapter(self.logger).info("info")
+
+        self.assertEqual("info\n", self.stream.getvalue())
+
+    def test_restore_after_compile_out(self):
+        StyleAdapter.compile_out(logging.WARNING)
+        StyleAdapter.compile_out(logging.NOTSET)
+
+        StyleAdapter(self.logger).debug("debug")
+
+        self.assertEqual("debug\n", self.stream.getvalue())
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
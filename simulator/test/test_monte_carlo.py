@@ -0,0 +1,81 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, greater_than_or_equal_to, less_than_or_equal_to, is_not
+
+from decimal import Decimal
+from random import Random
+
+from monte_carlo import sample_model, summarise, quantile
+from problem_creator import create_room, ActualMinMax
+
+
+class TestSampleModel(unittest.TestCase):
+
+    def setUp(self):
+        dirtiness = ActualMinMax("random", 20, 40)
+        self.model = {
+            "nodes": {
+                "rm{}".format(i): create_room(dirtiness, extra_dirty=(i == 0)) for i in range(10)
+            }
+        }
+        self.model["nodes"]["empty-rm1"] = {"node": True}
+
+    def test_samples_are_deterministic(self):
+        first = sample_model(self.model, Random("0:1"), 1)
+        second = sample_model(self.model, Random("0:1"), 1)
+        assert_that(first, equal_to(second))
+
+    def test_does_not_modify_original_model(self):
+        before = repr(self.model)
+        sample_model(self.model, Random("0:1"), 1)
+        assert_that(repr(self.model), equal_to(before))
+
+    def test_dirtiness_within_range(self):
+        model = sample_model(self.model, Random("0:2"), 3)
+        for name, node in model["nodes"].items():
+            if name.startswith("rm"):
+                dirtiness = node["unknown"]["dirtiness"]["actual"]
+                assert_that(dirtiness, greater_than_or_equal_to(Decimal(20)))
+                assert_that(dirtiness, less_than_or_equal_to(Decimal(40)))
+
+    def test_samples_number_of_extra_dirty_rooms(self):
+        model = sample_model(self.model, Random("0:3"), 3)
+        extra_dirty = [node for node in model["nodes"].values() if "unknown" in node and
+            node["unknown"]["extra-dirty"]["actual"]]
+        dirty = [node for node in model["nodes"].values() if "unknown" in node and
+            node["unknown"]["dirty"]["actual"]]
+        assert_that(len(extra_dirty), equal_to(3))
+        assert_that(len(dirty), equal_to(7))
+
+    def test_different_seeds_give_different_samples(self):
+        first = sample_model(self.model, Random("0:1"), 1)
+        second = sample_model(self.model, Random("0:2"), 1)
+        assert_that(first, is_not(equal_to(second)))
+
+
+class TestSummarise(unittest.TestCase):
+
+    def test_quantile_interpolates(self):
+        assert_that(quantile([0., 10.], 0.5), equal_to(5.))
+        assert_that(quantile([0., 10., 20.], 0.5), equal_to(10.))
+
+    def test_summary_only_includes_successful_samples(self):
+        results = [
+            {"goal_achieved": True, "end_simulation_time": Decimal(10), "planner_called": 1,
+                "total_time_planning": Decimal(1)},
+            {"goal_achieved": True, "end_simulation_time": Decimal(20), "planner_called": 3,
+                "total_time_planning": Decimal(2)},
+            {"goal_achieved": False, "end_simulation_time": Decimal(100), "planner_called": 9,
+                "total_time_planning": Decimal(9)},
+        ]
+
+        actual = summarise(results)
+
+        assert_that(actual["samples"], equal_to(3))
+        assert_that(actual["goal_achieved"], equal_to(2))
+        assert_that(actual["end_simulation_time"]["mean"], equal_to(15.))
+        assert_that(actual["planner_called"]["max"], equal_to(3.))
+
+
+if __name__ == "__main__":
+    unittest.main()
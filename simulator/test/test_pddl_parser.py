@@ -106,5 +106,29 @@ class PddlDecodeTest(unittest.TestCase):
         assert_that(actual_clean, equal_to(expected_clean))
 
 
+class PddlEncodeTest(unittest.TestCase):
+
+    def test_encode_problem_expands_in_transit_agents(self):
+        model = {
+            "domain": "janitor",
+            "agents": {"agent0": {"agent": True, "at": [True, "temp-agent0-n0-n1"]}},
+            "nodes": {"n0": {"node": True}, "n1": {"node": True}},
+            "graph": {"bidirectional": True, "edges": [["n0", "n1", 10]]},
+            "in-transit": {"temp-agent0-n0-n1": {"agent": "agent0", "edge": ["n0", "n1", 10], "offset": 4}},
+            "assumed-values": {},
+            "goal": {"hard-goals": [["at", "agent0", "n1"]]},
+        }
+        out = StringIO()
+
+        pddl_parser.encode_problem(out, model)
+
+        actual = out.getvalue()
+        assert_that("(:objects  agent0 n0 n1 temp-agent0-n0-n1)" in actual, equal_to(True))
+        assert_that("(node temp-agent0-n0-n1 )" in actual, equal_to(True))
+        assert_that("(= (distance temp-agent0-n0-n1 n0 ) 4)" in actual, equal_to(True))
+        assert_that("(= (distance temp-agent0-n0-n1 n1 ) 6)" in actual, equal_to(True))
+        assert_that("(edge n0 temp-agent0-n0-n1 )" in actual, equal_to(False))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
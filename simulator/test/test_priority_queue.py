@@ -0,0 +1,83 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains_inanyorder, empty, less_than_or_equal_to
+
+from copy import copy
+from decimal import Decimal
+
+from action import Move, Plan
+from action_state import ActionState, ExecutionState
+from priority_queue import MultiActionStateQueue
+from requests import AdjustToPartialRequest, RemoveActionsWithStateRequest
+
+
+def move(start_time, duration, agent):
+    return Move(Decimal(start_time), Decimal(duration), agent, "n0", "n1")
+
+
+class TestMultiActionStateQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.short = ActionState(move(0, 5, "agent0")).start()
+        self.long = ActionState(move(0, 20, "agent1")).start()
+        self.later = ActionState(move(10, 5, "agent2"))
+        self.queue = MultiActionStateQueue([self.long, self.later, self.short])
+
+    def test_get_in_time_order(self):
+        assert_that(self.queue.get(), equal_to([self.short]))
+        assert_that(self.queue.get(), equal_to([self.later]))
+        assert_that(self.queue.get(), equal_to([self.long]))
+        assert_that(self.queue.empty(), equal_to(True))
+
+    def test_get_ends_after(self):
+        actual = self.queue.get_ends_after(Decimal(10))
+
+        assert_that(actual, contains_inanyorder(self.long, self.later))
+        assert_that(list(self.queue.values()), equal_to([self.short]))
+        assert_that(self.queue.get(), equal_to([self.short]))
+        assert_that(self.queue.empty(), equal_to(True))
+
+    def test_copy_is_independent(self):
+        copied = copy(self.queue)
+
+        self.queue.get_ends_after(Decimal(0))
+
+        assert_that(list(self.queue.values()), empty())
+        assert_that(list(copied.values()), contains_inanyorder(self.short, self.long, self.later))
+
+    def test_stale_entries_are_discarded(self):
+        for i in range(100):
+            self.queue.put(ActionState(move(i, 50, "agent{}".format(i))))
+            self.queue.get_ends_after(Decimal(30))
+
+        assert_that(len(self.queue.queue.queue), less_than_or_equal_to(2 * 3 + 32))
+
+
+class TestAdjustmentRequests(unittest.TestCase):
+
+    def test_remove_actions_with_state(self):
+        executing = ActionState(move(0, 20, "agent0")).start()
+        pre_start = ActionState(move(15, 5, "agent1"))
+        finishing = ActionState(move(0, 5, "agent2")).start()
+        queue = MultiActionStateQueue([executing, pre_start, finishing])
+
+        actual = RemoveActionsWithStateRequest(Decimal(10), ExecutionState.executing).adjust(queue)
+
+        assert_that([change.agents for change in actual], equal_to([{"agent0"}]))
+        assert_that(list(queue.values()), contains_inanyorder(pre_start, finishing))
+
+    def test_adjust_to_partial(self):
+        plan = ActionState(Plan(Decimal(0), Decimal(20))).start()
+        executing = ActionState(move(0, 20, "agent0")).start()
+        queue = MultiActionStateQueue([plan, executing])
+
+        actual = AdjustToPartialRequest(Decimal(10)).adjust(queue)
+
+        (change,) = actual
+        assert_that(change.action.end_time, equal_to(Decimal("9.5")))
+        assert_that(sorted(action_state.action.end_time for action_state in queue.values()),
+            equal_to([Decimal("9.5"), Decimal("19.5")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains, calling, raises
+
+from decimal import Decimal
+from os import utime, remove
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import problem_catalog
+import problem_parser
+
+
+def create_problem(dirtiness=(Decimal(20), Decimal(30)), extra_dirty=(False, True)):
+    nodes = {"empty-rm1": {"node": True}}
+    for i, (dirt, extra) in enumerate(zip(dirtiness, extra_dirty), 1):
+        nodes["rm{}".format(i)] = {
+            "node": True,
+            "known": {"node": True, "is-room": True},
+            "unknown": {"dirtiness": {"min": 0, "max": 40, "actual": dirt}, "extra-dirty": {"actual": extra}},
+        }
+    return {"nodes": nodes, "agents": {}, "graph": {"edges": [], "bidirectional": False},
+        "goal": {"hard-goals": []}}
+
+
+class TestProblemCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.database = join(self.temp_dir.name, "catalog.sqlite")
+        self.small = self.write_problem("auto-size(2,2)-dirt(random,20,40)-edge(20)-agents(2)-start(centre)"
+            "-extra_dirt(20%)-id(0).json")
+        self.large = self.write_problem("auto-size(4,4)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)"
+            "-extra_dirt(20%)-id(1).json")
+
+    def write_problem(self, name, model=None):
+        filename = join(self.temp_dir.name, name)
+        problem_parser.encode(filename, model or create_problem())
+        return filename
+
+    def test_query_by_parameters(self):
+        problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+
+        assert_that(problem_catalog.query(self.database, agents=3), contains(self.large))
+        assert_that(problem_catalog.query(self.database, "total_nodes < ?", (10,)), contains(self.small))
+        assert_that(problem_catalog.query(self.database, order_by="id"), contains(self.small, self.large))
+
+    def test_query_by_stats(self):
+        problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+
+        actual = problem_catalog.query(self.database, "rooms = 2 AND extra_dirty_rooms = 1 AND total_dirtiness = 50")
+
+        assert_that(actual, contains(self.small, self.large))
+
+    def test_query_unknown_column(self):
+        assert_that(calling(problem_catalog.query).with_args(self.database, rooms_count=2), raises(ValueError))
+
+    def test_build_skips_unchanged_problems(self):
+        problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+
+        assert_that(problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1), equal_to(0))
+
+    def test_build_updates_changed_problems(self):
+        problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+        self.write_problem(self.small, create_problem(dirtiness=(Decimal(40), Decimal(40))))
+        utime(self.small, (0, 0))
+
+        written = problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+
+        assert_that(written, equal_to(1))
+        assert_that(problem_catalog.query(self.database, total_dirtiness=80), contains(self.small))
+
+    def test_build_removes_deleted_problems(self):
+        problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+        remove(self.small)
+
+        problem_catalog.build_catalog(self.database, [self.temp_dir.name], processes=1)
+
+        assert_that(problem_catalog.query(self.database), contains(self.large))
+
+    def test_problem_stats(self):
+        actual = problem_catalog.get_problem_stats(create_problem())
+
+        assert_that(actual, equal_to({"rooms": 2, "extra_dirty_rooms": 1, "total_dirtiness": 50.}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to, has_length
+
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from problem_creator import Point, ActualMinMax, create_problem
+from problem_generator import generate_problem, generate_corpus
+
+
+class TestGenerateProblem(unittest.TestCase):
+
+    def setUp(self):
+        self.size = Point(3, 4)
+        self.dirtiness = ActualMinMax(30, 20, 40)
+        self.start = Point(1, 1)
+        self.extra_dirty_rooms = [Point(0, 0), Point(2, 3)]
+
+    @patch("problem_creator.encode")
+    def test_same_as_problem_creator(self, encode):
+        create_problem("output", self.size, self.dirtiness, False, (self.start,), 20, 2, self.start, "problem",
+            "janitor", self.extra_dirty_rooms)
+        expected = encode.call_args[0][1]
+
+        actual = generate_problem(self.size, self.dirtiness, 20, 2, self.start, np.random.default_rng(0),
+            extra_dirty_rooms=self.extra_dirty_rooms, problem_name="problem")
+
+        assert_that(sorted(actual["graph"]["edges"]), equal_to(sorted(expected["graph"]["edges"])))
+        del actual["graph"]["edges"], expected["graph"]["edges"]
+        assert_that(actual, equal_to(expected))
+
+    def test_samples_extra_dirty_rooms_and_dirtiness(self):
+        dirtiness = ActualMinMax("random", 20, 40)
+
+        actual = generate_problem(Point(10, 10), dirtiness, 20, 3, self.start, np.random.default_rng(1),
+            percentage_extra_dirty=0.2)
+
+        extra_dirty = [name for name in actual["nodes"] if name.startswith("rm-ed")]
+        assert_that(extra_dirty, has_length(20))
+        assert_that(actual["goal"]["hard-goals"], has_length(99))
+        values = [node["unknown"]["dirtiness"]["actual"] for node in actual["nodes"].values() if "unknown" in node]
+        assert_that(all(20 <= value < 40 for value in values), equal_to(True))
+
+    def test_percentage_extra_dirty_is_of_rooms_that_are_not_empty(self):
+        actual = generate_problem(Point(1, 3), self.dirtiness, 20, 1, Point(0, 0), np.random.default_rng(0),
+            percentage_extra_dirty=0.5)
+
+        extra_dirty = [name for name in actual["nodes"] if name.startswith("rm-ed")]
+        assert_that(extra_dirty, has_length(1))
+
+    def test_deterministic_for_seed(self):
+        dirtiness = ActualMinMax("random", 20, 40)
+
+        first, second = (generate_problem(Point(5, 5), dirtiness, 20, 3, self.start, np.random.default_rng(7),
+            percentage_extra_dirty=0.2) for _ in range(2))
+
+        assert_that(first, equal_to(second))
+
+
+class TestGenerateCorpus(unittest.TestCase):
+
+    def test_creates_output_directory(self):
+        with TemporaryDirectory() as temp_dir:
+            directory = os.path.join(temp_dir, "problems", "generated")
+
+            actual = generate_corpus(directory, (Point(3, 3),), (ActualMinMax("random", 20, 40),), (20,), (2,),
+                (0.2,), 2, processes=1)
+
+            assert_that(sorted(os.listdir(directory)), equal_to(sorted(os.path.basename(f) for f in actual)))
+            assert_that(actual, has_length(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
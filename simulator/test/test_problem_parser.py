@@ -33,6 +33,24 @@ class TestProblemParser(unittest.TestCase):
         actual = problem_parser.decode("filename")
 
         assert_that(actual, equal_to(Decimal("0.100")))
+    def test_get_problem_parameters(self):
+        name = "logs/auto-size(4,4)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id(0)" \
+            "-planning_time(10).log"
+
+        actual = problem_parser.get_problem_parameters(name)
+
+        assert_that(actual, equal_to({
+            "size": "4,4", "total_nodes": 16, "dirt_type": "random", "dirt_min": 20., "dirt_max": 40.,
+            "edge": "20", "agents": "3", "start": "centre", "extra_dirt": 0.2, "id": "0", "planning_time": "10",
+            "wait": False,
+        }))
+
+    def test_get_problem_parameters_with_hyphenated_label(self):
+        name = "problems/auto-size(10,10)-dirt(random,0,40)-edge(20)-agents(3)-start(centre)-extra-dirt(20%).json"
+
+        actual = problem_parser.get_problem_parameters(name)
+
+        assert_that(actual["extra_dirt"], equal_to(0.2))
 
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
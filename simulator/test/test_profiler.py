@@ -0,0 +1,75 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, empty, is_, contains_string
+
+from profiler import Profiler
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+    def advance(self, seconds):
+        self.time += seconds
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.profiler = Profiler(clock=self.clock)
+        self.profiler.enabled = True
+
+    def test_disabled_profiler_records_nothing(self):
+        self.profiler.enabled = False
+
+        with self.profiler.phase("phase"):
+            self.clock.advance(1)
+
+        assert_that(self.profiler.calls, is_(empty()))
+
+    def test_records_time_and_calls(self):
+        for _ in range(2):
+            with self.profiler.phase("phase"):
+                self.clock.advance(1.5)
+
+        assert_that(self.profiler.calls["phase"], equal_to(2))
+        assert_that(self.profiler.total_time["phase"], equal_to(3.))
+        assert_that(self.profiler.self_time["phase"], equal_to(3.))
+
+    def test_nested_phase_excluded_from_self_time(self):
+        with self.profiler.phase("outer"):
+            self.clock.advance(1)
+            with self.profiler.phase("inner"):
+                self.clock.advance(2)
+
+        assert_that(self.profiler.total_time["outer"], equal_to(3.))
+        assert_that(self.profiler.self_time["outer"], equal_to(1.))
+        assert_that(self.profiler.total_time["inner"], equal_to(2.))
+
+    def test_reentrant_phase_counted_once(self):
+        @self.profiler.timed("phase")
+        def recurse(depth):
+            self.clock.advance(1)
+            if depth:
+                recurse(depth - 1)
+
+        recurse(2)
+
+        assert_that(self.profiler.calls["phase"], equal_to(1))
+        assert_that(self.profiler.total_time["phase"], equal_to(3.))
+
+    def test_report(self):
+        with self.profiler.phase("phase"):
+            self.clock.advance(2)
+
+        assert_that(self.profiler.report(), contains_string("phase"))
+        assert_that(self.profiler.report(), contains_string("2.000"))
+
+
+if __name__ == "__main__":
+    unittest.main()
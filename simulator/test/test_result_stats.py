@@ -0,0 +1,77 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, close_to, contains
+
+import numpy as np
+
+from result_stats import to_columns, group_by, summarise, paired_differences, t_quantile
+
+
+def run(executor, id_, agents, end_simulation_time):
+    return {"executor": executor, "id": str(id_), "agents": str(agents), "end_simulation_time": end_simulation_time}
+
+
+class TestResultStats(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = to_columns([
+            run("a", 0, 3, 10.), run("a", 1, 3, 20.), run("a", 2, 3, 60.), run("a", 0, 5, 5.),
+            run("b", 0, 3, 12.), run("b", 1, 3, 19.), run("b", 0, 5, float("nan")),
+        ])
+
+    def test_group_by(self):
+        groups = group_by(self.columns, ("executor", "agents"))
+
+        assert_that(groups.keys, contains(("a", "3"), ("a", "5"), ("b", "3"), ("b", "5")))
+        assert_that(groups.ids.tolist(), equal_to([0, 0, 0, 1, 2, 2, 3]))
+
+    def test_group_by_nothing(self):
+        groups = group_by(self.columns, ())
+
+        assert_that(groups.keys, contains(()))
+        assert_that(groups.ids.tolist(), equal_to([0] * 7))
+
+    def test_summarise(self):
+        groups = group_by(self.columns, ("executor", "agents"))
+
+        actual = summarise(self.columns["end_simulation_time"], groups)
+
+        assert_that(actual["count"].tolist(), equal_to([3, 1, 2, 0]))
+        assert_that(actual["mean"][0], close_to(30., 1e-9))
+        assert_that(actual["variance"][0], close_to(700., 1e-9))
+        assert_that(actual["q50"][0], equal_to(20.))
+        assert_that(actual["q25"][0], equal_to(15.))
+        assert_that(actual["ci"][0], close_to(4.302653 * np.sqrt(700. / 3), 1e-5))
+        assert_that(np.isnan(actual["variance"][1]), equal_to(True))
+        assert_that(np.isnan(actual["mean"][3]), equal_to(True))
+
+    def test_summarise_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=1000)
+        columns = to_columns({"group": str(g)} for g in rng.integers(0, 5, 1000))
+        groups = group_by(columns, ("group",))
+
+        actual = summarise(values, groups, quantiles=(0.1, 0.9))
+
+        for i, (group,) in enumerate(groups.keys):
+            expected = values[columns["group"] == group]
+            assert_that(actual["mean"][i], close_to(expected.mean(), 1e-9))
+            assert_that(actual["variance"][i], close_to(expected.var(ddof=1), 1e-9))
+            assert_that(actual["q10"][i], close_to(np.quantile(expected, 0.1), 1e-9))
+            assert_that(actual["q90"][i], close_to(np.quantile(expected, 0.9), 1e-9))
+
+    def test_paired_differences(self):
+        differences, groups = paired_differences(self.columns, "end_simulation_time", "a", by=("agents",))
+
+        assert_that(groups.keys, contains(("3", "b")))
+        assert_that(differences.tolist(), equal_to([2., -1.]))
+
+    def test_t_quantile(self):
+        actual = t_quantile(0.975, [1, 2, 3, 10, 30])
+
+        for value, expected in zip(actual, (12.7062, 4.3027, 3.1824, 2.2281, 2.0423)):
+            assert_that(value, close_to(expected, 5e-3))
+
+
+if __name__ == "__main__":
+    unittest.main()
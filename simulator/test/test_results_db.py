@@ -0,0 +1,91 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains, calling, raises
+
+from decimal import Decimal
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import results_db
+from action import Plan, Move, Clean
+from benchmark import GreedyPlanner
+from executor import GreedyPlanHeuristicExecutor
+from logger import JsonLinesLogger
+from new_simulator import Simulator
+from problem_creator import create_room, ActualMinMax
+
+
+class TestResultsDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.database = join(self.temp_dir.name, "results.sqlite")
+
+    def log_run(self, name, executor, goal_achieved, logger_type=results_db.DatabaseLogger):
+        plan = [Move(Decimal(0), Decimal(10), "agent0", "n0", "rm1"), Clean(Decimal(10), Decimal(20), "agent0", "rm1")]
+        execution = [Plan(Decimal(0), Decimal(5)), plan[0].copy_with(start_time=Decimal(5))]
+        kwargs = {"database": self.database} if logger_type is results_db.DatabaseLogger else {}
+        with logger_type(name, self.temp_dir.name, **kwargs) as logger:
+            logger.log_property("executor", executor)
+            logger.log_plan(plan, Decimal(0), Decimal(5))
+            logger.log_property("goal_achieved", goal_achieved)
+            logger.log_property("end_simulation_time", Decimal(35))
+            logger.log_property("execution", execution)
+            logger.log_property("stalled", {})
+
+    def test_query_runs(self):
+        self.log_run("auto-size(2,2)-dirt(random,20,40)-edge(20)-agents(2)-start(centre)-extra_dirt(20%)-id(0)"
+            "-planning_time(10).log", "FinishActionsExecutor", True)
+        self.log_run("auto-size(4,4)-dirt(random,20,40)-edge(20)-agents(3)-start(centre)-extra_dirt(20%)-id(1)"
+            "-planning_time(30).log", "GreedyPlanHeuristicExecutor", False)
+
+        actual = results_db.query(self.database, "planning_time > ?", (20,),
+            columns=("agents", "total_nodes", "goal_achieved", "end_simulation_time"),
+            executor="GreedyPlanHeuristicExecutor")
+
+        assert_that(actual, contains((3, 16, 0, 35.)))
+        assert_that(results_db.query(self.database, columns=("problem_id", "properties")),
+            contains((0, '{"stalled": {}}'), (1, '{"stalled": {}}')))
+
+    def test_plan_stats(self):
+        self.log_run("auto-size(2,2)-agents(2)-planning_time(10).log", "FinishActionsExecutor", True)
+
+        (run_id,), = results_db.query(self.database, columns=("id",))
+
+        assert_that(results_db.get_plans(self.database, run_id), contains((0, 0., 5., 2, 29.5)))
+
+    def test_plan_stats_from_simulator_without_execution(self):
+        model = {
+            "agents": {"agent0": {"agent": True, "available": True, "at": [True, "n0"]}},
+            "nodes": {"n0": {"node": True}, "rm1": create_room(ActualMinMax(10, 5, 20), extra_dirty=False)},
+            "graph": {"bidirectional": True, "edges": [["n0", "rm1", 10]]},
+            "goal": {"hard-goals": [["cleaned", "rm1"]]},
+            "assumed-values": {"cleaned": False, "dirty": True, "dirtiness": "max", "extra-dirty": False},
+        }
+        with results_db.DatabaseLogger("auto-size(2,2)-agents(1)-planning_time(1).log", self.temp_dir.name,
+                database=self.database) as logger:
+            simulator = Simulator(model, GreedyPlanHeuristicExecutor(Decimal(1)), GreedyPlanner(Decimal(1)),
+                plan_logger=logger)
+            logger.log_property("goal_achieved", simulator.run())
+
+        (run_id,), = results_db.query(self.database, columns=("id",))
+
+        assert_that(results_db.get_plans(self.database, run_id)[0][:3], equal_to((0, 0., 1.)))
+
+    def test_import_json_lines(self):
+        name = "auto-size(2,2)-agents(2)-planning_time(10).jsonl"
+        self.log_run(name, "FinishActionsExecutor", True, logger_type=JsonLinesLogger)
+
+        added = results_db.import_json_lines(self.database, [join(self.temp_dir.name, name)])
+
+        assert_that(added, equal_to(1))
+        assert_that(results_db.query(self.database, columns=("name", "agents", "planning_time", "goal_achieved")),
+            contains(("auto-size(2,2)-agents(2)-planning_time(10)", 2, 10., 1)))
+
+    def test_query_unknown_column(self):
+        assert_that(calling(results_db.query).with_args(self.database, columns=("path",)), raises(ValueError))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, is_, has_properties, has_length, less_than
+
+import os
+import tempfile
+
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from time import sleep, time
+
+from benchmark import GreedyPlanner
+from executor import PartialExecutionOnObservationExecutor
+from action import Move
+from new_simulator import Simulator
+from planner import Planner
+from problem_creator import create_room, ActualMinMax
+from speculation import Speculator, deviating_outcomes
+
+
+def create_model(room):
+    return {
+        "domain": "janitor",
+        "agents": {
+            "agent0": {"agent": True, "available": True, "at": [True, "n0"]},
+            "agent1": {"agent": True, "available": True, "at": [True, "n0"]},
+        },
+        "nodes": {"n0": {"node": True}, "rm1": room},
+        "graph": {"bidirectional": True, "edges": [["n0", "rm1", 10]]},
+        "goal": {"hard-goals": [["cleaned", "rm1"]]},
+        "assumed-values": {"cleaned": False, "dirty": True, "dirtiness": "max", "extra-dirty": False},
+    }
+
+
+class TestDeviatingOutcomes(unittest.TestCase):
+
+    def test_assumed_outcome_is_not_deviating(self):
+        model = create_model(create_room(ActualMinMax(10, 5, 20), extra_dirty=False))
+
+        actual = dict(deviating_outcomes(model["nodes"]["rm1"]["unknown"], model["assumed-values"]))
+
+        assert_that(sorted(actual), equal_to(["clean", "extra-dirty"]))
+        assert_that(actual["extra-dirty"]["dirtiness"]["actual"], equal_to(20))
+        assert_that(actual["clean"]["cleaned"]["actual"], is_(True))
+
+
+class TestSpeculator(unittest.TestCase):
+
+    def test_uses_speculative_plan_for_observed_outcome(self):
+        model = create_model(create_room(ActualMinMax(20, 5, 20), extra_dirty=True))
+        planner = GreedyPlanner(Decimal(5))
+        speculator = Speculator(planner)
+        self.addCleanup(speculator.close)
+        simulator = Simulator(model, PartialExecutionOnObservationExecutor(Decimal(5)), planner,
+            speculator=speculator)
+
+        result = simulator.run()
+
+        assert_that(result, is_(True))
+        # the initial plan, and one for rm1 being extra dirty (the goal is achieved if rm1 is clean)
+        assert_that(planner.calls, equal_to(2))
+        # planned whilst agent0 moved to rm1
+        assert_that(simulator.executed[3], has_properties(start_time=Decimal(15), duration=Decimal(0)))
+
+    def test_plans_as_normal_when_no_speculation_matches(self):
+        speculator = Speculator(GreedyPlanner(Decimal(5)))
+        self.addCleanup(speculator.close)
+        model = create_model(create_room(ActualMinMax(0, 5, 20), extra_dirty=False))
+
+        assert_that(speculator.get_plan(model, Decimal(0)), equal_to(None))
+
+    def test_speculates_once_per_room(self):
+        model = create_model(create_room(ActualMinMax(20, 5, 20), extra_dirty=True))
+        planner = GreedyPlanner(Decimal(5))
+        speculator = Speculator(planner)
+        self.addCleanup(speculator.close)
+        simulator = Simulator(model, PartialExecutionOnObservationExecutor(Decimal(5)), planner,
+            speculator=speculator)
+        move = Move(Decimal(0), Decimal(10), "agent0", "n0", "rm1")
+
+        speculator.notify_move(simulator, move)
+        speculator.notify_move(simulator, move)
+
+        assert_that(speculator.speculations, has_length(1))
+
+
+class TestSpeculatorWithBlockingPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(setattr, tempfile, "tempdir", tempfile.tempdir)
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.slow_planner = Planner(60, self.create_script(directory.name, "slow", "exec sleep 30"),
+            working_directory=directory.name)
+        self.fast_planner = Planner(60, self.create_script(directory.name, "fast",
+            "cat > /dev/null\nprintf '0.000: (move agent0 n0 rm1)  [10.000]\\n\\n'"),
+            working_directory=directory.name)
+
+    @staticmethod
+    def create_script(directory, name, body):
+        path = os.path.join(directory, name)
+        with open(path, "w") as fh:
+            fh.write("#!/bin/sh\n{}\n".format(body))
+        os.chmod(path, 0o755)
+        return path
+
+    def test_discarded_speculation_does_not_hold_up_planner(self):
+        model = create_model(create_room(ActualMinMax(20, 5, 20), extra_dirty=True))
+        speculator = Speculator(self.slow_planner)
+        self.addCleanup(speculator.close)
+        simulator = Simulator(model, PartialExecutionOnObservationExecutor(Decimal(5)), self.slow_planner,
+            speculator=speculator)
+        speculator.notify_move(simulator, Move(Decimal(0), Decimal(10), "agent0", "n0", "rm1"))
+        cancellation = speculator.speculations[0].cancellation
+        deadline = time() + 10
+        while cancellation.process is None and time() < deadline:
+            sleep(0.01)
+        other_model = create_model(create_room(ActualMinMax(20, 5, 20), extra_dirty=True))
+        other_model["graph"]["edges"] = [["n0", "rm1", 20]]
+        start = time()
+
+        speculation = speculator.get_plan(other_model, Decimal(10))
+        plan, time_taken = self.fast_planner.get_plan_and_time_taken(other_model)
+
+        assert_that(speculation, equal_to(None))
+        assert_that(plan, has_length(1))
+        # waiting for the speculative planner to stop is not counted as planning time
+        assert_that(time_taken, less_than(Decimal(5)))
+        assert_that(time() - start, less_than(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
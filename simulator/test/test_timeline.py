@@ -0,0 +1,120 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, contains, calling, raises
+
+from decimal import Decimal
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from action import Plan, Move, Clean, ExtraClean, Observe, Stalled
+from execution_trace import ExecutionTrace
+from logger import JsonLinesLogger
+from timeline import Timeline, AgentTotals, export_columns, read_execution
+
+
+class TestTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.executed = [
+            Plan(Decimal(0), Decimal(10)),
+            Move(Decimal(10), Decimal(15), "agent0", "n0", "rm1"),
+            Move(Decimal(10), Decimal(5), "agent1", "n0", "rm2"),
+            Observe(Decimal(25), "agent0", "rm1"),
+            Plan(Decimal(20), Decimal(10)),
+            Clean(Decimal(25), Decimal(20), "agent0", "rm1"),
+            Plan(Decimal(45), Decimal(3)),
+        ]
+
+    def test_time_waiting_for_actions_to_finish(self):
+        # plan ending at 29.5 waits for clean ending at 44.5, plan ending at 47.5 waits for no action
+        actual = Timeline(self.executed).time_waiting_for_actions_to_finish()
+
+        assert_that(actual, equal_to(Decimal(15)))
+
+    def test_time_waiting_for_planner_to_finish(self):
+        # 10 (no action finished) + (29.5 - 24.5) + (47.5 - 44.5)
+        actual = Timeline(self.executed).time_waiting_for_planner_to_finish()
+
+        assert_that(actual, equal_to(Decimal(18)))
+
+    def test_no_plans(self):
+        timeline = Timeline([Move(Decimal(0), Decimal(5), "agent0", "n0", "rm1")])
+
+        assert_that(timeline.time_waiting_for_actions_to_finish(), equal_to(0))
+        assert_that(timeline.time_waiting_for_planner_to_finish(), equal_to(0))
+
+    def test_stalled_actions_last_until_next_plan(self):
+        actual = Timeline(self.executed).stalled_actions([("agent1", Decimal(15))])
+
+        assert_that(actual, contains(Stalled(Decimal(15), Decimal("14.5"), "agent1")))
+
+    def test_stalled_actions_fail_without_later_plan(self):
+        timeline = Timeline(self.executed)
+
+        assert_that(calling(timeline.stalled_actions).with_args([("agent1", Decimal(48))]), raises(ValueError))
+
+    def test_agent_totals(self):
+        timeline = Timeline(self.executed)
+        stalled = timeline.stalled_actions([("agent1", Decimal(15))])
+
+        actual = timeline.agent_totals(Decimal(0), Decimal(48), stalled)
+
+        assert_that(actual["agent0"], equal_to(AgentTotals(Decimal(35), 0, Decimal(13))))
+        assert_that(actual["agent1"], equal_to(AgentTotals(Decimal(5), Decimal("14.5"), Decimal("28.5"))))
+        assert_that(actual[Plan.agent], equal_to(AgentTotals(Decimal(23), 0, Decimal(25))))
+
+
+class TestExportColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.executed = [
+            Plan(Decimal(0), Decimal(10)),
+            Move(Decimal(10), Decimal(15), "agent1", "n0", "rm1"),
+            Move(Decimal(10), Decimal(5), "agent0", "n0", "rm2").as_partial(duration=Decimal(2)),
+            ExtraClean(Decimal(25), Decimal(20), "agent0", "agent1", "rm1"),
+        ]
+
+    def test_rows_are_sorted_by_lane_and_start_time(self):
+        actual = export_columns(self.executed)
+
+        assert_that([lane["name"] for lane in actual["lanes"]], contains("planner", "agent0", "agent1"))
+        columns = actual["columns"]
+        assert_that(columns["lane"], equal_to([0, 1, 1, 2, 2]))
+        assert_that(columns["start"], equal_to([0., 10., 25., 10., 25.]))
+        assert_that([actual["labels"][i] for i in columns["label"]],
+            contains("Plan", "Partial Move rm2", "ExtraClean rm1", "Move rm1", "ExtraClean rm1"))
+        assert_that(columns["partial"], equal_to([0, 1, 0, 0, 0]))
+
+    def test_lanes(self):
+        actual = export_columns(self.executed)
+
+        agent1 = actual["lanes"][2]
+        assert_that((agent1["first"], agent1["last"], agent1["max_duration"]), equal_to((3, 5, 20.)))
+        assert_that((actual["start_time"], actual["end_time"]), equal_to((0., 45.)))
+
+    def test_colours(self):
+        actual = export_columns(self.executed)
+
+        assert_that(actual["colours"]["Move"], equal_to("#8B0000"))
+        assert_that(actual["colours"]["Partial Move"], equal_to("#ae4d4d"))
+
+    def test_from_logs_and_traces(self):
+        expected = export_columns(self.executed)
+        with TemporaryDirectory() as temp_dir:
+            repr_log = join(temp_dir, "run.log")
+            with open(repr_log, "w") as f:
+                f.write(repr({"goal_achieved": True, "execution": self.executed}))
+            trace_file = join(temp_dir, "run.trace")
+            with ExecutionTrace(trace_file) as trace:
+                trace.extend(self.executed)
+            logger = JsonLinesLogger("run.jsonl", temp_dir, parameters={})
+            logger.log_property("execution", self.executed)
+            logger.close()
+
+            for filename in (repr_log, trace_file, join(temp_dir, "run.jsonl")):
+                with self.subTest(filename=filename):
+                    assert_that(export_columns(read_execution(filename)), equal_to(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
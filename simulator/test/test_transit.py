@@ -0,0 +1,36 @@
+import unittest
+
+from hamcrest import assert_that, equal_to, is_not, same_instance
+
+from transit import copy_model, transit_edges, temp_node_name
+
+
+class TestTransit(unittest.TestCase):
+
+    def setUp(self):
+        self.model = {
+            "agents": {"agent0": {"agent": True, "at": [True, "temp-agent0-n0-n1"]}},
+            "nodes": {"n0": {"node": True}, "n1": {"node": True}},
+            "graph": {"bidirectional": False, "edges": [["n0", "n1", 10], ["n1", "n0", 10]]},
+            "in-transit": {"temp-agent0-n0-n1": {"agent": "agent0", "edge": ["n0", "n1", 10], "offset": 3}},
+        }
+
+    def test_temp_node_name(self):
+        assert_that(temp_node_name("agent0", "n0", "n1"), equal_to("temp-agent0-n0-n1"))
+
+    def test_transit_edges(self):
+        actual = transit_edges(self.model["in-transit"])
+
+        assert_that(actual, equal_to([["temp-agent0-n0-n1", "n0", 3], ["temp-agent0-n0-n1", "n1", 7]]))
+
+    def test_copy_model_shares_graph(self):
+        actual = copy_model(self.model)
+
+        assert_that(actual, equal_to(self.model))
+        assert_that(actual["graph"], same_instance(self.model["graph"]))
+        assert_that(actual["agents"], is_not(same_instance(self.model["agents"])))
+        assert_that(actual["in-transit"], is_not(same_instance(self.model["in-transit"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
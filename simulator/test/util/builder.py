@@ -52,6 +52,11 @@ class ModelBuilder(object):
         self.model["graph"]["edges"].append([from_node, to_node, distance])
         return self
 
+    def with_in_transit(self, name, agent, start_node, end_node, length, offset):
+        in_transit = self.model.setdefault("in-transit", {})
+        in_transit[name] = {"agent": agent, "edge": [start_node, end_node, length], "offset": offset}
+        return self
+
     def with_assumed_values(self, values=None):
         self.model["assumed-values"] = values
         return self
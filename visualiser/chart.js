@@ -1,74 +1,71 @@
-function createChart($, google) {
+var chart_colours = {
+    "Move": "#8B0000",
+    "Clean": "#FFA500",
+    "ExtraClean": "#006400",
+    "Plan": "#0000FF",
+    "Other": "#000000",
+    "Partial Clean": "#ffc04d",
+    "Partial ExtraClean": "#4d934d",
+    "Partial Move": "#ae4d4d",
+    "Partial Plan": "#8282ff",
+    "Stalled": "#FF0000",
+};
+
+var renderer = null;
+
+function createChart($) {
     try {
-        var data = parseData($);
-        var actions = data[0];
-        var colours = data[1];
-        drawChart(actions, colours, google);
+        showTimeline($, parseData($));
     } catch (err) {
         $("#error-log").html(err);
     }
 }
 
-function parseData($) {
-
-    var chart_colours = {
-        "Move": "#8B0000",
-        "Clean": "#FFA500",
-        "ExtraClean": "#006400",
-        "Plan": "#0000FF",
-        "Other": "#000000",
-        "Partial Clean": "#ffc04d",
-        "Partial ExtraClean": "#4d934d",
-        "Partial Move": "#ae4d4d",
-        "Partial Plan": "#8282ff",
+function loadTimelineFile($, file) {
+    // reads a timeline exported by `timeline.py'
+    var reader = new FileReader();
+    reader.onload = function() {
+        try {
+            showTimeline($, JSON.parse(reader.result));
+        } catch (err) {
+            $("#error-log").html(err);
+        }
     };
+    reader.readAsText(file);
+}
+
+function showTimeline($, timeline) {
+    $("#error-log").html("");
+    var canvas = document.getElementById("timeline");
+    if (renderer) {
+        renderer.detach();
+    }
+    renderer = new TimelineRenderer(canvas, toTypedColumns(timeline));
+    renderer.draw();
+}
+
+/* Parses the repr of an execution pasted into the page, and converts it to the columnar format of `timeline.py'. */
+function parseData($) {
 
     var data = $("#input-data").val().trim();
 
     data = data.replace(/[\[\]]/g, "");
     data = data.split(/\), ?|\)/);
-    var actions = [];
-    var partial = [];
+    var rows = [];
 
-    var colours = {};
     for (var index in data) {
         var action = data[index];
         if (action === "") {
             continue;
         }
         var components = action.split(/\(|, ?/);
-        var result = createChartElementData(components, chart_colours, colours);
-        Array.prototype.push.apply(actions, result); // extend actions by result
-    }
-
-    actions.sort(function(x, y) {
-            if (x[0] === y[0]) {
-                return x[2] - y[2];
-            } else if (x[0] === "planner" || y[0] === undefined) {
-                return -1;
-            } else if (x[0] === undefined || y[0] === "planner") {
-                return 1;
-            } else {
-                return x[0].localeCompare(y[0]);
-            }
-        });
-
-    var chartColourList = [];
-    var labels = {};
-
-    for (var i in actions) {
-        var action = actions[i];
-        var label = action[1];
-        if (!labels[label]) {
-            chartColourList.push(colours[label]);
-            labels[label] = true;
-        }
+        Array.prototype.push.apply(rows, createChartElementData(components)); // extend rows by result
     }
 
-    return [actions, chartColourList];
+    return columnsFromRows(rows);
 }
 
-function createChartElementData(components, chart_colours, colours) {
+function createChartElementData(components) {
 
     var dict = {};
     for (var i = 1; i < components.length; i++) {
@@ -80,19 +77,23 @@ function createChartElementData(components, chart_colours, colours) {
 
     var result = [];
     var agents = getAgents(dict);
+    var partial = dict.partial === "True";
+    var start = parseFloat(dict.start_time);
+    var end = start + (dict.duration ? parseFloat(dict.duration) : 0);
     for (var j in agents) {
-        result.push([
-                agents[j],
-                actionLabel(components[0], dict, chart_colours, colours, dict.partial === "True"), // action name
-                secondsToMillis(dict.start_time),
-                secondsToMillis(dict.start_time) + secondsToMillis(dict.duration)
-            ]);
+        result.push({
+            lane: agents[j],
+            type: components[0],
+            label: actionLabel(components[0], dict, partial),
+            start: start,
+            end: end,
+            partial: partial
+        });
     }
     return result;
 }
 
-
-function actionLabel(name, components, chart_colours, colours, partial) {
+function actionLabel(name, components, partial) {
     var label = name;
 
     if (name === "Move") {
@@ -102,56 +103,382 @@ function actionLabel(name, components, chart_colours, colours, partial) {
     }
 
     if (partial) {
-        name = "Partial " + name;
         label = "Partial " + label;
     }
 
-    var colour = chart_colours[name];
-    if (!colour) {
-        colour = chart_colours.Other;
+    return label;
+}
+
+function compareLanes(x, y) {
+    if (x === y) {
+        return 0;
+    } else if (x === "planner") {
+        return -1;
+    } else if (y === "planner") {
+        return 1;
+    } else {
+        return x.localeCompare(y);
     }
-    colours[label] = colour;
+}
 
-    return label;
+function columnsFromRows(rows) {
+    rows.sort(function(x, y) {
+            return compareLanes(x.lane, y.lane) || x.start - y.start || x.end - y.end;
+        });
+    return columnsFromSortedRows(rows);
+}
+
+function columnsFromSortedRows(rows) {
+    var timeline = {
+        lanes: [], types: [], labels: [], colours: {}, start_time: Infinity, end_time: -Infinity,
+        columns: {lane: [], start: [], end: [], type: [], label: [], partial: []}
+    };
+    var typeIds = {};
+    var labelIds = {};
+    for (var i = 0; i < rows.length; i++) {
+        var row = rows[i];
+        var lanes = timeline.lanes;
+        if (lanes.length === 0 || lanes[lanes.length - 1].name !== row.lane) {
+            lanes.push({name: row.lane, first: i, last: i, max_duration: 0});
+        }
+        var lane = lanes[lanes.length - 1];
+        lane.last = i + 1;
+        lane.max_duration = Math.max(lane.max_duration, row.end - row.start);
+        if (!(row.type in typeIds)) {
+            typeIds[row.type] = timeline.types.length;
+            timeline.types.push(row.type);
+            timeline.colours[row.type] = chart_colours[row.type] || chart_colours.Other;
+            timeline.colours["Partial " + row.type] = chart_colours["Partial " + row.type] || chart_colours.Other;
+        }
+        if (!(row.label in labelIds)) {
+            labelIds[row.label] = timeline.labels.length;
+            timeline.labels.push(row.label);
+        }
+        timeline.columns.lane.push(lanes.length - 1);
+        timeline.columns.start.push(row.start);
+        timeline.columns.end.push(row.end);
+        timeline.columns.type.push(typeIds[row.type]);
+        timeline.columns.label.push(labelIds[row.label]);
+        timeline.columns.partial.push(row.partial ? 1 : 0);
+        timeline.start_time = Math.min(timeline.start_time, row.start);
+        timeline.end_time = Math.max(timeline.end_time, row.end);
+    }
+    if (rows.length === 0) {
+        throw "No actions to show";
+    }
+    return timeline;
 }
 
-function drawChart(data, colours, google) {
+/* Builds a timeline from the batches of events published by `live.py' as a run progresses. Events arrive in time
+ * order, so each lane's rows stay sorted by start time as they are appended. */
+function LiveTimeline() {
+    this.lanes = {};
+}
 
-    var container = document.getElementById('example3.1');
-    var chart = new google.visualization.Timeline(container);
+LiveTimeline.prototype.apply = function(events) {
+    for (var i = 0; i < events.length; i++) {
+        var event = events[i];
+        for (var j = 0; j < event.lanes.length; j++) {
+            var lane = event.lanes[j];
+            if (!this.lanes[lane]) {
+                this.lanes[lane] = [];
+            }
+            if (event.event === "finish") {
+                this.finish(this.lanes[lane], event);
+            } else {
+                this.lanes[lane].push({
+                    lane: lane,
+                    type: event.event === "stalled" ? "Stalled" : event.type,
+                    label: event.event === "stalled" ? "Stalled " + event.label : event.label,
+                    start: event.start,
+                    end: event.event === "stalled" ? event.start : event.end,
+                    partial: event.partial,
+                    pending: event.event === "start"
+                });
+            }
+        }
+    }
+};
 
-    var dataTable = new google.visualization.DataTable();
-    dataTable.addColumn({
-            type: 'string',
-            id: 'Position'
-        });
-    dataTable.addColumn({
-            type: 'string',
-            id: 'Name'
-        });
-    dataTable.addColumn({
-            type: 'number',
-            id: 'Start'
-        });
-    dataTable.addColumn({
-            type: 'number',
-            id: 'End'
-        });
-    dataTable.addRows(data);
+LiveTimeline.prototype.finish = function(rows, event) {
+    // an action may finish early (partially executed), so the row started for it is updated rather than added
+    for (var i = rows.length - 1; i >= 0; i--) {
+        var row = rows[i];
+        if (row.pending && row.type === event.type && row.start === event.start) {
+            row.end = event.end;
+            row.label = event.label;
+            row.partial = event.partial;
+            row.pending = false;
+            return;
+        }
+    }
+    rows.push({lane: event.lanes[0], type: event.type, label: event.label, start: event.start, end: event.end,
+        partial: event.partial, pending: false});
+};
 
-    var options = {
-        "colors": colours
+LiveTimeline.prototype.toTimeline = function() {
+    var names = Object.keys(this.lanes).sort(compareLanes);
+    var rows = [];
+    for (var i = 0; i < names.length; i++) {
+        Array.prototype.push.apply(rows, this.lanes[names[i]]);
+    }
+    return columnsFromSortedRows(rows);
+};
+
+function connectLive($, url) {
+    var live = new LiveTimeline();
+    var socket = new WebSocket(url);
+    socket.onopen = function() {
+        $("#error-log").html("connected to " + url);
+    };
+    socket.onmessage = function(message) {
+        live.apply(JSON.parse(message.data));
+        if (renderer && renderer.live === live) {
+            renderer.update(toTypedColumns(live.toTimeline()));
+        } else {
+            showTimeline($, live.toTimeline());
+            renderer.live = live;
+        }
+    };
+    socket.onerror = function() {
+        $("#error-log").html("could not connect to " + url);
+    };
+    socket.onclose = function() {
+        $("#error-log").html("run finished (disconnected from " + url + ")");
     };
+}
 
-    chart.draw(dataTable, options);
+function toTypedColumns(timeline) {
+    var columns = timeline.columns;
+    var typeColours = [];
+    for (var i = 0; i < timeline.types.length; i++) {
+        var type = timeline.types[i];
+        typeColours.push([timeline.colours[type], timeline.colours["Partial " + type]]);
+    }
+    return {
+        lanes: timeline.lanes,
+        labels: timeline.labels,
+        types: timeline.types,
+        typeColours: typeColours,
+        startTime: timeline.start_time,
+        endTime: timeline.end_time,
+        start: Float64Array.from(columns.start),
+        end: Float64Array.from(columns.end),
+        type: Uint16Array.from(columns.type),
+        label: Uint32Array.from(columns.label),
+        partial: Uint8Array.from(columns.partial)
+    };
 }
 
-function secondsToMillis(value) {
-    var seconds = parseFloat(value);
-    var millis = Math.round(seconds * 1000);
-    return millis;
+/* Draws a timeline on a canvas, one lane per agent.
+ *
+ * Only the actions overlapping the visible window are visited: rows of each lane are sorted by start time, so the
+ * first visible row is found by binary search (starting from the visible start less the lane's longest action).
+ * When zoomed out, actions narrower than a pixel are merged, so at most one mark is drawn for each pixel column of a
+ * lane. Scroll to zoom and drag to pan.
+ */
+function TimelineRenderer(canvas, timeline) {
+    this.canvas = canvas;
+    this.context = canvas.getContext("2d");
+    this.timeline = timeline;
+    this.laneHeight = 24;
+    this.labelWidth = 80;
+    this.axisHeight = 20;
+    this.viewStart = timeline.startTime;
+    this.viewEnd = Math.max(timeline.endTime, timeline.startTime + 1);
+    this.pending = false;
+    canvas.height = this.axisHeight + this.laneHeight * timeline.lanes.length;
+
+    var self = this;
+    this.listeners = {
+        wheel: function(event) { self.onWheel(event); },
+        mousedown: function(event) { self.dragX = event.clientX; },
+        mousemove: function(event) { self.onMouseMove(event); },
+        mouseup: function() { self.dragX = null; },
+        mouseleave: function() { self.dragX = null; }
+    };
+    for (var name in this.listeners) {
+        canvas.addEventListener(name, this.listeners[name]);
+    }
 }
 
+TimelineRenderer.prototype.update = function(timeline) {
+    // keep the current view, unless it shows the end of the run, in which case follow the end as the run continues
+    var following = this.viewEnd >= this.timeline.endTime;
+    var span = this.viewEnd - this.viewStart;
+    this.timeline = timeline;
+    this.canvas.height = this.axisHeight + this.laneHeight * timeline.lanes.length;
+    if (following && timeline.endTime > this.viewEnd) {
+        this.viewEnd = timeline.endTime;
+        this.viewStart = Math.max(timeline.startTime, this.viewEnd - span);
+    }
+    this.requestDraw();
+};
+
+TimelineRenderer.prototype.detach = function() {
+    for (var name in this.listeners) {
+        this.canvas.removeEventListener(name, this.listeners[name]);
+    }
+};
+
+TimelineRenderer.prototype.chartWidth = function() {
+    return this.canvas.width - this.labelWidth;
+};
+
+TimelineRenderer.prototype.timeToX = function(time) {
+    return this.labelWidth + (time - this.viewStart) / (this.viewEnd - this.viewStart) * this.chartWidth();
+};
+
+TimelineRenderer.prototype.xToTime = function(x) {
+    return this.viewStart + (x - this.labelWidth) / this.chartWidth() * (this.viewEnd - this.viewStart);
+};
+
+TimelineRenderer.prototype.requestDraw = function() {
+    // coalesce the many events of a scroll or drag into one draw per frame
+    var self = this;
+    if (!this.pending) {
+        this.pending = true;
+        window.requestAnimationFrame(function() {
+            self.pending = false;
+            self.draw();
+        });
+    }
+};
+
+TimelineRenderer.prototype.onWheel = function(event) {
+    event.preventDefault();
+    var time = this.xToTime(event.offsetX);
+    var scale = Math.pow(1.002, event.deltaY);
+    var minimumSpan = 1e-3;
+    var span = Math.max((this.viewEnd - this.viewStart) * scale, minimumSpan);
+    var fraction = (time - this.viewStart) / (this.viewEnd - this.viewStart);
+    this.viewStart = time - fraction * span;
+    this.viewEnd = this.viewStart + span;
+    this.requestDraw();
+};
+
+TimelineRenderer.prototype.onMouseMove = function(event) {
+    if (this.dragX !== null && this.dragX !== undefined) {
+        var shift = (event.clientX - this.dragX) / this.chartWidth() * (this.viewEnd - this.viewStart);
+        this.viewStart -= shift;
+        this.viewEnd -= shift;
+        this.dragX = event.clientX;
+        this.requestDraw();
+    } else {
+        this.canvas.title = this.describe(event.offsetX, event.offsetY);
+    }
+};
+
+TimelineRenderer.prototype.firstVisible = function(lane, time) {
+    // first row of the lane that starts at or after time
+    var low = lane.first;
+    var high = lane.last;
+    var start = this.timeline.start;
+    while (low < high) {
+        var middle = (low + high) >>> 1;
+        if (start[middle] < time) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    return low;
+};
+
+TimelineRenderer.prototype.describe = function(x, y) {
+    var laneIndex = Math.floor((y - this.axisHeight) / this.laneHeight);
+    var lane = this.timeline.lanes[laneIndex];
+    if (!lane || x < this.labelWidth) {
+        return "";
+    }
+    var t = this.timeline;
+    var time = this.xToTime(x);
+    var tolerance = (this.viewEnd - this.viewStart) / this.chartWidth();
+    for (var i = this.firstVisible(lane, time - lane.max_duration - tolerance); i < lane.last; i++) {
+        if (t.start[i] > time + tolerance) {
+            break;
+        }
+        if (t.end[i] >= time - tolerance) {
+            return lane.name + ": " + t.labels[t.label[i]] + " (" + t.start[i] + " - " + t.end[i] + ")";
+        }
+    }
+    return lane.name;
+};
+
+TimelineRenderer.prototype.draw = function() {
+    var context = this.context;
+    var t = this.timeline;
+    var width = this.chartWidth();
+    context.clearRect(0, 0, this.canvas.width, this.canvas.height);
+    this.drawAxis();
+
+    for (var laneIndex = 0; laneIndex < t.lanes.length; laneIndex++) {
+        var lane = t.lanes[laneIndex];
+        var top = this.axisHeight + laneIndex * this.laneHeight;
+        context.fillStyle = "#000000";
+        context.textBaseline = "middle";
+        context.fillText(lane.name, 2, top + this.laneHeight / 2, this.labelWidth - 4);
+
+        context.save();
+        context.beginPath();
+        context.rect(this.labelWidth, top, width, this.laneHeight);
+        context.clip();
+        var lastPixel = -Infinity;
+        for (var i = this.firstVisible(lane, this.viewStart - lane.max_duration); i < lane.last; i++) {
+            if (t.start[i] > this.viewEnd) {
+                break;
+            }
+            if (t.end[i] < this.viewStart) {
+                continue;
+            }
+            var x0 = this.timeToX(t.start[i]);
+            var x1 = this.timeToX(t.end[i]);
+            if (x1 - x0 < 1) {
+                // level of detail: merge actions narrower than a pixel into one mark per pixel column
+                var pixel = Math.floor(x0);
+                if (pixel <= lastPixel) {
+                    continue;
+                }
+                lastPixel = pixel;
+                x0 = pixel;
+                x1 = pixel + 1;
+            } else {
+                lastPixel = Math.floor(x1);
+            }
+            context.fillStyle = t.typeColours[t.type[i]][t.partial[i]];
+            context.fillRect(x0, top + 2, x1 - x0, this.laneHeight - 4);
+            if (x1 - x0 > 40) {
+                context.fillStyle = "#FFFFFF";
+                context.fillText(t.labels[t.label[i]], Math.max(x0, this.labelWidth) + 2, top + this.laneHeight / 2,
+                    x1 - Math.max(x0, this.labelWidth) - 4);
+            }
+        }
+        context.restore();
+    }
+};
+
+TimelineRenderer.prototype.drawAxis = function() {
+    var context = this.context;
+    var span = this.viewEnd - this.viewStart;
+    var step = Math.pow(10, Math.floor(Math.log10(span / 5)));
+    if (span / step > 20) {
+        step *= 5;
+    } else if (span / step > 10) {
+        step *= 2;
+    }
+    context.fillStyle = "#000000";
+    context.strokeStyle = "#DDDDDD";
+    context.textBaseline = "top";
+    for (var tick = Math.ceil(this.viewStart / step) * step; tick <= this.viewEnd; tick += step) {
+        var x = Math.round(this.timeToX(tick)) + 0.5;
+        context.beginPath();
+        context.moveTo(x, this.axisHeight - 4);
+        context.lineTo(x, this.canvas.height);
+        context.stroke();
+        context.fillText(+tick.toPrecision(6), x + 2, 2);
+    }
+};
+
 function getAgents(obj) {
     if (obj.agent) {
         return [obj.agent];
@@ -160,4 +487,4 @@ function getAgents(obj) {
     } else {
         throw "Object does not have agents";
     }
-}
\ No newline at end of file
+}